@@ -1,4 +1,5 @@
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 from dotenv import load_dotenv
 from fastapi import Depends, FastAPI, HTTPException, status
@@ -8,9 +9,13 @@ from sqlalchemy.orm import Session
 from app import models
 from app.core.security import get_password_hash, verify_password
 from app.db import get_db
-from app.routers import annotations, auth, crawl_house, houses, predict
+from app.routers import annotations, auth, crawl_house, houses, predict, stats, train
 from app.routers.auth import get_current_user
 from app.schemas import PasswordUpdate, UserOut, UserUpdate
+from app.services.micro_batcher import MICROBATCH_ENABLED, batcher
+from app.services.model_registry import registry
+from app.services.prediction_cache import prediction_cache
+from app.services.training_jobs import job_service
 
 if not os.getenv("DB_HOST"):
     BASE_DIR = Path(__file__).resolve().parents[1]
@@ -18,13 +23,34 @@ if not os.getenv("DB_HOST"):
     if ENV_PATH.exists():
         load_dotenv(ENV_PATH)
 
-app = FastAPI(title="House Price API")
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # 模型切换时清空一次预测缓存
+    if prediction_cache is not None:
+        registry.add_swap_listener(prediction_cache.on_model_swap)
+    # 启动时同步加载并预热当前模型，之后由后台线程监听版本切换
+    registry.start_watcher()
+    if MICROBATCH_ENABLED:
+        await batcher.start()
+    job_service.start()
+    try:
+        yield
+    finally:
+        job_service.stop()
+        await batcher.stop()
+        registry.stop_watcher()
+
+
+app = FastAPI(title="House Price API", lifespan=lifespan)
 
 app.include_router(auth.router)
 app.include_router(annotations.router)
 app.include_router(crawl_house.router)
 app.include_router(houses.router)
 app.include_router(predict.router)
+app.include_router(stats.router)
+app.include_router(train.router)
 
 app.add_middleware(
     CORSMiddleware,
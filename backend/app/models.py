@@ -1,11 +1,33 @@
 from datetime import datetime
-from sqlalchemy import JSON, Column, DateTime, Float, Integer, String, func
+from sqlalchemy import JSON, Column, DateTime, Float, Index, Integer, String, UniqueConstraint, func
 
 from .db import Base
 
 
 class CrawlHouse(Base):
     __tablename__ = "crawl_houses"
+    __table_args__ = (
+        # /crawl-houses 游标分页：ORDER BY crawl_time DESC, id DESC
+        Index("ix_crawl_houses_crawl_time_id", "crawl_time", "id"),
+        # 按区筛选 + 白名单排序键（见 app/services/crawl_query.py）
+        Index("ix_crawl_houses_district_crawl_time", "district", "crawl_time", "id"),
+        Index("ix_crawl_houses_district_unit_price", "district", "unit_price", "id"),
+        Index("ix_crawl_houses_district_total_price", "district", "total_price_wan", "id"),
+        Index("ix_crawl_houses_district_area", "district", "area_sqm", "id"),
+        Index("ix_crawl_houses_unit_price_id", "unit_price", "id"),
+        Index("ix_crawl_houses_total_price_id", "total_price_wan", "id"),
+        Index("ix_crawl_houses_area_id", "area_sqm", "id"),
+        # 待标注队列：?annotated=false 按抓取时间倒序
+        Index("ix_crawl_houses_annotated_crawl_time", "is_annotated", "crawl_time", "id"),
+        # 标题 / 小区名关键字检索（MySQL ngram 全文索引）
+        Index(
+            "ix_crawl_houses_title_community_ft",
+            "title",
+            "community_name",
+            mysql_prefix="FULLTEXT",
+            mysql_with_parser="ngram",
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -39,7 +61,52 @@ class CrawlHouse(Base):
 
     crawl_time = Column(DateTime, default=datetime.utcnow)
 
-    is_annotated = Column(Integer, default=0)
+    # 是否已被标注进 houses（冗余字段，由标注 / 删除房源时在同一事务中维护）
+    is_annotated = Column(Integer, default=0, server_default="0", nullable=False)
+
+    # 价格 / 关注数 / 标签的内容哈希，导入时据此判断是否写入 crawl_price_history
+    content_hash = Column(String(32))
+
+
+# 爬虫房源的价格历史（追加写）：只在价格、关注数或标签变化时记一行
+class CrawlPriceHistory(Base):
+    __tablename__ = "crawl_price_history"
+    __table_args__ = (
+        Index("ix_crawl_price_history_house_id_crawl_time", "house_id", "crawl_time"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+
+    house_id = Column(String(32), nullable=False)
+    crawl_time = Column(DateTime, nullable=False)
+
+    total_price_wan = Column(Float)
+    unit_price = Column(Integer)
+    follow_count = Column(Integer)
+    tags = Column(JSON)
+
+    content_hash = Column(String(32), nullable=False)
+
+
+# crawl_houses 的分桶统计（导入时增量维护，看板直接读这里）：
+# (区, 户型, 指标, 桶) → 房源数、指标值之和；区 / 户型缺失记为空串
+class CrawlStatsBucket(Base):
+    __tablename__ = "crawl_stats_buckets"
+    __table_args__ = (
+        UniqueConstraint("metric", "district", "layout", "bucket", name="uq_crawl_stats_buckets_key"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+
+    # listing / unit_price / total_price / area / build_year
+    metric = Column(String(16), nullable=False)
+    district = Column(String(64), nullable=False, default="")
+    layout = Column(String(32), nullable=False, default="")
+    # 桶下界 = bucket * 桶宽（见 app/services/crawl_stats.py）
+    bucket = Column(Integer, nullable=False)
+
+    count = Column(Integer, nullable=False, default=0)
+    total = Column(Float, nullable=False, default=0)
 
 
 # 训练用房源（干净样本）
@@ -57,6 +124,28 @@ class House(Base):
     price = Column(Float, nullable=False)
 
 
+# houses 表的变更日志（追加写），增量训练按 seq 消费
+class HouseChange(Base):
+    __tablename__ = "house_changes"
+
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+
+    house_id = Column(Integer, nullable=False, index=True)
+    source_house_id = Column(String(64), nullable=True)
+
+    # create / update / delete
+    op = Column(String(8), nullable=False)
+    # +1 计入样本，-1 撤销样本（update 记录一对 -旧 / +新）
+    weight = Column(Integer, nullable=False)
+
+    area_sqm = Column(Float, nullable=False)
+    bedrooms = Column(Integer, nullable=False)
+    age_years = Column(Integer, nullable=False)
+    price = Column(Float, nullable=False)
+
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Literal, Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 
 from app.db import get_db
 from app import models
 from app.schemas import AnnotationCreate
+from app.services import annotation_sync
+from app.services.incremental_training import maybe_retrain, record_house_change
 
 router = APIRouter(prefix="/annotations", tags=["annotations"])
 
@@ -11,12 +15,13 @@ router = APIRouter(prefix="/annotations", tags=["annotations"])
 @router.post("")
 def create_annotation(
     data: AnnotationCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
 ):
     """
     标注一个爬虫房源：
     - 幂等：同一个 source_house_id 只能标注一次
-    - 成功后写入 houses 表（训练数据）
+    - 成功后写入 houses 表（训练数据），并在同一事务中标记 crawl_houses.is_annotated
     """
 
     # 1️⃣ 防止重复标注
@@ -39,20 +44,70 @@ def create_annotation(
 
     db.add(house)
     try:
+        record_house_change(db, "create", house)
+        annotation_sync.mark_annotated(db, house.source_house_id, True)
         db.commit()
         db.refresh(house)
     except Exception:
         db.rollback()
         raise HTTPException(status_code=500, detail="写入标注数据失败")
 
+    # 3️⃣ 累计足够多的新样本后自动增量重训
+    background_tasks.add_task(maybe_retrain)
+
     return {"ok": True, "house_id": house.id}
 
 
 @router.get("/ids")
 def get_annotated_source_ids(db: Session = Depends(get_db)):
     """
-    返回所有已经标注过的爬虫 house_id
-    给前端用来标记“已标注”
+    返回所有已经标注过的爬虫 house_id（全量，保留给旧客户端）
+    前端改用 /annotations/sync 增量同步
     """
-    rows = db.query(models.House.source_house_id).all()
+    rows = (
+        db.query(models.House.source_house_id)
+        .filter(models.House.source_house_id.is_not(None))
+        .all()
+    )
     return [r[0] for r in rows]
+
+
+def _encode(ids: list[str], encoding: str):
+    if encoding == "packed":
+        packed, other = annotation_sync.pack_ids(ids)
+        return {"packed": packed, "other": other}
+    return ids
+
+
+@router.get("/sync")
+def sync_annotated_source_ids(
+    response: Response,
+    since: Optional[int] = Query(None, ge=0),
+    encoding: Literal["json", "packed"] = "json",
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    """
+    已标注 house_id 的增量同步：
+    - 不带 since：返回全量 ids 和当前 seq，带 ETag，没有变化时返回 304
+    - since=<seq>：只返回之后新增 / 删除的 id（added / removed）
+    - full=true 时客户端应以 ids 覆盖本地状态（since 过旧或无效时也会退回全量）
+    - encoding=packed：id 列表编码为 {packed: base64(差分 varint), other: [非数字 id]}
+    """
+    if since is None:
+        seq = annotation_sync.current_seq(db)
+        etag = f'W/"annotations-{seq}"'
+        if if_none_match == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        result = annotation_sync.snapshot(db)
+    else:
+        result = annotation_sync.delta(db, since)
+    response.headers["ETag"] = f'W/"annotations-{result.seq}"'
+
+    body = {"seq": result.seq, "full": result.full}
+    if result.full:
+        body["ids"] = _encode(result.ids, encoding)
+    else:
+        body["added"] = _encode(result.added, encoding)
+        body["removed"] = _encode(result.removed, encoding)
+    return body
@@ -1,12 +1,80 @@
-from fastapi import APIRouter, Depends
+from typing import Literal, Optional, Union
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from app.db import get_db
-from app import models, old_schemas
+from app import models
+from app.schemas import CrawlHouseOut, CrawlHousePage, CrawlPriceHistoryOut
+from app.services.crawl_query import DEFAULT_SORT, SORT_KEYS, CrawlHouseFilters, apply_filters
+from app.services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_page
 
 router = APIRouter(prefix="/crawl-houses", tags=["crawl"])
 
-@router.get("", response_model=list[old_schemas.CrawlHouseOut])
-def list_crawl_houses(db: Session = Depends(get_db)):
-    return db.query(models.CrawlHouse).order_by(
-        models.CrawlHouse.crawl_time.desc()
-    ).limit(100).all()
+# 不带 cursor / limit 的旧式请求返回普通列表，条数与分页前一致
+LEGACY_LIST_LIMIT = 100
+
+@router.get("", response_model=Union[CrawlHousePage, list[CrawlHouseOut]])
+def list_crawl_houses(
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    district: Optional[str] = None,
+    min_price: Optional[float] = Query(None, ge=0, description="总价下限（万）"),
+    max_price: Optional[float] = Query(None, ge=0, description="总价上限（万）"),
+    min_area: Optional[float] = Query(None, ge=0),
+    max_area: Optional[float] = Query(None, ge=0),
+    min_year: Optional[int] = None,
+    max_year: Optional[int] = None,
+    layout: Optional[str] = None,
+    q: Optional[str] = Query(None, max_length=64, description="标题 / 小区名关键字"),
+    annotated: Optional[bool] = Query(None, description="false 只看未标注（待标注队列）"),
+    sort: Literal["crawl_time", "unit_price", "total_price", "area"] = DEFAULT_SORT,
+    order: Literal["asc", "desc"] = "desc",
+    db: Session = Depends(get_db),
+):
+    # 默认最新的在前；游标是上一页最后一行的 (排序列, id)，走 (…, 排序列, id) 复合索引
+    filters = CrawlHouseFilters(
+        district=district,
+        min_price=min_price,
+        max_price=max_price,
+        min_area=min_area,
+        max_area=max_area,
+        min_year=min_year,
+        max_year=max_year,
+        layout=layout,
+        q=q,
+        annotated=annotated,
+    )
+    legacy = cursor is None and limit is None
+    try:
+        query = apply_filters(db.query(models.CrawlHouse), filters, db.get_bind().dialect.name)
+        items, next_cursor = keyset_page(
+            query,
+            [SORT_KEYS[sort], models.CrawlHouse.id],
+            cursor,
+            LEGACY_LIST_LIMIT if legacy else limit or DEFAULT_PAGE_SIZE,
+            nullable_first=True,
+            descending=order == "desc",
+            scope=f"{sort}:{order}",
+        )
+    except ValueError as e:
+        # InvalidCursor 或不合法的筛选条件
+        raise HTTPException(status_code=400, detail=str(e))
+    if legacy:
+        return items
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/{house_id}/history", response_model=list[CrawlPriceHistoryOut])
+def get_price_history(house_id: str, db: Session = Depends(get_db)):
+    # 走 (house_id, crawl_time) 复合索引，按时间正序返回价格变化点
+    rows = (
+        db.query(models.CrawlPriceHistory)
+        .filter(models.CrawlPriceHistory.house_id == house_id)
+        .order_by(models.CrawlPriceHistory.crawl_time, models.CrawlPriceHistory.id)
+        .all()
+    )
+    if not rows:
+        exists = db.query(models.CrawlHouse.id).filter(models.CrawlHouse.house_id == house_id).first()
+        if exists is None:
+            raise HTTPException(status_code=404, detail="房源不存在")
+    return rows
@@ -1,33 +1,55 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional, Union
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from app import models
 from app.db import get_db
 from app.routers.auth import get_current_user
-from app.schemas import HouseCreate, HouseOut
+from app.schemas import HouseCreate, HouseOut, HousePage
+from app.services.annotation_sync import mark_annotated
+from app.services.incremental_training import house_values, maybe_retrain, record_house_change
+from app.services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursor, keyset_page
 
 router = APIRouter(prefix="/houses", tags=["houses"])
 
 
-@router.get("", response_model=list[HouseOut])
-def list_houses(db: Session = Depends(get_db), _user: models.User = Depends(get_current_user)):
-    return db.query(models.House).order_by(models.House.id.desc()).all()
+@router.get("", response_model=Union[HousePage, list[HouseOut]])
+def list_houses(
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    _user: models.User = Depends(get_current_user),
+):
+    query = db.query(models.House)
+    if cursor is None and limit is None:
+        # 兼容旧客户端：不带分页参数时仍返回完整列表（id 倒序）
+        return query.order_by(models.House.id.desc()).all()
+    # id 倒序，游标是上一页最后一行的 id
+    try:
+        items, next_cursor = keyset_page(query, [models.House.id], cursor, limit or DEFAULT_PAGE_SIZE)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor}
 
 
 @router.post("", response_model=HouseOut, status_code=status.HTTP_201_CREATED)
 def create_house(
     payload: HouseCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     _user: models.User = Depends(get_current_user),
 ):
     house = models.House(**payload.model_dump())
     db.add(house)
     try:
+        record_house_change(db, "create", house)
         db.commit()
         db.refresh(house)
     except Exception:
         db.rollback()
         raise HTTPException(status_code=500, detail="创建房源失败")
+    background_tasks.add_task(maybe_retrain)
     return house
 
 
@@ -35,6 +57,7 @@ def create_house(
 def update_house(
     house_id: int,
     payload: HouseCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     _user: models.User = Depends(get_current_user),
 ):
@@ -42,21 +65,25 @@ def update_house(
     if house is None:
         raise HTTPException(status_code=404, detail="房源不存在")
 
+    previous = house_values(house)
     for field, value in payload.model_dump().items():
         setattr(house, field, value)
 
     try:
+        record_house_change(db, "update", house, previous=previous)
         db.commit()
         db.refresh(house)
     except Exception:
         db.rollback()
         raise HTTPException(status_code=500, detail="更新房源失败")
+    background_tasks.add_task(maybe_retrain)
     return house
 
 
 @router.delete("/{house_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_house(
     house_id: int,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     _user: models.User = Depends(get_current_user),
 ):
@@ -66,7 +93,10 @@ def delete_house(
 
     db.delete(house)
     try:
+        record_house_change(db, "delete", house)
+        mark_annotated(db, house.source_house_id, False)
         db.commit()
     except Exception:
         db.rollback()
         raise HTTPException(status_code=500, detail="删除房源失败")
+    background_tasks.add_task(maybe_retrain)
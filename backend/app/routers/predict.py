@@ -1,24 +1,145 @@
+import json
+import math
+import os
+
 from fastapi import APIRouter
-from fastapi import HTTPException
+from fastapi import HTTPException, Request
 from app.schemas import PredictRequest
-from app.train import load_model
+from app.services.features import FeatureMatrixBuilder
+from app.services.micro_batcher import batcher
+from app.services.model_registry import ServingModel, registry
+from app.services.prediction_cache import normalize_features, prediction_cache
 import numpy as np
 
 router = APIRouter(tags=["predict"])
 
-try:
-    model = load_model()
-except FileNotFoundError:
-    model = None
+# 单次批量预测允许的最大行数
+BATCH_MAX_ROWS = int(os.getenv("PREDICT_BATCH_MAX_ROWS", "10000"))
 
-@router.post("/predict")
-def predict(req: PredictRequest):
-    if model is None:
+
+def _require_model() -> ServingModel:
+    # 取一次引用，整个请求都用这个版本；热切换不会影响进行中的请求
+    current = registry.current()
+    if current is None:
         raise HTTPException(
             status_code=503,
-            detail="模型文件不存在，请先运行训练脚本生成 model.pkl",
+            detail="模型不存在，请先运行训练脚本发布模型（python -m app.train）",
         )
+    return current
+
+
+@router.post("/predict")
+async def predict(req: PredictRequest):
+    current = _require_model()
+    key = normalize_features(req.area_sqm, req.bedrooms, req.age_years)
+
+    if prediction_cache is not None:
+        price = await prediction_cache.get(current.version, key)
+        if price is not None:
+            return {"predicted_price": price, "model_version": current.version}
+
+    if batcher.running:
+        price, version = await batcher.submit(key)
+    else:
+        price, version = current.predict_one(key), current.version
+    if not math.isfinite(price):
+        # 输入合法但超出模型的数值范围（如极大的面积），结果无法用 JSON 表示
+        raise HTTPException(status_code=422, detail="预测结果超出数值范围，请检查输入")
+
+    if prediction_cache is not None:
+        await prediction_cache.set(version, key, price)
+    return {"predicted_price": price, "model_version": version}
+
+
+async def _read_ndjson(request: Request, builder: FeatureMatrixBuilder) -> None:
+    # 流式读取：按行解码，不把整个请求体拼成一个大字符串
+    pending = b""
+    async for chunk in request.stream():
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            _add_ndjson_line(builder, line)
+    _add_ndjson_line(builder, pending)
+
+
+def _add_ndjson_line(builder: FeatureMatrixBuilder, line: bytes) -> None:
+    if not line.strip():
+        return
+    try:
+        row = json.loads(line)
+    except ValueError:
+        builder.add_error("JSON 解析失败")
+        return
+    builder.add(row)
+
+
+@router.post("/predict/batch")
+async def predict_batch(request: Request):
+    """
+    批量预测：
+    - application/json：[{...}, ...] 或 {"items": [{...}, ...]}
+    - application/x-ndjson：每行一个特征对象
+    每行可以是对象或按 area_sqm, bedrooms, age_years 顺序的数组；
+    非法行在 errors 中返回，对应位置的 predictions 为 null，不影响其它行。
+    """
+    current = _require_model()
+    builder = FeatureMatrixBuilder(max_rows=BATCH_MAX_ROWS)
+    content_type = request.headers.get("content-type", "")
+
+    try:
+        if "ndjson" in content_type:
+            await _read_ndjson(request, builder)
+        else:
+            try:
+                payload = json.loads(await request.body())
+            except ValueError:
+                raise HTTPException(status_code=400, detail="请求体不是合法的 JSON")
+
+            rows = payload.get("items") if isinstance(payload, dict) else payload
+            if not isinstance(rows, list):
+                raise HTTPException(
+                    status_code=400,
+                    detail="请求体必须是数组，或包含 items 数组的对象",
+                )
+            builder.extend(rows)
+    except OverflowError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    X = builder.matrix()
+    predictions = np.full(builder.total, np.nan)
+    if len(X):
+        # 整批只调用一次向量化 predict
+        predictions[builder.indices] = current.predict(X)
+
+    # 输入合法但预测结果不是有限数（如 area_sqm=1e308）：按单行错误处理，不能让整批 JSON 编码失败
+    errors = list(builder.errors)
+    invalid = {err["index"] for err in errors}
+    for index in np.flatnonzero(~np.isfinite(predictions)).tolist():
+        if index not in invalid:
+            errors.append({"index": index, "error": "预测结果超出数值范围"})
+            invalid.add(index)
+    errors.sort(key=lambda err: err["index"])
+
+    values = predictions.tolist()
+    for index in invalid:
+        values[index] = None
+
+    return {
+        "predictions": values,
+        "errors": errors,
+        "count": builder.total,
+        "failed": len(errors),
+        "model_version": current.version,
+    }
+
 
-    X = np.array([[req.area_sqm, req.bedrooms, req.age_years]])
-    price = model.predict(X)[0]
-    return {"predicted_price": float(price)}
+@router.get("/predict/stats")
+def predict_stats():
+    current = registry.current()
+    grid = current.grid if current is not None else None
+    return {
+        "model_version": current.version if current is not None else None,
+        "micro_batcher": batcher.stats(),
+        "prediction_grid": grid.stats() if grid is not None else None,
+        "prediction_cache": prediction_cache.stats() if prediction_cache is not None else None,
+    }
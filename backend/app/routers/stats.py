@@ -0,0 +1,52 @@
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.db import get_db
+from app.schemas import HistogramOut, StatsSummaryOut
+from app.services import crawl_stats
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+
+@router.get("/summary", response_model=list[StatsSummaryOut])
+def get_summary(
+    group_by: Optional[Literal["district", "layout"]] = None,
+    district: Optional[str] = None,
+    layout: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    爬虫房源汇总（读 crawl_stats_buckets，不扫明细）：
+    - 不带 group_by：一行整体统计
+    - group_by=district / layout：按区 / 户型分组，房源数多的在前
+    """
+    items = crawl_stats.summary(db, group_by=group_by, district=district, layout=layout)
+    if not items and group_by is None:
+        return [StatsSummaryOut(count=0)]
+    return items
+
+
+@router.get("/histogram/{metric}", response_model=HistogramOut)
+def get_histogram(
+    metric: Literal["unit_price", "total_price", "area", "build_year"],
+    district: Optional[str] = None,
+    layout: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    单价（元/㎡）/ 总价（万）/ 面积（㎡）/ 建成年份的分布直方图，桶宽固定
+    """
+    hist = crawl_stats.histogram(db, metric, district=district, layout=layout)
+    return {
+        "metric": metric,
+        "width": hist.width,
+        "count": hist.count,
+        "mean": hist.mean(),
+        "median": hist.median(),
+        "buckets": [
+            {"start": b * hist.width, "end": (b + 1) * hist.width, "count": hist.buckets[b][0]}
+            for b in sorted(hist.buckets)
+        ],
+    }
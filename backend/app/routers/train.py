@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from app import models
+from app.routers.auth import get_current_user
+from app.schemas import TrainJobCreate, TrainJobOut
+from app.services.training_jobs import job_service
+
+router = APIRouter(prefix="/train", tags=["train"])
+
+
+@router.post("/jobs", response_model=TrainJobOut, status_code=status.HTTP_202_ACCEPTED)
+def submit_job(payload: TrainJobCreate, _user: models.User = Depends(get_current_user)):
+    params: dict = {}
+    if payload.kind in {"cv", "benchmark"}:
+        params["folds"] = payload.folds
+        if payload.kind == "benchmark" and payload.models:
+            params["models"] = payload.models
+    elif payload.kind == "incremental":
+        params["rebuild"] = payload.rebuild
+    return job_service.submit(payload.kind, params)
+
+
+@router.get("/jobs", response_model=list[TrainJobOut])
+def list_jobs(
+    limit: int = Query(default=50, ge=1, le=200),
+    _user: models.User = Depends(get_current_user),
+):
+    return job_service.list(limit)
+
+
+@router.get("/jobs/{job_id}", response_model=TrainJobOut)
+def get_job(job_id: str, _user: models.User = Depends(get_current_user)):
+    job = job_service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="训练任务不存在")
+    return job
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=TrainJobOut)
+def cancel_job(job_id: str, _user: models.User = Depends(get_current_user)):
+    job = job_service.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="训练任务不存在")
+    return job
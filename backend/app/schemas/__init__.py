@@ -1,8 +1,11 @@
 from .user import UserCreate, UserRead, UserOut, UserUpdate, PasswordUpdate
 from .auth import Token, TokenData
 from .annotation import AnnotationCreate
-from .house import HouseCreate, HouseOut
+from .crawl_house import CrawlHouseOut, CrawlHousePage, CrawlPriceHistoryOut
+from .house import HouseCreate, HouseOut, HousePage
 from .predict import PredictRequest
+from .stats import HistogramOut, StatsSummaryOut
+from .train import TrainJobCreate, TrainJobOut
 
 __all__ = [
     "UserCreate",
@@ -13,7 +16,15 @@ __all__ = [
     "Token",
     "TokenData",
     "AnnotationCreate",
+    "CrawlHouseOut",
+    "CrawlHousePage",
+    "CrawlPriceHistoryOut",
     "HouseCreate",
     "HouseOut",
+    "HousePage",
     "PredictRequest",
+    "HistogramOut",
+    "StatsSummaryOut",
+    "TrainJobCreate",
+    "TrainJobOut",
 ]
@@ -1,13 +1,37 @@
-from pydantic import BaseModel, ConfigDict
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict, Field
 
 class CrawlHouseOut(BaseModel):
+    # 爬虫字段可能解析失败为空；按价格 / 面积排序时这些行也会出现在结果里
     house_id: str
-    title: str
-    area_sqm: float
-    layout: str
-    build_year: int
-    total_price_wan: float
-    unit_price: float
-    district: str
+    title: Optional[str] = None
+    area_sqm: Optional[float] = None
+    layout: Optional[str] = None
+    build_year: Optional[int] = None
+    total_price_wan: Optional[float] = None
+    unit_price: Optional[float] = None
+    district: Optional[str] = None
+    cover_image: Optional[str] = None
+    crawl_time: Optional[datetime] = None
+    # 来自 crawl_houses.is_annotated，列表里直接带出，无需再查 /annotations
+    annotated: bool = Field(False, validation_alias="is_annotated")
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class CrawlHousePage(BaseModel):
+    items: list[CrawlHouseOut]
+    # 下一页游标；为空表示已经是最后一页
+    next_cursor: Optional[str] = None
+
+
+class CrawlPriceHistoryOut(BaseModel):
+    crawl_time: datetime
+    total_price_wan: Optional[float] = None
+    unit_price: Optional[int] = None
+    follow_count: Optional[int] = None
+    tags: Optional[list[str]] = None
 
     model_config = ConfigDict(from_attributes=True)
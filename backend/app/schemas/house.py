@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseModel, ConfigDict
 
 class HouseCreate(BaseModel):
@@ -10,3 +12,9 @@ class HouseOut(HouseCreate):
     id: int
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class HousePage(BaseModel):
+    items: list[HouseOut]
+    # 下一页游标；为空表示已经是最后一页
+    next_cursor: Optional[str] = None
@@ -0,0 +1,30 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class StatsSummaryOut(BaseModel):
+    # group_by=district / layout 时带上分组键
+    district: Optional[str] = None
+    layout: Optional[str] = None
+    count: int
+    avg_unit_price: Optional[float] = None
+    # 由直方图插值，误差不超过一个桶宽
+    median_unit_price: Optional[float] = None
+    avg_total_price_wan: Optional[float] = None
+    avg_area_sqm: Optional[float] = None
+
+
+class HistogramBucketOut(BaseModel):
+    start: float
+    end: float
+    count: int
+
+
+class HistogramOut(BaseModel):
+    metric: str
+    width: float
+    count: int
+    mean: Optional[float] = None
+    median: Optional[float] = None
+    buckets: list[HistogramBucketOut]
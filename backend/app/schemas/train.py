@@ -0,0 +1,24 @@
+from typing import Any, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+class TrainJobCreate(BaseModel):
+    kind: Literal["full", "incremental", "cv", "benchmark"] = "full"
+    # cv / benchmark：交叉验证折数；incremental：是否从全表重建统计量
+    folds: int = Field(default=5, ge=2, le=20)
+    rebuild: bool = False
+    # benchmark：候选模型（linear / ridge / gbr / knn），为空表示全部
+    models: Optional[list[Literal["linear", "ridge", "gbr", "knn"]]] = None
+
+class TrainJobOut(BaseModel):
+    id: str
+    kind: str
+    params: dict[str, Any]
+    status: str
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    owner: Optional[str] = None
+    result: Optional[dict[str, Any]] = None
+    error: Optional[str] = None
+    metrics: dict[str, Any] = {}
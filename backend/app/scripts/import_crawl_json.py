@@ -1,13 +1,22 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import json
+import argparse
+import logging
+import time
 from pathlib import Path
-from datetime import datetime
 from sqlalchemy.orm import Session
 
 from app.db import SessionLocal, Base, engine
-from app.models import CrawlHouse
+from app.services.crawl_import import (
+    CRAWL_IMPORT_CHUNK,
+    CRAWL_IMPORT_WORKERS,
+    IMPORT_STATE_DIR,
+    SEEN_INDEX_FILE,
+    import_files,
+)
+from app.spider.lianjia.seen_index import SeenIndex
+from app.spider.lianjia.storage import SEGMENT_DIR, list_segments
 
 
 # ======================
@@ -20,72 +29,78 @@ CRAWL_FOLDER = (
 ).resolve()
 
 
-def main():
-    print(f"📂 JSON 目录：{CRAWL_FOLDER}")
-
-    if not CRAWL_FOLDER.exists():
-        raise RuntimeError(f"JSON 目录不存在：{CRAWL_FOLDER}")
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="导入链家爬虫 JSON 到 crawl_houses")
+    parser.add_argument("--folder", type=Path, default=CRAWL_FOLDER, help="JSON 目录（旧版一套房一个文件）")
+    parser.add_argument("--segments", type=Path, default=SEGMENT_DIR, help="NDJSON 分段目录")
+    parser.add_argument("--chunk-size", type=int, default=CRAWL_IMPORT_CHUNK, help="每次提交的行数")
+    parser.add_argument("--workers", type=int, default=CRAWL_IMPORT_WORKERS, help="解析进程数")
+    parser.add_argument("--state-dir", type=Path, default=IMPORT_STATE_DIR, help="检查点目录")
+    parser.add_argument("--no-resume", action="store_true", help="忽略上次中断留下的检查点")
+    parser.add_argument("--full", action="store_true", help="忽略导入清单，重新读取全部文件")
+    parser.add_argument(
+        "--skip-seen",
+        action="store_true",
+        help="按 house_id 跳过以前导入过的房源（已见索引，不再刷新已有记录）",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    folder = args.folder.resolve()
+    segment_dir = args.segments.resolve()
+    print(f"📂 JSON 目录：{folder}")
+    print(f"📂 分段目录：{segment_dir}")
+
+    if not folder.exists() and not segment_dir.exists():
+        raise RuntimeError(f"JSON 目录和分段目录都不存在：{folder}, {segment_dir}")
 
     # 确保表存在（仅用于 dev，本质上应由 Alembic 管理）
     Base.metadata.create_all(bind=engine)
 
-    db: Session = SessionLocal()
+    json_files = list(folder.glob("*.json")) if folder.exists() else []
+    segments = list_segments(segment_dir)
+    print(f"📂 发现 {len(json_files)} 个 JSON 文件，{len(segments)} 个分段")
 
-    json_files = list(CRAWL_FOLDER.glob("*.json"))
-    print(f"📂 发现 {len(json_files)} 个 JSON 文件")
-
-    inserted = 0
-    skipped = 0
-
-    for json_path in json_files:
-        try:
-            data = json.loads(json_path.read_text(encoding="utf-8"))
-
-            house_id = data.get("house_id")
-            if not house_id:
-                print(f"⚠️ 缺少 house_id，跳过：{json_path.name}")
-                skipped += 1
-                continue
-
-            # 防止重复导入
-            exists = (
-                db.query(CrawlHouse)
-                .filter(CrawlHouse.house_id == house_id)
-                .first()
-            )
-            if exists:
-                skipped += 1
-                continue
-
-            house = CrawlHouse(
-                house_id=house_id,
-                title=data.get("title"),
-                area_sqm=data.get("area_sqm"),
-                layout=data.get("layout"),
-                build_year=data.get("build_year"),
-                total_price_wan=data.get("total_price_wan"),
-                unit_price=data.get("unit_price"),
-                district=data.get("district"),
-                crawl_time=(
-                    datetime.strptime(data["crawl_time"], "%Y-%m-%d %H:%M:%S")
-                    if data.get("crawl_time")
-                    else None
-                ),
-            )
-
-            db.add(house)
-            inserted += 1
-
-        except Exception as e:
-            print(f"❌ 导入失败 {json_path.name}: {e}")
-            skipped += 1
-
-    db.commit()
-    db.close()
-
-    print("✅ 导入完成")
-    print(f"   新增：{inserted}")
-    print(f"   跳过：{skipped}")
+    seen = SeenIndex.load(args.state_dir / SEEN_INDEX_FILE) if args.skip_seen else None
+
+    started = time.perf_counter()
+    db: Session = SessionLocal()
+    try:
+        stats = import_files(
+            db,
+            json_files + segments,
+            chunk_size=args.chunk_size,
+            workers=args.workers,
+            state_dir=args.state_dir,
+            resume=not args.no_resume,
+            use_manifest=not args.full,
+            seen=seen,
+        )
+    finally:
+        db.close()
+    if seen is not None:
+        seen.save()
+
+    for failure in stats.failed[:20]:
+        target = failure.get("file") or failure.get("house_id")
+        print(f"❌ 导入失败 {target}: {failure['error']}")
+    if len(stats.failed) > 20:
+        print(f"   …… 另有 {len(stats.failed) - 20} 条失败")
+
+    print(f"✅ 导入完成（{time.perf_counter() - started:.1f}s）")
+    print(f"   文件：新增 {stats.new} / 变化 {stats.changed} / 未变化 {stats.unchanged}")
+    print(f"   解析：{stats.parsed}")
+    print(f"   重复：{stats.duplicates}")
+    if seen is not None:
+        print(f"   已导入过（跳过）：{stats.skipped_seen}")
+    print(f"   写入：{stats.written}")
+    print(f"   价格历史：{stats.history}")
+    if stats.resumed:
+        print(f"   续传跳过：{stats.resumed}")
+    print(f"   失败：{len(stats.failed)}")
 
 
 if __name__ == "__main__":
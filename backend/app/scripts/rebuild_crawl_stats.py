@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按 crawl_houses 全量重算 crawl_stats_buckets。
+平时由导入增量维护；首次上线、手工改过 crawl_houses 或怀疑统计有偏差时运行。
+"""
+import argparse
+import time
+
+from app.db import Base, SessionLocal, engine
+from app.services.crawl_stats import REBUILD_BATCH, rebuild
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="重算爬虫房源统计表 crawl_stats_buckets")
+    parser.add_argument("--batch-size", type=int, default=REBUILD_BATCH, help="流式读取 / 写入的批大小")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # 确保表存在（仅用于 dev，本质上应由 Alembic 管理）
+    Base.metadata.create_all(bind=engine)
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        buckets = rebuild(db, batch_size=args.batch_size)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    print(f"✅ 统计表重算完成：{buckets} 个桶，耗时 {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
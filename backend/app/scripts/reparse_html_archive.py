@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+离线重新解析列表页 HTML 归档，并通过导入程序写回 crawl_houses：
+
+    python -m app.scripts.reparse_html_archive --since 2026-09-01 --until 2026-09-30
+    python -m app.scripts.reparse_html_archive --dry-run   # 只解析、统计，不写库
+
+解析用满全部 CPU 核（--workers），crawl_time 沿用页面的原始抓取时间，
+同一 house_id 出现在多页时保留最新一次抓取（与导入程序的去重规则一致）。
+"""
+
+import argparse
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from sqlalchemy.orm import Session
+
+from app.db import SessionLocal, Base, engine
+from app.services.crawl_import import (
+    CRAWL_IMPORT_CHUNK,
+    CRAWL_IMPORT_WORKERS,
+    ImportStats,
+    import_records,
+    normalize_record,
+)
+from app.spider.lianjia.archive import ARCHIVE_DIR, ArchiveEntry, iter_entries, reparse_entry
+
+
+def _reparse(job: tuple[str, ArchiveEntry]) -> tuple[str, list[dict], str | None]:
+    """子进程入口：返回 (文件, 规范化后的记录, 错误)。"""
+    archive_dir, entry = job
+    try:
+        records = [normalize_record(r) for r in reparse_entry(Path(archive_dir), entry)]
+    except (OSError, EOFError, ValueError) as e:
+        return entry.file, [], f"{type(e).__name__}: {e}"
+    return entry.file, records, None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="离线重新解析列表页 HTML 归档")
+    parser.add_argument("--archive-dir", type=Path, default=ARCHIVE_DIR, help="HTML 归档目录")
+    parser.add_argument("--since", help="起始日期（YYYY-MM-DD，含）")
+    parser.add_argument("--until", help="结束日期（YYYY-MM-DD，含）")
+    parser.add_argument("--workers", type=int, default=CRAWL_IMPORT_WORKERS, help="解析进程数")
+    parser.add_argument("--chunk-size", type=int, default=CRAWL_IMPORT_CHUNK, help="每次提交的行数")
+    parser.add_argument("--dry-run", action="store_true", help="只解析，不写入数据库")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    archive_dir = args.archive_dir.resolve()
+    entries = list(iter_entries(archive_dir, args.since, args.until))
+    print(f"📂 归档目录：{archive_dir}")
+    print(f"📄 待解析页面：{len(entries)}")
+    if not entries:
+        return
+
+    started = time.perf_counter()
+    jobs = [(str(archive_dir), e) for e in entries]
+    records: list[dict] = []
+    errors: list[tuple[str, str]] = []
+    chunksize = max(1, min(200, len(jobs) // (max(1, args.workers) * 4)))
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        for file, page_records, error in pool.map(_reparse, jobs, chunksize=chunksize):
+            if error:
+                errors.append((file, error))
+            records.extend(page_records)
+    parsed_at = time.perf_counter()
+    print(f"🧩 解析完成：{len(records)} 条，{parsed_at - started:.1f}s")
+
+    for file, error in errors[:20]:
+        print(f"❌ 解析失败 {file}: {error}")
+    if len(errors) > 20:
+        print(f"   …… 另有 {len(errors) - 20} 页失败")
+
+    if args.dry_run:
+        return
+
+    # 确保表存在（仅用于 dev，本质上应由 Alembic 管理）
+    Base.metadata.create_all(bind=engine)
+
+    stats = ImportStats(files=len(entries), parsed=len(records))
+    db: Session = SessionLocal()
+    try:
+        import_records(db, records, chunk_size=args.chunk_size, stats=stats)
+    finally:
+        db.close()
+
+    print(f"✅ 写入完成（{time.perf_counter() - parsed_at:.1f}s）")
+    print(f"   重复：{stats.duplicates}")
+    print(f"   写入：{stats.written}")
+    print(f"   价格历史：{stats.history}")
+    print(f"   失败：{len(stats.failed)}")
+
+
+if __name__ == "__main__":
+    main()
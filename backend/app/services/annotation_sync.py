@@ -0,0 +1,146 @@
+# app/services/annotation_sync.py
+"""
+已标注 house_id 的增量同步：
+
+- 版本号直接用 house_changes.seq（单调递增，/houses 与 /annotations 的增删都会写一行）；
+- since=<seq> 时只读取 seq 之后的变更，按 source_house_id 折叠成 added / removed；
+- 版本号取“已稳定”的 seq：遇到很新的 seq 空洞（事务还没提交）就停在空洞前，
+  客户端下次从这里继续，不会漏掉晚提交的变更；重复下发的变更按集合语义幂等；
+- packed 编码：数字 id 排序后做差分 varint，再 base64，比 JSON 数组小得多；
+- crawl_houses.is_annotated 是同一状态的冗余副本，由 mark_annotated 在写 houses 的事务里维护。
+"""
+import base64
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.models import CrawlHouse, House, HouseChange
+from app.services.incremental_training import GAP_SETTLE_SECONDS
+
+# 单次增量最多读取的变更数；超过时让客户端改拉全量
+MAX_DELTA_CHANGES = 50_000
+
+
+@dataclass
+class AnnotationDelta:
+    seq: int
+    # True 表示客户端应丢弃本地状态、以 ids 为准
+    full: bool
+    ids: list[str] = field(default_factory=list)
+    added: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+
+
+def mark_annotated(db: Session, source_house_id: str | None, annotated: bool) -> None:
+    """在当前事务中同步 crawl_houses.is_annotated，调用方负责 commit。"""
+    if source_house_id is None:
+        return
+    db.execute(
+        update(CrawlHouse)
+        .where(CrawlHouse.house_id == source_house_id)
+        .values(is_annotated=1 if annotated else 0)
+    )
+
+
+def current_seq(db: Session) -> int:
+    """已稳定的最大 seq：最近 GAP_SETTLE_SECONDS 内出现空洞时停在空洞前。"""
+    now = db.execute(select(func.now())).scalar()
+    cutoff = now - timedelta(seconds=GAP_SETTLE_SECONDS)
+    settled = db.execute(
+        select(func.max(HouseChange.seq)).where(HouseChange.created_at < cutoff)
+    ).scalar() or 0
+    recent = db.execute(
+        select(HouseChange.seq).where(HouseChange.seq > settled).order_by(HouseChange.seq)
+    ).scalars().all()
+    seq = settled
+    for s in recent:
+        if s != seq + 1:
+            break
+        seq = s
+    return seq
+
+
+def snapshot(db: Session) -> AnnotationDelta:
+    seq = current_seq(db)
+    ids = db.execute(
+        select(House.source_house_id)
+        .where(House.source_house_id.is_not(None))
+        .order_by(House.source_house_id)
+    ).scalars().all()
+    return AnnotationDelta(seq=seq, full=True, ids=list(ids))
+
+
+def delta(db: Session, since: int) -> AnnotationDelta:
+    seq = current_seq(db)
+    if since > seq:
+        # 客户端的版本比服务端新（库被重建过等），只能全量
+        return snapshot(db)
+    if since == seq:
+        return AnnotationDelta(seq=seq, full=False)
+
+    rows = db.execute(
+        select(HouseChange.source_house_id, HouseChange.op)
+        .where(
+            HouseChange.seq > since,
+            HouseChange.seq <= seq,
+            HouseChange.source_house_id.is_not(None),
+        )
+        .order_by(HouseChange.seq)
+        .limit(MAX_DELTA_CHANGES + 1)
+    ).all()
+    if len(rows) > MAX_DELTA_CHANGES:
+        return snapshot(db)
+
+    # 同一个 id 只看最后一次操作；update 不改变标注状态
+    last_op: dict[str, str] = {}
+    for source_house_id, op in rows:
+        if op in {"create", "delete"}:
+            last_op[source_house_id] = op
+    added = sorted(k for k, op in last_op.items() if op == "create")
+    removed = sorted(k for k, op in last_op.items() if op == "delete")
+    return AnnotationDelta(seq=seq, full=False, added=added, removed=removed)
+
+
+# ======================
+# packed 编码
+# ======================
+
+def _varint(n: int, out: bytearray) -> None:
+    while True:
+        byte = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return
+
+
+def pack_ids(ids: list[str]) -> tuple[str, list[str]]:
+    """
+    把纯数字 id 编码成 base64(差分 varint)，返回 (packed, 非数字 id 原样列表)。
+    解码：逐个读 varint 累加即得升序 id。
+    """
+    numeric = sorted({int(i) for i in ids if i.isdigit()})
+    others = sorted(i for i in ids if not i.isdigit())
+    out = bytearray()
+    prev = 0
+    for n in numeric:
+        _varint(n - prev, out)
+        prev = n
+    return base64.b64encode(bytes(out)).decode("ascii"), others
+
+
+def unpack_ids(packed: str) -> list[str]:
+    ids, value, shift, prev = [], 0, 0, 0
+    for byte in base64.b64decode(packed):
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        prev += value
+        ids.append(str(prev))
+        value, shift = 0, 0
+    return ids
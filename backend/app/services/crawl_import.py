@@ -0,0 +1,604 @@
+# app/services/crawl_import.py
+"""
+爬虫 JSON / NDJSON 分段 → crawl_houses 批量导入：
+
+- 多进程并行解析 JSON 文件和分段（分段流式解压、逐行解析），内存中按 house_id 去重（保留 crawl_time 最新的一条）；
+- 按固定大小分块，INSERT ... ON DUPLICATE KEY UPDATE + executemany 写入，每块单独提交；
+- 每块提交后写进度检查点，中断后重跑同一批文件会跳过已完成的块；
+- 某块写入失败时回滚并逐行重试，只丢弃真正有问题的行；
+- 导入清单（manifest）记录每个文件的大小、mtime 和内容哈希，
+  大小和 mtime 都没变的文件直接跳过，不再打开；
+- 可选的已见索引（seen_index.SeenIndex，存在 IMPORT_STATE_DIR 下）按 house_id 跳过已导入过的房源。
+每行按价格 / 关注数 / 标签计算 content_hash，与库里的值不同（或新房源）时追加一行 crawl_price_history。
+同一事务里按新旧值的差异增量更新 crawl_stats_buckets（见 crawl_stats）；旧值用 SELECT ... FOR UPDATE 读取，
+并发导入不会让统计漂移。
+is_annotated 由标注流程维护，导入时只在新插入时置 0，不覆盖已有值。
+"""
+import hashlib
+import json
+import logging
+import os
+import uuid
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import func, insert, or_, select
+from sqlalchemy.orm import Session
+
+from app.models import CrawlHouse, CrawlPriceHistory
+from app.services import crawl_stats
+from app.spider.lianjia.storage import is_segment, iter_segment
+
+CRAWL_IMPORT_CHUNK = int(os.getenv("CRAWL_IMPORT_CHUNK", "1000"))
+CRAWL_IMPORT_WORKERS = int(os.getenv("CRAWL_IMPORT_WORKERS", str(os.cpu_count() or 1)))
+IMPORT_STATE_DIR = Path(os.getenv("IMPORT_STATE_DIR", "data/import_state"))
+
+CHECKPOINT_FILE = "checkpoint.json"
+MANIFEST_FILE = "manifest.json"
+SEEN_INDEX_FILE = "seen_index.npy"
+CRAWL_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+# 文件数较少时不值得启动进程池
+PARALLEL_MIN_FILES = 200
+
+# 这些字段变化时才追加一行价格历史
+TRACKED_COLUMNS = ("total_price_wan", "unit_price", "follow_count", "tags")
+
+# 导入时写入的列：除自增主键外的全部列；is_annotated 只在插入时给默认值
+IMPORT_COLUMNS = tuple(
+    c.name for c in CrawlHouse.__table__.columns if c.name not in {"id", "is_annotated"}
+)
+# crawl_time 放在最后赋值：MySQL 按顺序执行 ON DUPLICATE KEY UPDATE，前面的列要和旧 crawl_time 比较
+UPDATE_COLUMNS = tuple(c for c in IMPORT_COLUMNS if c not in {"house_id", "crawl_time"}) + ("crawl_time",)
+
+_STRING_LIMITS = {
+    c.name: c.type.length
+    for c in CrawlHouse.__table__.columns
+    if getattr(c.type, "length", None)
+}
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlRecordError(ValueError):
+    pass
+
+
+# ======================
+# 解析
+# ======================
+
+def _to_float(value: Any) -> float | None:
+    if value is None or value == "":
+        return None
+    try:
+        return float(str(value).replace(",", "").strip())
+    except ValueError:
+        return None
+
+
+def _to_int(value: Any) -> int | None:
+    number = _to_float(value)
+    return int(number) if number is not None else None
+
+
+def _to_datetime(value: Any) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str) and value.strip():
+        text = value.strip()
+        for parse in (
+            lambda t: datetime.strptime(t, CRAWL_TIME_FORMAT),
+            datetime.fromisoformat,
+        ):
+            try:
+                return parse(text)
+            except ValueError:
+                continue
+    # 缺失或无法解析时按导入时间记录
+    return datetime.now().replace(microsecond=0)
+
+
+def normalize_record(data: dict) -> dict:
+    """把一条爬虫记录转换成 crawl_houses 的列值。"""
+    if not isinstance(data, dict):
+        raise CrawlRecordError("记录必须是 JSON 对象")
+    house_id = str(data.get("house_id") or "").strip()
+    if not house_id:
+        raise CrawlRecordError("缺少 house_id")
+
+    record = {
+        "house_id": house_id,
+        "title": data.get("title"),
+        "detail_url": data.get("detail_url"),
+        "community_name": data.get("community_name"),
+        "community_url": data.get("community_url"),
+        "district": data.get("district"),
+        "layout": data.get("layout"),
+        "orientation": data.get("orientation"),
+        "decoration": data.get("decoration"),
+        "floor": data.get("floor"),
+        "building_type": data.get("building_type"),
+        "area_sqm": _to_float(data.get("area_sqm")),
+        "build_year": _to_int(data.get("build_year")),
+        "total_price_wan": _to_float(data.get("total_price_wan")),
+        "total_price_yuan": _to_int(data.get("total_price_yuan")),
+        "unit_price": _to_int(data.get("unit_price")),
+        "follow_count": _to_int(data.get("follow_count")),
+        "tags": data.get("tags") if isinstance(data.get("tags"), list) else None,
+        "cover_image": data.get("cover_image"),
+        "crawl_time": _to_datetime(data.get("crawl_time")),
+    }
+    if record["total_price_yuan"] is None and record["total_price_wan"] is not None:
+        record["total_price_yuan"] = int(record["total_price_wan"] * 10_000)
+
+    # 超长字符串截断，避免整块写入因为个别字段失败
+    for name, limit in _STRING_LIMITS.items():
+        value = record.get(name)
+        if isinstance(value, str) and len(value) > limit:
+            record[name] = value[:limit]
+    return record
+
+
+def content_hash(raw: bytes) -> str:
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+ParseResult = tuple[str, list[dict], list[str], str | None]
+
+
+def _parse_json_file(path: Path) -> tuple[list[dict], list[str], str | None]:
+    try:
+        raw = path.read_bytes()
+    except OSError as e:
+        return [], [f"{type(e).__name__}: {e}"], None
+    digest = content_hash(raw)
+    try:
+        return [normalize_record(json.loads(raw.decode("utf-8")))], [], digest
+    except ValueError as e:
+        return [], [f"{type(e).__name__}: {e}"], digest
+
+
+def _parse_segment(path: Path) -> tuple[list[dict], list[str], str | None]:
+    # 分段流式解压、逐行解析；坏行只记错误，不影响同一分段的其它行
+    digest = hashlib.blake2b(digest_size=16)
+    records, errors = [], []
+    try:
+        for lineno, line in iter_segment(path, digest):
+            try:
+                records.append(normalize_record(json.loads(line)))
+            except ValueError as e:
+                errors.append(f"第 {lineno} 行 {type(e).__name__}: {e}")
+    except (OSError, EOFError, RuntimeError) as e:
+        errors.append(f"{type(e).__name__}: {e}")
+        return records, errors, None
+    return records, errors, digest.hexdigest()
+
+
+def parse_file(path: str) -> ParseResult:
+    """子进程入口：返回 (path, records, errors, 文件内容哈希)，支持单个 JSON 文件和 NDJSON 分段。"""
+    p = Path(path)
+    if is_segment(p):
+        return (path, *_parse_segment(p))
+    return (path, *_parse_json_file(p))
+
+
+def parse_files(
+    paths: Sequence[Path],
+    workers: int = CRAWL_IMPORT_WORKERS,
+) -> Iterable[ParseResult]:
+    names = [str(p) for p in paths]
+    if workers <= 1 or len(names) < PARALLEL_MIN_FILES:
+        yield from map(parse_file, names)
+        return
+    chunksize = max(1, min(500, len(names) // (workers * 4)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(parse_file, names, chunksize=chunksize)
+
+
+def dedupe(records: Iterable[dict]) -> tuple[list[dict], int]:
+    """按 house_id 去重，保留 crawl_time 最新的一条；返回 (按 house_id 排序的记录, 重复条数)。"""
+    latest: dict[str, dict] = {}
+    duplicates = 0
+    for record in records:
+        prev = latest.get(record["house_id"])
+        if prev is not None:
+            duplicates += 1
+            if prev["crawl_time"] > record["crawl_time"]:
+                continue
+        latest[record["house_id"]] = record
+    return [latest[k] for k in sorted(latest)], duplicates
+
+
+# ======================
+# 写入
+# ======================
+
+def _upsert_statement(db: Session):
+    """
+    已存在的房源只在新记录的 crawl_time 不早于库里的值时才覆盖，
+    重放旧归档（reparse_html_archive）不会把新数据改回旧价格。
+    """
+    table = CrawlHouse.__table__
+    if db.get_bind().dialect.name == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+
+        stmt = insert(table)
+        newer = or_(table.c.crawl_time.is_(None), stmt.inserted.crawl_time >= table.c.crawl_time)
+        return stmt.on_duplicate_key_update(
+            [(name, func.if_(newer, stmt.inserted[name], table.c[name])) for name in UPDATE_COLUMNS]
+        )
+
+    # 本地调试用 SQLite
+    from sqlalchemy.dialects.sqlite import insert
+
+    stmt = insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.house_id],
+        set_={name: stmt.excluded[name] for name in UPDATE_COLUMNS},
+        where=or_(table.c.crawl_time.is_(None), stmt.excluded.crawl_time >= table.c.crawl_time),
+    )
+
+
+def tracked_hash(record: dict) -> str:
+    """价格 / 关注数 / 标签的内容哈希；标题、图片等变化不算价格变动。"""
+    values = [record.get(name) for name in TRACKED_COLUMNS]
+    raw = json.dumps(values, ensure_ascii=False, separators=(",", ":"), default=str)
+    return content_hash(raw.encode("utf-8"))
+
+
+def _previous_rows(db: Session, rows: Sequence[dict]) -> dict[str, dict]:
+    """
+    一次查出这批房源写入前的 crawl_time、content_hash 和统计列：{house_id: 行}，新房源不在其中。
+    SELECT ... FOR UPDATE 锁住这些行（不存在的 house_id 由 InnoDB 加间隙锁）直到本事务提交，
+    并发导入同一房源时后到的一方会等前者提交后再读旧值，统计增量不会重复或遗漏。
+    house_id 排序后再查，多个导入进程按相同顺序加锁，减少死锁。
+    """
+    columns = [
+        getattr(CrawlHouse, name)
+        for name in ("house_id", "crawl_time", "content_hash", *crawl_stats.STATS_COLUMNS)
+    ]
+    house_ids = sorted({row["house_id"] for row in rows})
+    result = db.execute(
+        select(*columns)
+        .where(CrawlHouse.house_id.in_(house_ids))
+        .order_by(CrawlHouse.house_id)
+        .with_for_update()
+    )
+    return {row.house_id: row._asdict() for row in result}
+
+
+def _history_rows(previous: dict[str, dict], rows: Sequence[dict]) -> list[dict]:
+    """与库里当前的 content_hash 比较，返回需要追加到 crawl_price_history 的行（新房源或有变化）。"""
+    return [
+        {
+            "house_id": row["house_id"],
+            "crawl_time": row["crawl_time"],
+            **{name: row.get(name) for name in TRACKED_COLUMNS},
+            "content_hash": row["content_hash"],
+        }
+        for row in rows
+        if previous.get(row["house_id"], {}).get("content_hash") != row["content_hash"]
+    ]
+
+
+def _is_stale(row: dict, previous: dict | None) -> bool:
+    """库里已有更新的抓取结果时，这条记录是旧快照。"""
+    if previous is None or previous["crawl_time"] is None:
+        return False
+    return row["crawl_time"] < previous["crawl_time"]
+
+
+def upsert_rows(db: Session, rows: Sequence[dict]) -> int:
+    """
+    executemany 写入一批记录，调用方负责 commit。
+    价格、关注数或标签有变化的房源同时追加一行价格历史，返回追加的行数；
+    统计表按新旧值的差异同步更新。
+    比库里的 crawl_time 更早的记录是旧快照：不覆盖、不记历史、不动统计。
+    """
+    if not rows:
+        return 0
+    rows = [{**row, "content_hash": tracked_hash(row)} for row in rows]
+    previous = _previous_rows(db, rows)
+    rows = [row for row in rows if not _is_stale(row, previous.get(row["house_id"]))]
+    if not rows:
+        return 0
+    previous = {row["house_id"]: previous[row["house_id"]] for row in rows if row["house_id"] in previous}
+    history = _history_rows(previous, rows)
+    params = [{**{name: row.get(name) for name in IMPORT_COLUMNS}, "is_annotated": 0} for row in rows]
+    db.execute(_upsert_statement(db), params)
+    if history:
+        db.execute(insert(CrawlPriceHistory), history)
+    crawl_stats.apply_changes(db, previous.values(), rows)
+    return len(history)
+
+
+def _write_chunk(db: Session, rows: Sequence[dict]) -> tuple[int, int, list[dict]]:
+    """写入并提交一块；整块失败时逐行重试。返回 (成功行数, 价格历史行数, 失败明细)。"""
+    try:
+        history = upsert_rows(db, rows)
+        db.commit()
+        return len(rows), history, []
+    except Exception:
+        db.rollback()
+        logger.warning("Chunk of %d rows failed, retrying row by row", len(rows), exc_info=True)
+
+    written, history, failures = 0, 0, []
+    for row in rows:
+        try:
+            history += upsert_rows(db, [row])
+            db.commit()
+            written += 1
+        except Exception as e:
+            db.rollback()
+            failures.append({"house_id": row["house_id"], "error": f"{type(e).__name__}: {e}"})
+    return written, history, failures
+
+
+# ======================
+# 检查点
+# ======================
+
+def _file_signature(path: str, content_digest: str | None) -> str:
+    """文件内容的标识：优先用解析时算出的内容哈希，读取不完整时退回到大小 + mtime。"""
+    if content_digest is not None:
+        return content_digest
+    try:
+        st = Path(path).stat()
+    except OSError:
+        return "missing"
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def _batch_fingerprint(files: Sequence[tuple[str, str | None]]) -> str:
+    """
+    按 (路径, 内容标识) 计算批次指纹。文件被原地替换或追加后指纹随之变化，
+    不会按旧的行偏移在新内容上续跑。
+    """
+    digest = hashlib.blake2b(digest_size=12)
+    for path, content_digest in files:
+        digest.update(str(path).encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(_file_signature(path, content_digest).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _load_checkpoint(state_dir: Path, fingerprint: str) -> int:
+    try:
+        data = json.loads((state_dir / CHECKPOINT_FILE).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return 0
+    if data.get("fingerprint") != fingerprint:
+        return 0
+    return int(data.get("rows_done", 0))
+
+
+def _save_checkpoint(state_dir: Path, payload: dict) -> None:
+    state_dir.mkdir(parents=True, exist_ok=True)
+    path = state_dir / CHECKPOINT_FILE
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _clear_checkpoint(state_dir: Path) -> None:
+    (state_dir / CHECKPOINT_FILE).unlink(missing_ok=True)
+
+
+# ======================
+# 导入清单
+# ======================
+
+class ImportManifest:
+    """
+    {路径: {"size", "mtime_ns", "hash", "records"}}。
+    记录完整读完的文件，包括空文件和全是坏行的文件（records 为 0），内容不变就不再重复解析；
+    读取失败（内容哈希未知）或有记录写库失败的文件不记录，下次仍会重试。
+    """
+
+    def __init__(self, path: Path, entries: dict[str, dict] | None = None):
+        self.path = path
+        self.entries = entries or {}
+
+    @classmethod
+    def load(cls, state_dir: Path) -> "ImportManifest":
+        path = state_dir / MANIFEST_FILE
+        try:
+            entries = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            entries = {}
+        except (OSError, ValueError):
+            logger.warning("Broken import manifest %s, starting over", path)
+            entries = {}
+        return cls(path, entries)
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{uuid.uuid4().hex}.tmp")
+        tmp.write_text(json.dumps(self.entries, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def classify(self, paths: Sequence[Path]) -> tuple[list[Path], list[Path], int]:
+        """按 stat 结果分成 (新文件, 可能变化的文件, 未变化文件数)，不读取文件内容。"""
+        new, changed, unchanged = [], [], 0
+        for p in paths:
+            entry = self.entries.get(str(p))
+            if entry is None:
+                new.append(p)
+                continue
+            try:
+                st = p.stat()
+            except OSError:
+                changed.append(p)
+                continue
+            if st.st_size == entry["size"] and st.st_mtime_ns == entry["mtime_ns"]:
+                unchanged += 1
+            else:
+                changed.append(p)
+        return new, changed, unchanged
+
+    def is_same_content(self, path: str, digest: str | None) -> bool:
+        entry = self.entries.get(path)
+        return entry is not None and digest is not None and entry["hash"] == digest
+
+    def record(self, path: str, digest: str, records: int = 0) -> None:
+        try:
+            st = Path(path).stat()
+        except OSError:
+            return
+        self.entries[path] = {
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "hash": digest,
+            "records": records,
+        }
+
+    def prune(self, existing: Iterable[Path]) -> None:
+        keep = {str(p) for p in existing}
+        self.entries = {k: v for k, v in self.entries.items() if k in keep}
+
+
+# ======================
+# 入口
+# ======================
+
+@dataclass
+class ImportStats:
+    files: int = 0
+    # 文件级：新增 / 内容变化 / 未变化
+    new: int = 0
+    changed: int = 0
+    unchanged: int = 0
+    parsed: int = 0
+    duplicates: int = 0
+    written: int = 0
+    resumed: int = 0
+    # 已见索引命中、未写库的记录数
+    skipped_seen: int = 0
+    # 追加到 crawl_price_history 的行数（新房源 + 价格 / 关注数 / 标签变化）
+    history: int = 0
+    failed: list[dict] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        data["failed"] = len(self.failed)
+        return data
+
+
+def import_records(
+    db: Session,
+    records: Sequence[dict],
+    chunk_size: int = CRAWL_IMPORT_CHUNK,
+    fingerprint: str | None = None,
+    state_dir: Path = IMPORT_STATE_DIR,
+    stats: ImportStats | None = None,
+    seen=None,
+) -> ImportStats:
+    """
+    去重后分块 upsert。提供 fingerprint 时启用检查点：
+    同一 fingerprint 的中断任务重跑时，从上次提交的位置继续。
+    提供 seen（SeenIndex）时跳过已导入过的 house_id，写库成功的记录再加入索引（由调用方保存）。
+    """
+    stats = stats or ImportStats()
+    rows, duplicates = dedupe(records)
+    stats.duplicates += duplicates
+    if seen is not None:
+        fresh = set(seen.filter_new((r["house_id"] for r in rows), add=False))
+        stats.skipped_seen += len(rows) - len(fresh)
+        rows = [r for r in rows if r["house_id"] in fresh]
+
+    start = _load_checkpoint(state_dir, fingerprint) if fingerprint else 0
+    start = min(start, len(rows))
+    if start:
+        logger.info("Resuming import at row %d/%d", start, len(rows))
+        stats.resumed += start
+
+    chunk_size = max(1, chunk_size)
+    for offset in range(start, len(rows), chunk_size):
+        chunk = rows[offset : offset + chunk_size]
+        written, history, failures = _write_chunk(db, chunk)
+        stats.written += written
+        stats.history += history
+        stats.failed.extend(failures)
+        if fingerprint:
+            _save_checkpoint(
+                state_dir,
+                {"fingerprint": fingerprint, "rows_done": offset + len(chunk), "rows_total": len(rows)},
+            )
+
+    if fingerprint:
+        _clear_checkpoint(state_dir)
+    if seen is not None:
+        failed_ids = {f["house_id"] for f in stats.failed if "house_id" in f}
+        seen.update(r["house_id"] for r in rows if r["house_id"] not in failed_ids)
+    return stats
+
+
+def import_files(
+    db: Session,
+    paths: Sequence[Path],
+    chunk_size: int = CRAWL_IMPORT_CHUNK,
+    workers: int = CRAWL_IMPORT_WORKERS,
+    state_dir: Path = IMPORT_STATE_DIR,
+    resume: bool = True,
+    use_manifest: bool = True,
+    seen=None,
+) -> ImportStats:
+    """
+    导入一批 JSON 文件 / NDJSON 分段。use_manifest 时先按 stat 过滤，只打开新增或变化的文件；
+    为 False 时忽略已有清单、读取全部文件并重建清单。
+    全部提交成功后再更新清单，中途失败的批次下次会重新处理。
+    """
+    paths = sorted(Path(p).resolve() for p in paths)
+    stats = ImportStats(files=len(paths))
+
+    manifest = ImportManifest.load(state_dir) if use_manifest else ImportManifest(state_dir / MANIFEST_FILE)
+    new, changed, stats.unchanged = manifest.classify(paths)
+    new_set = {str(p) for p in new}
+    candidates = sorted(new + changed)
+
+    records, imported, sources = [], [], []
+    for path, file_records, errors, digest in parse_files(candidates, workers=workers):
+        if manifest.is_same_content(path, digest):
+            # 只是 mtime 变了（touch / 复制），内容没变
+            stats.unchanged += 1
+            manifest.record(path, digest, manifest.entries[path].get("records", 0))
+            continue
+        for error in errors:
+            stats.failed.append({"file": Path(path).name, "error": error})
+        if digest is not None:
+            # 内容已完整读取：空文件 / 全是坏行的文件也记入清单，内容不变时下次不再解析
+            imported.append((path, digest, {r["house_id"] for r in file_records}, len(file_records)))
+        if not file_records:
+            continue
+        if path in new_set:
+            stats.new += 1
+        else:
+            stats.changed += 1
+        records.extend(file_records)
+        sources.append((path, digest))
+    stats.parsed = len(records)
+
+    fingerprint = _batch_fingerprint(sources) if resume else None
+    import_records(
+        db,
+        records,
+        chunk_size=chunk_size,
+        fingerprint=fingerprint,
+        state_dir=state_dir,
+        stats=stats,
+        seen=seen,
+    )
+
+    # 写入失败的行对应的文件不进清单，下次重试
+    failed_ids = {f["house_id"] for f in stats.failed if "house_id" in f}
+    for path, digest, house_ids, count in imported:
+        if failed_ids.isdisjoint(house_ids):
+            manifest.record(path, digest, count)
+    manifest.prune(paths)
+    manifest.save()
+    return stats
@@ -0,0 +1,81 @@
+# app/services/crawl_query.py
+"""
+/crawl-houses 的服务端筛选与排序：
+
+- 筛选条件都是等值 / 范围条件，配合 (district, 排序列, id) 等复合索引，
+  “某区按单价排序”这类查询只扫描命中的索引区间；
+- annotated 按冗余的 is_annotated 列筛选，待标注队列只扫描 is_annotated = 0 的索引区间；
+- 排序键只接受白名单（SORT_KEYS），避免任意列排序带来全表 filesort；
+- 文本匹配在 MySQL 上用 title / community_name 的 FULLTEXT（ngram 分词）索引，
+  其它数据库（本地 SQLite）退化为 LIKE。
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import or_, text
+
+from app.models import CrawlHouse
+
+# 排序键 → 列；分页时再追加 id 作为唯一的次级键
+SORT_KEYS = {
+    "crawl_time": CrawlHouse.crawl_time,
+    "unit_price": CrawlHouse.unit_price,
+    "total_price": CrawlHouse.total_price_wan,
+    "area": CrawlHouse.area_sqm,
+}
+DEFAULT_SORT = "crawl_time"
+
+# ngram 默认最小词长为 2，单字检索命中不了索引
+MIN_TEXT_LENGTH = 2
+
+
+@dataclass
+class CrawlHouseFilters:
+    district: Optional[str] = None
+    min_price: Optional[float] = None  # 总价（万）
+    max_price: Optional[float] = None
+    min_area: Optional[float] = None
+    max_area: Optional[float] = None
+    min_year: Optional[int] = None
+    max_year: Optional[int] = None
+    layout: Optional[str] = None
+    q: Optional[str] = None
+    annotated: Optional[bool] = None
+
+
+def _text_match(dialect: str, keyword: str):
+    if dialect == "mysql":
+        # 短语匹配：ngram 把关键字切成相邻 n 元组，整体出现才命中
+        return text(
+            "MATCH (crawl_houses.title, crawl_houses.community_name) AGAINST (:kw IN BOOLEAN MODE)"
+        ).bindparams(kw=f'"{keyword.replace(chr(34), " ")}"')
+    pattern = f"%{keyword}%"
+    return or_(CrawlHouse.title.like(pattern), CrawlHouse.community_name.like(pattern))
+
+
+def apply_filters(query, filters: CrawlHouseFilters, dialect: str):
+    if filters.district:
+        query = query.filter(CrawlHouse.district == filters.district)
+    if filters.min_price is not None:
+        query = query.filter(CrawlHouse.total_price_wan >= filters.min_price)
+    if filters.max_price is not None:
+        query = query.filter(CrawlHouse.total_price_wan <= filters.max_price)
+    if filters.min_area is not None:
+        query = query.filter(CrawlHouse.area_sqm >= filters.min_area)
+    if filters.max_area is not None:
+        query = query.filter(CrawlHouse.area_sqm <= filters.max_area)
+    if filters.min_year is not None:
+        query = query.filter(CrawlHouse.build_year >= filters.min_year)
+    if filters.max_year is not None:
+        query = query.filter(CrawlHouse.build_year <= filters.max_year)
+    if filters.layout:
+        query = query.filter(CrawlHouse.layout == filters.layout)
+    if filters.annotated is not None:
+        # 走 (is_annotated, crawl_time, id) 索引
+        query = query.filter(CrawlHouse.is_annotated == (1 if filters.annotated else 0))
+    keyword = (filters.q or "").strip()
+    if len(keyword) >= MIN_TEXT_LENGTH:
+        query = query.filter(_text_match(dialect, keyword))
+    elif keyword:
+        raise ValueError(f"搜索关键字至少 {MIN_TEXT_LENGTH} 个字")
+    return query
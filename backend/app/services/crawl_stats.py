@@ -0,0 +1,235 @@
+# app/services/crawl_stats.py
+"""
+crawl_houses 的分桶统计（看板 /stats 接口的数据源）：
+
+- 每套房源对 crawl_stats_buckets 的贡献是若干行 (指标, 区, 户型, 桶) → (+1, 指标值)：
+  listing 计房源数，其余指标按固定桶宽分桶，同时累加指标值用于求均值；
+- 导入时（crawl_import.upsert_rows）在同一事务里减去旧值的贡献、加上新值的贡献，
+  INSERT ... ON DUPLICATE KEY UPDATE count = count + ? 累加，看板读取只扫几百行；
+- 中位数由直方图在桶内线性插值得到，误差不超过一个桶宽；
+- 统计与明细出现偏差（手工改库、并发导入同一批房源）时，用 rebuild 全量重算。
+"""
+import math
+from collections import defaultdict
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.models import CrawlHouse, CrawlStatsBucket
+
+LISTING = "listing"
+
+# 指标 → (crawl_houses 列, 桶宽)
+METRICS = {
+    "unit_price": ("unit_price", 1000),  # 元/㎡
+    "total_price": ("total_price_wan", 50),  # 万
+    "area": ("area_sqm", 10),  # ㎡
+    "build_year": ("build_year", 1),
+}
+
+# 计算贡献需要的 crawl_houses 列
+STATS_COLUMNS = ("district", "layout", *(column for column, _ in METRICS.values()))
+
+GROUP_COLUMNS = {
+    "district": CrawlStatsBucket.district,
+    "layout": CrawlStatsBucket.layout,
+}
+
+REBUILD_BATCH = 5000
+
+BucketKey = tuple[str, str, str, int]
+
+
+def _contributions(row: dict) -> Iterable[tuple[BucketKey, float]]:
+    district = row.get("district") or ""
+    layout = row.get("layout") or ""
+    yield (LISTING, district, layout, 0), 0.0
+    for metric, (column, width) in METRICS.items():
+        value = row.get(column)
+        if value is None:
+            continue
+        yield (metric, district, layout, math.floor(value / width)), float(value)
+
+
+def bucket_deltas(old_rows: Iterable[dict], new_rows: Iterable[dict]) -> dict[BucketKey, list]:
+    """旧值贡献取负、新值贡献取正，合并后去掉抵消为 0 的桶。"""
+    deltas: dict[BucketKey, list] = defaultdict(lambda: [0, 0.0])
+    for rows, sign in ((old_rows, -1), (new_rows, 1)):
+        for row in rows:
+            for key, value in _contributions(row):
+                deltas[key][0] += sign
+                deltas[key][1] += sign * value
+    return {k: v for k, v in deltas.items() if v[0] or v[1]}
+
+
+def _increment_statement(db: Session):
+    table = CrawlStatsBucket.__table__
+    if db.get_bind().dialect.name == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+
+        stmt = insert(table)
+        return stmt.on_duplicate_key_update(
+            count=table.c.count + stmt.inserted.count,
+            total=table.c.total + stmt.inserted.total,
+        )
+
+    # 本地调试用 SQLite
+    from sqlalchemy.dialects.sqlite import insert
+
+    stmt = insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.metric, table.c.district, table.c.layout, table.c.bucket],
+        set_={
+            "count": table.c.count + stmt.excluded.count,
+            "total": table.c.total + stmt.excluded.total,
+        },
+    )
+
+
+def apply_changes(db: Session, old_rows: Iterable[dict], new_rows: Iterable[dict]) -> int:
+    """
+    在当前事务中把一批房源的变化计入统计表，调用方负责 commit。
+    old_rows 是这些房源写入前的 STATS_COLUMNS（新房源没有旧值），返回变化的桶数。
+    """
+    deltas = bucket_deltas(old_rows, new_rows)
+    if not deltas:
+        return 0
+    params = [
+        {"metric": m, "district": d, "layout": l, "bucket": b, "count": c, "total": t}
+        for (m, d, l, b), (c, t) in sorted(deltas.items())
+    ]
+    db.execute(_increment_statement(db), params)
+    return len(params)
+
+
+def rebuild(db: Session, batch_size: int = REBUILD_BATCH) -> int:
+    """清空统计表并按 crawl_houses 全量重算（流式读取），调用方负责 commit。返回桶数。"""
+    columns = [getattr(CrawlHouse, name) for name in STATS_COLUMNS]
+    result = db.execute(
+        select(*columns).execution_options(yield_per=batch_size)
+    )
+    deltas = bucket_deltas((), (row._asdict() for row in result))
+    db.execute(delete(CrawlStatsBucket))
+    params = [
+        {"metric": m, "district": d, "layout": l, "bucket": b, "count": c, "total": t}
+        for (m, d, l, b), (c, t) in sorted(deltas.items())
+    ]
+    for offset in range(0, len(params), batch_size):
+        db.execute(insert(CrawlStatsBucket), params[offset : offset + batch_size])
+    return len(params)
+
+
+# ======================
+# 读取
+# ======================
+
+@dataclass
+class Histogram:
+    width: int
+    buckets: dict[int, tuple[int, float]]
+
+    @property
+    def count(self) -> int:
+        return sum(c for c, _ in self.buckets.values())
+
+    def mean(self) -> Optional[float]:
+        n = self.count
+        return sum(t for _, t in self.buckets.values()) / n if n else None
+
+    def median(self) -> Optional[float]:
+        n = self.count
+        if not n:
+            return None
+        half, seen = n / 2, 0
+        for bucket in sorted(self.buckets):
+            count = self.buckets[bucket][0]
+            if seen + count >= half:
+                return (bucket + (half - seen) / count) * self.width
+            seen += count
+        return None
+
+
+def _filtered(stmt, district: Optional[str], layout: Optional[str]):
+    if district is not None:
+        stmt = stmt.where(CrawlStatsBucket.district == district)
+    if layout is not None:
+        stmt = stmt.where(CrawlStatsBucket.layout == layout)
+    return stmt
+
+
+def histogram(
+    db: Session,
+    metric: str,
+    district: Optional[str] = None,
+    layout: Optional[str] = None,
+) -> Histogram:
+    stmt = _filtered(
+        select(
+            CrawlStatsBucket.bucket,
+            func.sum(CrawlStatsBucket.count),
+            func.sum(CrawlStatsBucket.total),
+        )
+        .where(CrawlStatsBucket.metric == metric)
+        .group_by(CrawlStatsBucket.bucket),
+        district,
+        layout,
+    )
+    buckets = {b: (int(c), float(t)) for b, c, t in db.execute(stmt) if c}
+    return Histogram(width=METRICS[metric][1], buckets=buckets)
+
+
+def summary(
+    db: Session,
+    group_by: Optional[str] = None,
+    district: Optional[str] = None,
+    layout: Optional[str] = None,
+) -> list[dict]:
+    """
+    按区 / 户型（或不分组）汇总：房源数、单价均值与中位数、总价与面积均值。
+    group_by 为 None 时返回一行整体统计。
+    """
+    group_column = GROUP_COLUMNS[group_by] if group_by else None
+    keys = [group_column] if group_column is not None else []
+    stmt = _filtered(
+        select(
+            *keys,
+            CrawlStatsBucket.metric,
+            CrawlStatsBucket.bucket,
+            func.sum(CrawlStatsBucket.count),
+            func.sum(CrawlStatsBucket.total),
+        )
+        .where(CrawlStatsBucket.metric.in_([LISTING, "unit_price", "total_price", "area"]))
+        .group_by(*keys, CrawlStatsBucket.metric, CrawlStatsBucket.bucket),
+        district,
+        layout,
+    )
+
+    groups: dict[str, dict[str, Histogram]] = defaultdict(dict)
+    for row in db.execute(stmt):
+        *group, metric, bucket, count, total = row
+        if not count:
+            continue
+        key = group[0] if group else ""
+        width = METRICS[metric][1] if metric in METRICS else 1
+        groups[key].setdefault(metric, Histogram(width=width, buckets={}))
+        groups[key][metric].buckets[bucket] = (int(count), float(total))
+
+    items = []
+    for key, metrics in groups.items():
+        empty = Histogram(width=1, buckets={})
+        unit_price = metrics.get("unit_price", empty)
+        item = {
+            "count": metrics.get(LISTING, empty).count,
+            "avg_unit_price": unit_price.mean(),
+            "median_unit_price": unit_price.median(),
+            "avg_total_price_wan": metrics.get("total_price", empty).mean(),
+            "avg_area_sqm": metrics.get("area", empty).mean(),
+        }
+        if group_by:
+            item = {group_by: key, **item}
+        items.append(item)
+    items.sort(key=lambda item: item["count"], reverse=True)
+    return items
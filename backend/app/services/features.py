@@ -0,0 +1,109 @@
+# app/services/features.py
+import math
+from array import array
+from collections.abc import Iterable
+from typing import Any
+
+import numpy as np
+
+# 模型输入特征顺序（训练与预测必须一致）
+FEATURE_NAMES = ("area_sqm", "bedrooms", "age_years")
+N_FEATURES = len(FEATURE_NAMES)
+
+# area_sqm 为浮点，bedrooms / age_years 为整数
+_INTEGER_FEATURES = frozenset({"bedrooms", "age_years"})
+
+
+class FeatureRowError(ValueError):
+    pass
+
+
+def _to_number(name: str, value: Any) -> float:
+    if isinstance(value, bool) or value is None:
+        raise FeatureRowError(f"{name} 必须是数字")
+
+    if isinstance(value, str):
+        try:
+            value = float(value.strip())
+        except ValueError:
+            raise FeatureRowError(f"{name} 必须是数字") from None
+
+    if not isinstance(value, (int, float)):
+        raise FeatureRowError(f"{name} 必须是数字")
+
+    try:
+        number = float(value)
+    except OverflowError:
+        # 超大 JSON 整数：只拒绝这一行，不能当作批次超限（413）向上抛
+        raise FeatureRowError(f"{name} 超出数值范围") from None
+    if not math.isfinite(number):
+        raise FeatureRowError(f"{name} 必须是有限数值")
+    if name in _INTEGER_FEATURES and not number.is_integer():
+        raise FeatureRowError(f"{name} 必须是整数")
+    return number
+
+
+def decode_feature_row(row: Any) -> tuple[float, float, float]:
+    """
+    解析单行特征，支持两种格式：
+    - 对象：{"area_sqm": 80, "bedrooms": 3, "age_years": 5}
+    - 数组：[80, 3, 5]（按 FEATURE_NAMES 顺序）
+    """
+    if isinstance(row, dict):
+        missing = [name for name in FEATURE_NAMES if name not in row]
+        if missing:
+            raise FeatureRowError(f"缺少字段：{', '.join(missing)}")
+        values = [row[name] for name in FEATURE_NAMES]
+    elif isinstance(row, (list, tuple)):
+        if len(row) != N_FEATURES:
+            raise FeatureRowError(f"数组行必须包含 {N_FEATURES} 个特征")
+        values = row
+    else:
+        raise FeatureRowError("每一行必须是对象或数组")
+
+    a, b, c = (_to_number(name, v) for name, v in zip(FEATURE_NAMES, values))
+    return a, b, c
+
+
+class FeatureMatrixBuilder:
+    """
+    把逐行特征直接写入一块连续的 float64 缓冲区，最后零拷贝转成 (n, 3) 矩阵。
+    非法行只记录错误，不影响其它行。
+    """
+
+    def __init__(self, max_rows: int | None = None):
+        self.max_rows = max_rows
+        self.total = 0
+        self.errors: list[dict[str, Any]] = []
+        self._buf = array("d")
+        self._indices = array("q")
+
+    def add(self, row: Any) -> None:
+        index = self.total
+        if self.max_rows is not None and index >= self.max_rows:
+            raise OverflowError(f"单次最多 {self.max_rows} 行")
+        self.total += 1
+        try:
+            self._buf.extend(decode_feature_row(row))
+        except FeatureRowError as e:
+            self.errors.append({"index": index, "error": str(e)})
+            return
+        self._indices.append(index)
+
+    def add_error(self, error: str) -> None:
+        index = self.total
+        if self.max_rows is not None and index >= self.max_rows:
+            raise OverflowError(f"单次最多 {self.max_rows} 行")
+        self.total += 1
+        self.errors.append({"index": index, "error": error})
+
+    def extend(self, rows: Iterable[Any]) -> None:
+        for row in rows:
+            self.add(row)
+
+    @property
+    def indices(self) -> np.ndarray:
+        return np.frombuffer(self._indices, dtype=np.int64)
+
+    def matrix(self) -> np.ndarray:
+        return np.frombuffer(self._buf, dtype=np.float64).reshape(-1, N_FEATURES)
@@ -0,0 +1,320 @@
+# app/services/incremental_training.py
+"""
+增量训练：
+
+线性回归只依赖充分统计量 ZᵀZ、Zᵀy（Z = [1, area_sqm, bedrooms, age_years]）。
+/houses 与 /annotations 的每次增删改都会在同一事务里写入 house_changes（带 ±1 权重），
+这里按 seq 消费新增的变更、更新统计量，累计到阈值后解正规方程并发布新模型。
+每次更新是 O(变更数)，不再全表重训。
+
+写接口的后台任务（maybe_retrain）只数一下待处理的变更数，达到阈值（或统计量文件缺失、需要全表初始化）
+时提交一个 incremental 训练任务，读表、求解和发布都在 training_jobs 的子进程里完成，不占用请求进程。
+"""
+import fcntl
+import logging
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.db import SessionLocal
+from app.models import House, HouseChange
+from app.services.features import FEATURE_NAMES, N_FEATURES
+from app.services.linear_model import LinearModel
+from app.services.model_registry import MODEL_REGISTRY_DIR, registry
+from app.services.training_data import load_training_arrays
+
+INCREMENTAL_STATE_PATH = Path(
+    os.getenv("INCREMENTAL_STATE_PATH", str(MODEL_REGISTRY_DIR / "incremental_state.npz"))
+)
+# 累计多少条变更后自动发布新模型；0 表示只在手动触发时发布
+INCREMENTAL_RETRAIN_THRESHOLD = int(os.getenv("INCREMENTAL_RETRAIN_THRESHOLD", "20"))
+CHANGE_FETCH_CHUNK = 5000
+# seq 出现空洞且后面的变更还很新时，可能有事务尚未提交，先停在空洞前
+GAP_SETTLE_SECONDS = 10
+
+HOUSE_FIELDS = (*FEATURE_NAMES, "price")
+
+logger = logging.getLogger(__name__)
+
+
+def house_values(house: House) -> dict:
+    return {field: getattr(house, field) for field in HOUSE_FIELDS}
+
+
+def record_house_change(
+    db: Session,
+    op: str,
+    house: House,
+    previous: dict | None = None,
+) -> None:
+    """
+    在当前事务中记录一次 houses 变更，调用方负责 commit。
+    - create：+1 新值
+    - update：-1 旧值（previous）、+1 新值；值没变则不记录
+    - delete：-1 当前值
+    """
+    if house.id is None:
+        db.flush()
+
+    entries: list[tuple[int, dict]] = []
+    current = house_values(house)
+    if op == "create":
+        entries.append((1, current))
+    elif op == "update":
+        if previous is None:
+            raise ValueError("update 变更需要提供 previous")
+        if previous == current:
+            return
+        entries.extend([(-1, previous), (1, current)])
+    elif op == "delete":
+        entries.append((-1, current))
+    else:
+        raise ValueError(f"未知的变更类型：{op}")
+
+    for weight, values in entries:
+        db.add(
+            HouseChange(
+                house_id=house.id,
+                source_house_id=house.source_house_id,
+                op=op,
+                weight=weight,
+                **values,
+            )
+        )
+
+
+@dataclass
+class IncrementalState:
+    ztz: np.ndarray
+    zty: np.ndarray
+    n: int
+    last_seq: int
+    pending: int = 0
+
+    @classmethod
+    def empty(cls) -> "IncrementalState":
+        k = N_FEATURES + 1
+        return cls(ztz=np.zeros((k, k)), zty=np.zeros(k), n=0, last_seq=0)
+
+    def apply(self, X: np.ndarray, y: np.ndarray, weights: np.ndarray | None = None) -> None:
+        Z = np.empty((X.shape[0], N_FEATURES + 1), dtype=np.float64)
+        Z[:, 0] = 1.0
+        Z[:, 1:] = X
+        if weights is None:
+            self.ztz += Z.T @ Z
+            self.zty += Z.T @ y
+            self.n += X.shape[0]
+        else:
+            Zw = Z * weights[:, None]
+            self.ztz += Zw.T @ Z
+            self.zty += Zw.T @ y
+            self.n += int(weights.sum())
+
+    def solve(self) -> LinearModel:
+        if self.n <= 0:
+            raise ValueError("训练数据为空，无法训练模型")
+        beta, *_ = np.linalg.lstsq(self.ztz, self.zty, rcond=None)
+        return LinearModel(intercept=float(beta[0]), coef=beta[1:].tolist())
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                ztz=self.ztz,
+                zty=self.zty,
+                meta=np.array([self.n, self.last_seq, self.pending], dtype=np.int64),
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "IncrementalState | None":
+        if not path.exists():
+            return None
+        with np.load(path) as data:
+            n, last_seq, pending = (int(v) for v in data["meta"])
+            return cls(
+                ztz=data["ztz"].copy(),
+                zty=data["zty"].copy(),
+                n=n,
+                last_seq=last_seq,
+                pending=pending,
+            )
+
+
+def bootstrap_state(db: Session) -> IncrementalState:
+    # 同一事务内读取 seq 水位和全表快照（InnoDB 可重复读保证二者一致）
+    last_seq = db.execute(select(func.max(HouseChange.seq))).scalar() or 0
+    data = load_training_arrays(db)
+    state = IncrementalState.empty()
+    state.last_seq = int(last_seq)
+    if data.rows:
+        state.apply(np.asarray(data.X), np.asarray(data.y))
+    logger.info("Incremental state bootstrapped: rows=%d seq=%d", state.n, state.last_seq)
+    return state
+
+
+def apply_new_changes(db: Session, state: IncrementalState) -> int:
+    """消费 seq > last_seq 的变更，返回处理条数。"""
+    now = db.execute(select(func.now())).scalar()
+    applied = 0
+
+    while True:
+        rows = db.execute(
+            select(
+                HouseChange.seq,
+                HouseChange.weight,
+                HouseChange.area_sqm,
+                HouseChange.bedrooms,
+                HouseChange.age_years,
+                HouseChange.price,
+                HouseChange.created_at,
+            )
+            .where(HouseChange.seq > state.last_seq)
+            .order_by(HouseChange.seq)
+            .limit(CHANGE_FETCH_CHUNK)
+        ).all()
+        if not rows:
+            break
+
+        # 遇到“新鲜”的 seq 空洞就停下，等对应事务提交后再继续
+        usable = len(rows)
+        expected = state.last_seq + 1
+        for i, row in enumerate(rows):
+            if row.seq != expected and now - row.created_at < timedelta(seconds=GAP_SETTLE_SECONDS):
+                usable = i
+                break
+            expected = row.seq + 1
+        if usable == 0:
+            break
+
+        block = np.asarray([r[1:6] for r in rows[:usable]], dtype=np.float64)
+        state.apply(block[:, 1 : 1 + N_FEATURES], block[:, -1], weights=block[:, 0])
+        state.last_seq = int(rows[usable - 1].seq)
+        state.pending += usable
+        applied += usable
+
+        if usable < len(rows) or len(rows) < CHANGE_FETCH_CHUNK:
+            break
+
+    return applied
+
+
+def publish_state(state: IncrementalState) -> str:
+    model = state.solve()
+    version = registry.publish(
+        model,
+        {
+            "rows": state.n,
+            "features": list(FEATURE_NAMES),
+            "training": "incremental",
+            "change_seq": state.last_seq,
+        },
+    )
+    state.pending = 0
+    return version
+
+
+_local_lock = threading.Lock()
+
+
+@contextmanager
+def _exclusive(path: Path):
+    """进程内 + 跨进程（多个 uvicorn worker）互斥，拿不到锁直接返回 False。"""
+    if not _local_lock.acquire(blocking=False):
+        yield False
+        return
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path.with_name(path.name + ".lock"), "a+") as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+    finally:
+        _local_lock.release()
+
+
+def run_incremental(
+    force_publish: bool = False,
+    rebuild: bool = False,
+    threshold: int = INCREMENTAL_RETRAIN_THRESHOLD,
+    state_path: Path = INCREMENTAL_STATE_PATH,
+) -> str | None:
+    """
+    更新统计量，达到阈值（或 force_publish）时发布新模型，返回新版本号。
+    另一个进程正在更新时直接跳过。
+    """
+    with _exclusive(state_path) as acquired:
+        if not acquired:
+            return None
+
+        db = SessionLocal()
+        try:
+            state = None if rebuild else IncrementalState.load(state_path)
+            if state is None:
+                state = bootstrap_state(db)
+
+            applied = apply_new_changes(db, state)
+            if applied:
+                logger.info("Applied %d house changes (seq=%d)", applied, state.last_seq)
+
+            due = threshold > 0 and state.pending >= threshold
+            version = None
+            if due or (force_publish and state.n > 0):
+                version = publish_state(state)
+
+            state.save(state_path)
+            return version
+        finally:
+            db.close()
+
+
+def pending_changes(db: Session, state_path: Path = INCREMENTAL_STATE_PATH) -> int | None:
+    """尚未发布的变更数（已计入统计量的 + 还没消费的）；统计量文件不存在时返回 None。"""
+    state = IncrementalState.load(state_path)
+    if state is None:
+        return None
+    latest = db.execute(select(func.max(HouseChange.seq))).scalar() or 0
+    return state.pending + max(0, int(latest) - state.last_seq)
+
+
+def maybe_retrain(
+    threshold: int = INCREMENTAL_RETRAIN_THRESHOLD,
+    state_path: Path = INCREMENTAL_STATE_PATH,
+) -> None:
+    """
+    请求结束后的后台任务：只做一次轻量计数，需要训练时提交 incremental 任务（已有排队 / 运行中的同类任务则复用）。
+    失败只记日志，不影响接口。
+    """
+    if threshold <= 0:
+        return
+    from app.services.training_jobs import job_service
+
+    try:
+        db = SessionLocal()
+        try:
+            pending = pending_changes(db, state_path)
+        finally:
+            db.close()
+        if pending is not None and pending < threshold:
+            return
+        job = job_service.submit_once("incremental", {"auto": True})
+    except Exception:
+        logger.exception("Failed to schedule incremental retraining")
+        return
+    logger.info("Incremental retraining scheduled as job %s (pending=%s)", job["id"], pending)
@@ -0,0 +1,138 @@
+# app/services/linear_model.py
+"""
+线性模型的轻量导出格式与求值器。
+
+训练端把 LinearRegression / Ridge 等（可带 StandardScaler）导出成 linear.json：
+
+    {
+      "format": "linear-v1",
+      "feature_names": ["area_sqm", "bedrooms", "age_years"],
+      "intercept": 12345.6,
+      "coef": [...],
+      "feature_mean": [...],     # 可选，标准化参数
+      "feature_scale": [...]
+    }
+
+服务端只需 NumPy 即可求值，不必导入 scikit-learn / joblib。
+"""
+from collections.abc import Sequence
+from typing import Any
+
+import numpy as np
+
+from app.services.features import FEATURE_NAMES
+
+LINEAR_FORMAT = "linear-v1"
+
+
+class LinearModel:
+    def __init__(
+        self,
+        intercept: float,
+        coef: Sequence[float],
+        feature_names: Sequence[str] = FEATURE_NAMES,
+        feature_mean: Sequence[float] | None = None,
+        feature_scale: Sequence[float] | None = None,
+    ):
+        if len(coef) != len(feature_names):
+            raise ValueError("coef 与 feature_names 长度不一致")
+
+        self.intercept = float(intercept)
+        self.coef = [float(c) for c in coef]
+        self.feature_names = tuple(feature_names)
+        self.feature_mean = [float(m) for m in feature_mean] if feature_mean is not None else None
+        self.feature_scale = [float(s) for s in feature_scale] if feature_scale is not None else None
+
+        # 把标准化折叠进系数：(x - m) / s · w + b == x · (w / s) + (b - Σ m·w / s)
+        weights = list(self.coef)
+        bias = self.intercept
+        if self.feature_mean is not None and self.feature_scale is not None:
+            weights = [w / s for w, s in zip(weights, self.feature_scale)]
+            bias -= sum(m * w for m, w in zip(self.feature_mean, weights))
+        self._weights = np.asarray(weights, dtype=np.float64)
+        self._weights_list = weights
+        self._bias = bias
+
+    def predict(self, X: Any) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        return X @ self._weights + self._bias
+
+    def predict_one(self, row: Sequence[float]) -> float:
+        # 单行走纯 Python，省掉一次 ndarray 分配
+        total = self._bias
+        for x, w in zip(row, self._weights_list):
+            total += x * w
+        return total
+
+    def to_dict(self) -> dict:
+        data: dict[str, Any] = {
+            "format": LINEAR_FORMAT,
+            "feature_names": list(self.feature_names),
+            "intercept": self.intercept,
+            "coef": self.coef,
+        }
+        if self.feature_mean is not None and self.feature_scale is not None:
+            data["feature_mean"] = self.feature_mean
+            data["feature_scale"] = self.feature_scale
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LinearModel":
+        if data.get("format") != LINEAR_FORMAT:
+            raise ValueError(f"不支持的线性模型格式：{data.get('format')}")
+        if tuple(data.get("feature_names", ())) != FEATURE_NAMES:
+            raise ValueError(f"特征顺序不匹配：{data.get('feature_names')}")
+        return cls(
+            intercept=data["intercept"],
+            coef=data["coef"],
+            feature_names=data["feature_names"],
+            feature_mean=data.get("feature_mean"),
+            feature_scale=data.get("feature_scale"),
+        )
+
+
+def export_linear(model: Any) -> LinearModel | None:
+    """
+    尝试把 sklearn 估计器转成 LinearModel；非线性模型返回 None。
+    支持：带 coef_ / intercept_ 的单输出线性模型，
+    以及 Pipeline([StandardScaler, 线性模型])。
+    这里只做鸭子类型判断，不导入 sklearn。
+    """
+    mean = scale = None
+    steps = getattr(model, "steps", None)
+    if steps is not None:
+        if len(steps) > 2:
+            return None
+        if len(steps) == 2:
+            scaler = steps[0][1]
+            if type(scaler).__name__ != "StandardScaler":
+                return None
+            n = len(FEATURE_NAMES)
+            # with_mean / with_std 关掉时对应恒等变换
+            mean = (
+                np.ravel(scaler.mean_).tolist()
+                if scaler.with_mean and scaler.mean_ is not None
+                else [0.0] * n
+            )
+            scale = (
+                np.ravel(scaler.scale_).tolist()
+                if scaler.with_std and scaler.scale_ is not None
+                else [1.0] * n
+            )
+        model = steps[-1][1]
+
+    coef = getattr(model, "coef_", None)
+    intercept = getattr(model, "intercept_", None)
+    if coef is None or intercept is None:
+        return None
+
+    coef = np.asarray(coef, dtype=np.float64)
+    if coef.ndim != 1 or coef.shape[0] != len(FEATURE_NAMES):
+        return None
+
+    return LinearModel(
+        intercept=float(np.ravel(intercept)[0]),
+        coef=coef.tolist(),
+        feature_mean=mean,
+        feature_scale=scale,
+    )
@@ -0,0 +1,163 @@
+# app/services/micro_batcher.py
+"""
+/predict 的微批调度器（可选）：
+
+并发到达的单条预测请求先进入队列，调度协程凑满 max_batch_size 条
+或等待 max_wait_ms 后，一次矩阵 predict 打分，再把结果分发回各自的 Future。
+用少量延迟换取单 worker 吞吐量。
+"""
+import asyncio
+import logging
+import os
+from collections.abc import Callable
+
+import numpy as np
+
+from app.services.features import N_FEATURES
+from app.services.model_registry import ServingModel, registry
+
+MICROBATCH_ENABLED = os.getenv("PREDICT_MICROBATCH", "0").lower() in {"1", "true", "yes"}
+MICROBATCH_MAX_SIZE = int(os.getenv("PREDICT_MICROBATCH_MAX_SIZE", "64"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("PREDICT_MICROBATCH_MAX_WAIT_MS", "2"))
+
+logger = logging.getLogger(__name__)
+
+_Item = tuple[tuple[float, float, float], asyncio.Future]
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        get_model: Callable[[], ServingModel | None],
+        max_batch_size: int = MICROBATCH_MAX_SIZE,
+        max_wait_ms: float = MICROBATCH_MAX_WAIT_MS,
+    ):
+        self.get_model = get_model
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue: asyncio.Queue[_Item] | None = None
+        self._task: asyncio.Task | None = None
+
+        # 直方图桶：批大小 <= 1, 2, 4, ..., max_batch_size
+        self._buckets: list[int] = []
+        bound = 1
+        while bound < self.max_batch_size:
+            self._buckets.append(bound)
+            bound *= 2
+        self._buckets.append(self.max_batch_size)
+        self._histogram = [0] * len(self._buckets)
+        self._batches = 0
+        self._items = 0
+        self._max_queue_depth = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run(), name="predict-micro-batcher")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        # 队列里剩下的请求直接失败，避免永远挂起
+        while self._queue is not None and not self._queue.empty():
+            _, fut = self._queue.get_nowait()
+            if not fut.done():
+                fut.set_exception(RuntimeError("预测调度器已停止"))
+
+    async def submit(self, row: tuple[float, float, float]) -> tuple[float, str]:
+        if not self.running or self._queue is None:
+            raise RuntimeError("预测调度器未启动")
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((row, fut))
+        depth = self._queue.qsize()
+        if depth > self._max_queue_depth:
+            self._max_queue_depth = depth
+        return await fut
+
+    async def _collect(self) -> list[_Item]:
+        assert self._queue is not None
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            # 先取走已经排队的，再在剩余时间窗口内等新请求
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            self._record(len(batch))
+            try:
+                self._score(batch)
+            except Exception as e:
+                logger.exception("Micro-batch scoring failed (size=%d)", len(batch))
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+
+    def _score(self, batch: list[_Item]) -> None:
+        current = self.get_model()
+        if current is None:
+            raise RuntimeError("模型不存在")
+
+        X = np.empty((len(batch), N_FEATURES), dtype=np.float64)
+        for i, (row, _) in enumerate(batch):
+            X[i] = row
+        # 线性模型打分是微秒级，直接在事件循环里执行
+        prices = current.predict(X).tolist()
+
+        for (_, fut), price in zip(batch, prices):
+            # 客户端已断开的请求 Future 会被取消，跳过即可
+            if not fut.done():
+                fut.set_result((float(price), current.version))
+
+    def _record(self, size: int) -> None:
+        self._batches += 1
+        self._items += size
+        for i, bound in enumerate(self._buckets):
+            if size <= bound:
+                self._histogram[i] += 1
+                break
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.running,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_depth": self._max_queue_depth,
+            "batches": self._batches,
+            "items": self._items,
+            "avg_batch_size": self._items / self._batches if self._batches else 0.0,
+            "batch_size_histogram": {
+                f"le_{bound}": count for bound, count in zip(self._buckets, self._histogram)
+            },
+        }
+
+
+batcher = MicroBatcher(registry.current)
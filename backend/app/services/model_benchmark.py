@@ -0,0 +1,245 @@
+# app/services/model_benchmark.py
+"""
+候选模型对比：在同一份 houses 特征上做 k 折交叉验证 + 小范围超参搜索。
+
+- (模型, 超参, 折) 组合分发到进程池并行执行；
+- 特征矩阵以 .npy 快照的形式 mmap 共享，子进程只拿到文件路径，不再逐任务 pickle 数组；
+- 除精度（R² / MAE / RMSE）外，同时记录拟合耗时、单行推理延迟和批量推理吞吐，
+  方便把服务成本一起纳入选型；
+- 数据量太小而不可行的组合（如 n_neighbors 大于训练折行数）直接跳过，
+  个别组合运行出错只记入 errors，不影响其它组合的结果。
+"""
+import logging
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 每个候选模型的超参网格
+PARAM_GRIDS: dict[str, dict[str, list]] = {
+    "linear": {},
+    "ridge": {"alpha": [0.1, 1.0, 10.0, 100.0]},
+    "gbr": {"n_estimators": [100, 300], "max_depth": [2, 3], "learning_rate": [0.05, 0.1]},
+    "knn": {"n_neighbors": [5, 10, 20], "weights": ["uniform", "distance"]},
+}
+
+LATENCY_REPEATS = 200
+THROUGHPUT_ROWS = 10_000
+CV_SEED = 42
+
+
+def build_model(name: str, params: dict[str, Any]):
+    from sklearn.ensemble import GradientBoostingRegressor
+    from sklearn.linear_model import LinearRegression, Ridge
+    from sklearn.neighbors import KNeighborsRegressor
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    if name == "linear":
+        return LinearRegression(**params)
+    if name == "ridge":
+        return make_pipeline(StandardScaler(), Ridge(**params))
+    if name == "gbr":
+        return GradientBoostingRegressor(random_state=CV_SEED, **params)
+    if name == "knn":
+        return make_pipeline(StandardScaler(), KNeighborsRegressor(**params))
+    raise ValueError(f"未知的候选模型：{name}")
+
+
+def min_train_size(n: int, folds: int) -> int:
+    # array_split 时最大的测试折有 ceil(n / folds) 行
+    return n - -(-n // folds)
+
+
+def infeasible_reason(name: str, params: dict[str, Any], train_size: int) -> str | None:
+    """该组合在最小训练折上无法拟合时返回原因。"""
+    if name == "knn" and params.get("n_neighbors", 5) > train_size:
+        return f"n_neighbors={params['n_neighbors']} 大于训练折的行数 {train_size}"
+    return None
+
+
+def fold_indices(n: int, folds: int, fold: int, seed: int = CV_SEED) -> tuple[np.ndarray, np.ndarray]:
+    # 各进程按相同种子独立计算切分，不需要传输索引
+    order = np.random.default_rng(seed).permutation(n)
+    test = np.sort(np.array_split(order, folds)[fold])
+    mask = np.ones(n, dtype=bool)
+    mask[test] = False
+    return np.flatnonzero(mask), test
+
+
+# ---------- 子进程 ----------
+
+_shared: dict[str, np.ndarray] = {}
+
+
+def _init_worker(x_path: str, y_path: str) -> None:
+    # 每个工作进程只打开一次快照，所有任务共享同一份只读 mmap
+    _shared["X"] = np.load(x_path, mmap_mode="r")
+    _shared["y"] = np.load(y_path, mmap_mode="r")
+
+
+def _evaluate(name: str, params: dict[str, Any], folds: int, fold: int) -> dict[str, Any]:
+    X, y = _shared["X"], _shared["y"]
+    train_idx, test_idx = fold_indices(X.shape[0], folds, fold)
+    X_train, y_train = X[train_idx], y[train_idx]
+    X_test, y_test = X[test_idx], y[test_idx]
+
+    model = build_model(name, params)
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_s = time.perf_counter() - start
+
+    pred = model.predict(X_test)
+    err = pred - y_test
+    ss_tot = float(((y_test - y_test.mean()) ** 2).sum())
+    r2 = 1 - float((err**2).sum()) / ss_tot if ss_tot > 0 else float("nan")
+
+    # 单行延迟：取中位数，排除偶发抖动
+    row = np.ascontiguousarray(X_test[:1])
+    latencies = []
+    for _ in range(LATENCY_REPEATS):
+        t = time.perf_counter()
+        model.predict(row)
+        latencies.append(time.perf_counter() - t)
+
+    # 批量吞吐：把测试集平铺到固定行数
+    reps = -(-THROUGHPUT_ROWS // len(X_test))
+    batch = np.ascontiguousarray(np.tile(X_test, (reps, 1))[:THROUGHPUT_ROWS])
+    t = time.perf_counter()
+    model.predict(batch)
+    batch_s = time.perf_counter() - t
+
+    return {
+        "model": name,
+        "params": params,
+        "fold": fold,
+        "r2": r2,
+        "mae": float(np.abs(err).mean()),
+        "rmse": float(np.sqrt((err**2).mean())),
+        "fit_ms": fit_s * 1000,
+        "latency_us": statistics.median(latencies) * 1e6,
+        "throughput_rows_s": len(batch) / batch_s if batch_s > 0 else float("inf"),
+    }
+
+
+# ---------- 汇总 ----------
+
+def _param_grid(name: str) -> list[dict[str, Any]]:
+    grid = PARAM_GRIDS[name]
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in product(*(grid[k] for k in keys))]
+
+
+def _aggregate(results: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    groups: dict[tuple, list[dict]] = {}
+    for r in results:
+        groups.setdefault((r["model"], tuple(sorted(r["params"].items()))), []).append(r)
+
+    rows = []
+    for (name, params), items in groups.items():
+        row: dict[str, Any] = {"model": name, "params": dict(params), "folds": len(items)}
+        for key in ("r2", "mae", "rmse", "fit_ms", "latency_us", "throughput_rows_s"):
+            row[key] = float(np.mean([i[key] for i in items]))
+        rows.append(row)
+    return rows
+
+
+def run_benchmark(
+    X: np.ndarray,
+    y: np.ndarray,
+    models: list[str] | None = None,
+    folds: int = 5,
+    jobs: int | None = None,
+    snapshot: tuple[Path, Path] | None = None,
+) -> dict[str, Any]:
+    """
+    返回 {"rows", "folds", "results": 全部超参组合, "best": 每个模型的最优组合, "errors"}，
+    按 RMSE 升序排列；errors 是被跳过或运行出错的组合。
+    """
+    models = models or list(PARAM_GRIDS)
+    unknown = [m for m in models if m not in PARAM_GRIDS]
+    if unknown:
+        raise ValueError(f"未知的候选模型：{', '.join(unknown)}")
+    n = int(X.shape[0])
+    if n < folds:
+        raise ValueError(f"训练数据只有 {n} 行，不足以做 {folds} 折交叉验证")
+
+    train_size = min_train_size(n, folds)
+    errors: list[dict[str, Any]] = []
+    tasks = []
+    for name in models:
+        for params in _param_grid(name):
+            reason = infeasible_reason(name, params, train_size)
+            if reason:
+                errors.append({"model": name, "params": params, "error": reason})
+                continue
+            tasks.extend((name, params, folds, fold) for fold in range(folds))
+    jobs = jobs or os.cpu_count() or 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if snapshot is None:
+            # 没有现成快照时落一份临时 .npy，供子进程 mmap
+            snapshot = (Path(tmp) / "X.npy", Path(tmp) / "y.npy")
+            np.save(snapshot[0], np.ascontiguousarray(X, dtype=np.float64))
+            np.save(snapshot[1], np.ascontiguousarray(y, dtype=np.float64))
+
+        logger.info("Benchmarking %d tasks on %d rows with %d processes", len(tasks), n, jobs)
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_worker,
+            initargs=(str(snapshot[0]), str(snapshot[1])),
+        ) as pool:
+            futures = [(task, pool.submit(_evaluate, *task)) for task in tasks]
+            results, failed = [], set()
+            for (name, params, _, fold), future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    # 只作废这一个组合，其它组合照常汇总
+                    logger.warning("Benchmark %s %s fold %d failed", name, params, fold, exc_info=True)
+                    key = (name, tuple(sorted(params.items())))
+                    if key not in failed:
+                        failed.add(key)
+                        errors.append({"model": name, "params": params, "error": f"{type(e).__name__}: {e}"})
+
+    results = [r for r in results if (r["model"], tuple(sorted(r["params"].items()))) not in failed]
+    rows = sorted(_aggregate(results), key=lambda r: r["rmse"])
+    best: dict[str, dict] = {}
+    for row in rows:
+        best.setdefault(row["model"], row)
+
+    return {
+        "rows": n,
+        "folds": folds,
+        "results": rows,
+        "best": sorted(best.values(), key=lambda r: r["rmse"]),
+        # 跳过或出错的组合：{"model", "params", "error"}
+        "errors": errors,
+    }
+
+
+def format_report(report: dict[str, Any]) -> str:
+    header = (
+        f"{'model':<8} {'params':<48} {'R2':>8} {'MAE':>12} {'RMSE':>12} "
+        f"{'fit ms':>9} {'1-row us':>9} {'rows/s':>12}"
+    )
+    lines = [f"rows={report['rows']} folds={report['folds']}", header, "-" * len(header)]
+    for r in report["best"]:
+        params = ", ".join(f"{k}={v}" for k, v in r["params"].items()) or "-"
+        lines.append(
+            f"{r['model']:<8} {params[:48]:<48} {r['r2']:>8.4f} {r['mae']:>12.1f} "
+            f"{r['rmse']:>12.1f} {r['fit_ms']:>9.1f} {r['latency_us']:>9.1f} "
+            f"{r['throughput_rows_s']:>12.0f}"
+        )
+    for e in report.get("errors", []):
+        params = ", ".join(f"{k}={v}" for k, v in e["params"].items()) or "-"
+        lines.append(f"skipped {e['model']} ({params}): {e['error']}")
+    return "\n".join(lines)
@@ -0,0 +1,323 @@
+# app/services/model_registry.py
+"""
+版本化模型仓库：
+
+    data/models/
+      ACTIVE                    # 当前生效版本号（原子替换）
+      20250101120000-ab12cd/
+        model.pkl
+        linear.json             # 线性模型的轻量导出，存在时服务端优先使用
+        grid.npy                # 稠密预测表（可选），服务端 mmap 只读打开
+        meta.json
+
+训练端 publish() 写入新版本并切换 ACTIVE；
+服务端 watcher 线程轮询 ACTIVE，加载并预热新模型后原子替换引用，
+进行中的请求继续使用它们拿到的旧模型，不会中断。
+切换完成后依次调用 add_swap_listener 注册的回调（如清空预测缓存），每次切换只调用一次。
+"""
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from collections.abc import Callable
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from app.services.features import N_FEATURES
+from app.services.linear_model import LinearModel, export_linear
+from app.services.prediction_grid import (
+    GRID_FILE,
+    PREDICT_GRID_ENABLED,
+    PredictionGrid,
+    build_grid,
+    load_grid,
+)
+
+MODEL_REGISTRY_DIR = Path(os.getenv("MODEL_REGISTRY_DIR", "data/models"))
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "5"))
+# 旧版单文件模型，仓库为空时兜底加载
+LEGACY_MODEL_PATH = Path("model.pkl")
+
+ACTIVE_POINTER = "ACTIVE"
+MODEL_FILE = "model.pkl"
+LINEAR_FILE = "linear.json"
+META_FILE = "meta.json"
+LEGACY_VERSION = "legacy"
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ServingModel:
+    version: str
+    model: Any
+    metadata: dict = field(default_factory=dict)
+    # 可选的稠密预测表，命中时直接按下标取值
+    grid: PredictionGrid | None = None
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        if self.grid is None:
+            return self.model.predict(X)
+        values, hit = self.grid.lookup(X)
+        if not hit.all():
+            miss = ~hit
+            values[miss] = self.model.predict(X[miss])
+        return values
+
+    def predict_one(self, row: tuple[float, float, float]) -> float:
+        if self.grid is not None:
+            value = self.grid.lookup_one(row)
+            if value is not None:
+                return value
+        if isinstance(self.model, LinearModel):
+            return self.model.predict_one(row)
+        return float(self.model.predict(np.array([row], dtype=np.float64))[0])
+
+
+def _joblib_load(path: Path) -> Any:
+    # 仅非线性模型 / 旧版 model.pkl 需要，按需导入
+    import joblib
+
+    return joblib.load(path)
+
+
+def _atomic_write_text(path: Path, text: str) -> None:
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class ModelRegistry:
+    def __init__(
+        self,
+        root: Path,
+        legacy_path: Path | None = None,
+        use_grid: bool = PREDICT_GRID_ENABLED,
+    ):
+        self.root = root
+        self.legacy_path = legacy_path
+        self.use_grid = use_grid
+        self._current: ServingModel | None = None
+        self._swap_lock = threading.Lock()
+        self._failed_version: str | None = None
+        self._stop = threading.Event()
+        self._watcher: threading.Thread | None = None
+        self._swap_listeners: list[Callable[[str], None]] = []
+
+    # ---------- 训练端 ----------
+
+    def publish(self, model: Any, metadata: dict | None = None, activate: bool = True) -> str:
+        self.root.mkdir(parents=True, exist_ok=True)
+        version = (
+            datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+            + "-"
+            + uuid.uuid4().hex[:6]
+        )
+        linear = model if isinstance(model, LinearModel) else export_linear(model)
+        meta = {
+            "version": version,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "model_type": type(model).__name__,
+            "artifact": "linear" if linear is not None else "joblib",
+            **(metadata or {}),
+        }
+
+        # 先写临时目录再整体 rename，读者永远看不到写了一半的版本
+        tmp_dir = self.root / f".tmp-{version}"
+        tmp_dir.mkdir()
+        try:
+            # sklearn 模型同时保留 model.pkl，便于离线分析和非线性模型兜底
+            if not isinstance(model, LinearModel):
+                import joblib
+
+                joblib.dump(model, tmp_dir / MODEL_FILE)
+            if linear is not None:
+                (tmp_dir / LINEAR_FILE).write_text(
+                    json.dumps(linear.to_dict(), indent=2), encoding="utf-8"
+                )
+            # 开启预测表时在训练端建一次并随版本发布，服务端各 worker 直接 mmap
+            grid = build_grid(linear if linear is not None else model) if self.use_grid else None
+            if grid is not None:
+                grid.save(tmp_dir / GRID_FILE)
+                meta["grid"] = grid.spec.to_dict()
+            (tmp_dir / META_FILE).write_text(
+                json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8"
+            )
+            os.replace(tmp_dir, self.root / version)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        logger.info("Published model version %s", version)
+        if activate:
+            self.activate(version)
+        return version
+
+    def activate(self, version: str) -> None:
+        version_dir = self.root / version
+        if not (version_dir / MODEL_FILE).exists() and not (version_dir / LINEAR_FILE).exists():
+            raise FileNotFoundError(f"模型版本不存在：{version}")
+        _atomic_write_text(self.root / ACTIVE_POINTER, version)
+        logger.info("Activated model version %s", version)
+
+    def active_version(self) -> str | None:
+        try:
+            version = (self.root / ACTIVE_POINTER).read_text(encoding="utf-8").strip()
+        except FileNotFoundError:
+            return None
+        return version or None
+
+    def metadata(self, version: str) -> dict:
+        try:
+            return json.loads((self.root / version / META_FILE).read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def list_versions(self) -> list[dict]:
+        if not self.root.exists():
+            return []
+        versions = []
+        for meta_path in sorted(self.root.glob(f"*/{META_FILE}")):
+            if meta_path.parent.name.startswith("."):
+                continue
+            try:
+                versions.append(json.loads(meta_path.read_text(encoding="utf-8")))
+            except (OSError, json.JSONDecodeError):
+                continue
+        return versions
+
+    # ---------- 服务端 ----------
+
+    def load(self, version: str) -> ServingModel:
+        if version == LEGACY_VERSION and self.legacy_path is not None:
+            serving = ServingModel(version=version, model=_joblib_load(self.legacy_path))
+        else:
+            version_dir = self.root / version
+            linear_path = version_dir / LINEAR_FILE
+            if linear_path.exists():
+                # 线性模型直接用系数求值，worker 不需要导入 sklearn / joblib
+                model = LinearModel.from_dict(
+                    json.loads(linear_path.read_text(encoding="utf-8"))
+                )
+            else:
+                model = _joblib_load(version_dir / MODEL_FILE)
+            serving = ServingModel(version=version, model=model, metadata=self.metadata(version))
+
+        # 预热：首个真实请求不承担懒初始化开销
+        serving.predict(np.zeros((1, N_FEATURES)))
+        if self.use_grid:
+            # 优先映射 publish 时写好的预测表；没有（旧版本 / legacy）或范围与本机配置不同时在切换前现建
+            grid = None
+            if version != LEGACY_VERSION:
+                grid = load_grid(self.root / version, serving.metadata.get("grid"))
+            if grid is None:
+                grid = build_grid(serving.model)
+            if grid is not None:
+                serving = replace(serving, grid=grid)
+        return serving
+
+    def _target_version(self) -> str | None:
+        version = self.active_version()
+        if version is None and self.legacy_path is not None and self.legacy_path.exists():
+            return LEGACY_VERSION
+        return version
+
+    def refresh(self) -> bool:
+        """
+        检查 ACTIVE 指针，有变化就加载新版本并原子替换。
+        返回是否发生了切换；加载失败时继续使用旧模型。
+        """
+        version = self._target_version()
+        current = self._current
+        if version is None or (current is not None and current.version == version):
+            return False
+        if version == self._failed_version:
+            return False
+
+        with self._swap_lock:
+            current = self._current
+            if current is not None and current.version == version:
+                return False
+            try:
+                serving = self.load(version)
+            except Exception:
+                logger.exception("Failed to load model version %s", version)
+                self._failed_version = version
+                return False
+            self._current = serving
+            self._failed_version = None
+            for listener in self._swap_listeners:
+                try:
+                    listener(version)
+                except Exception:
+                    logger.exception("Model swap listener failed")
+
+        logger.info("Serving model version %s", version)
+        return True
+
+    def current(self) -> ServingModel | None:
+        return self._current
+
+    def add_swap_listener(self, listener: Callable[[str], None]) -> None:
+        """注册切换回调，参数为新版本号；已有生效模型时立即回调一次。"""
+        self._swap_listeners.append(listener)
+        if self._current is not None:
+            listener(self._current.version)
+
+    def start_watcher(self, interval: float = MODEL_WATCH_INTERVAL) -> None:
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop.clear()
+        self.refresh()
+
+        def run() -> None:
+            while not self._stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception:
+                    logger.exception("Model watcher iteration failed")
+
+        self._watcher = threading.Thread(target=run, name="model-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+
+registry = ModelRegistry(MODEL_REGISTRY_DIR, legacy_path=LEGACY_MODEL_PATH)
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="模型仓库管理")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="列出所有版本")
+    activate_parser = sub.add_parser("activate", help="切换生效版本（可用于回滚）")
+    activate_parser.add_argument("version")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        active = registry.active_version()
+        for meta in registry.list_versions():
+            mark = "*" if meta.get("version") == active else " "
+            print(
+                f"{mark} {meta.get('version')}  {meta.get('model_type')}"
+                f"  artifact={meta.get('artifact', 'joblib')}  rows={meta.get('rows')}"
+            )
+    elif args.command == "activate":
+        registry.activate(args.version)
+        print(f"✅ 已切换到 {args.version}")
+
+
+if __name__ == "__main__":
+    main()
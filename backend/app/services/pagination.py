@@ -0,0 +1,111 @@
+# app/services/pagination.py
+"""
+Keyset（游标）分页：
+
+- 游标是上一页最后一行排序键的 urlsafe base64(JSON)，对客户端不透明；
+- 下一页条件写成 (k1 < v1) OR (k1 = v1 AND k2 < v2)，直接走 (k1, k2) 索引定位，
+  第 N 页和第 1 页一样快，不做 OFFSET 扫描；
+- 多取一行判断是否还有下一页，没有时 next_cursor 为 None。
+
+支持升序 / 降序。可为空的首列（crawl_time、价格等）按 NULL 最小处理，与 MySQL / SQLite 一致：
+降序时 NULL 在最后，升序时 NULL 在最前。
+游标里带上 scope（例如排序方式），换了排序后再用旧游标会被拒绝。
+"""
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(values: Sequence[Any], scope: str | None = None) -> str:
+    payload = [_encode_value(v) for v in values]
+    if scope is not None:
+        payload = [scope, *payload]
+    raw = json.dumps(payload, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int, scope: str | None = None) -> list[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, binascii.Error, UnicodeError) as e:
+        raise InvalidCursor("无效的分页游标") from e
+    if scope is not None:
+        if not isinstance(values, list) or not values or values[0] != scope:
+            raise InvalidCursor("分页游标与当前排序不匹配")
+        values = values[1:]
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor("无效的分页游标")
+    try:
+        return [_decode_value(v) for v in values]
+    except (TypeError, ValueError) as e:
+        raise InvalidCursor("无效的分页游标") from e
+
+
+def _after(columns, values, nullable_first: bool = False, descending: bool = True):
+    """按 columns 排序时“排在 values 之后”的条件。"""
+    first, value = columns[0], values[0]
+    beyond = (lambda c, v: c < v) if descending else (lambda c, v: c > v)
+    if len(columns) == 1:
+        return beyond(first, value)
+    rest = _after(columns[1:], values[1:], descending=descending)
+    if not nullable_first:
+        return or_(beyond(first, value), and_(first == value, rest))
+    if descending:
+        if value is None:
+            # NULL 排在最后：之后只剩同为 NULL、次级键更小的行
+            return and_(first.is_(None), rest)
+        return or_(first < value, first.is_(None), and_(first == value, rest))
+    if value is None:
+        # 升序时 NULL 在最前：之后是全部非 NULL 行，加上同为 NULL、次级键更大的行
+        return or_(first.is_not(None), and_(first.is_(None), rest))
+    return or_(first > value, and_(first == value, rest))
+
+
+def keyset_page(
+    query,
+    columns,
+    cursor: str | None,
+    limit: int,
+    nullable_first: bool = False,
+    descending: bool = True,
+    scope: str | None = None,
+):
+    """
+    对 query 按 columns 做游标分页，返回 (本页行, next_cursor)。
+    最后一列必须唯一（一般是主键）；nullable_first 表示首列可能为 NULL。
+    """
+    if cursor:
+        values = decode_cursor(cursor, len(columns), scope)
+        query = query.filter(_after(columns, values, nullable_first, descending))
+    order = [c.desc() if descending else c.asc() for c in columns]
+    rows = query.order_by(*order).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, c.key) for c in columns], scope)
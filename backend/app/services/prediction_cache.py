@@ -0,0 +1,209 @@
+# app/services/prediction_cache.py
+"""
+/predict 结果缓存（可选）：
+
+- 键为 (模型版本, area_sqm, bedrooms, age_years)，值为预测价格；
+- memory：进程内 LRU + TTL，模型热切换时由 registry 回调 on_model_swap 整体清空一次；
+  切换前后仍在处理的旧版本请求只会未命中、不写入，不会反复清空缓存；
+- redis：所有 uvicorn worker 共享，键里带版本号，旧版本的键靠 TTL 自然过期；
+  用 redis.asyncio 客户端，往返期间不占用事件循环，不会拖住其它请求和微批处理；
+- 命中 / 未命中 / 淘汰次数可在 /predict/stats 查看。
+get / set 都是协程，两种后端接口一致。
+Redis 不可用时按未命中处理，并在 REDIS_RETRY_SECONDS 内不再访问，不影响预测本身。
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+PREDICT_CACHE = os.getenv("PREDICT_CACHE", "off")  # off / memory / redis
+PREDICT_CACHE_SIZE = int(os.getenv("PREDICT_CACHE_SIZE", "10000"))
+PREDICT_CACHE_TTL = float(os.getenv("PREDICT_CACHE_TTL", "300"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# 超时要短：缓存失效只是多算一次，不能拖慢 /predict
+REDIS_CONNECT_TIMEOUT = 0.2
+REDIS_SOCKET_TIMEOUT = 0.05
+REDIS_RETRY_SECONDS = float(os.getenv("PREDICT_CACHE_REDIS_RETRY_SECONDS", "5"))
+
+logger = logging.getLogger(__name__)
+
+FeatureKey = tuple[float, int, int]
+
+
+def normalize_features(area_sqm: float, bedrooms: int, age_years: int) -> FeatureKey:
+    # 80 与 80.0 视为同一键
+    return float(area_sqm), int(bedrooms), int(age_years)
+
+
+class MemoryPredictionCache:
+    backend = "memory"
+
+    def __init__(self, max_size: int = PREDICT_CACHE_SIZE, ttl: float = PREDICT_CACHE_TTL):
+        self.max_size = max(1, max_size)
+        self.ttl = ttl
+        self._data: OrderedDict[FeatureKey, tuple[float, float]] = OrderedDict()
+        self._version: str | None = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.flushes = 0
+
+    def on_model_swap(self, version: str) -> None:
+        """registry 切换模型后调用一次：旧结果全部作废。"""
+        with self._lock:
+            if version == self._version:
+                return
+            if self._data:
+                self.flushes += 1
+            self._data.clear()
+            self._version = version
+
+    def _is_current(self, version: str) -> bool:
+        # 调用方持锁；还没收到过切换通知时以第一次见到的版本为准
+        if self._version is None:
+            self._version = version
+        return version == self._version
+
+    async def get(self, version: str, key: FeatureKey) -> float | None:
+        with self._lock:
+            if not self._is_current(version):
+                self.misses += 1
+                return None
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    async def set(self, version: str, key: FeatureKey, value: float) -> None:
+        with self._lock:
+            if not self._is_current(version):
+                return
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "backend": self.backend,
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "model_version": self._version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "flushes": self.flushes,
+                "hit_ratio": round(self.hits / total, 4) if total else None,
+            }
+
+
+class RedisPredictionCache:
+    backend = "redis"
+    KEY = "predict_cache:{}:{}:{}:{}"
+
+    def __init__(self, client, ttl: float = PREDICT_CACHE_TTL, retry_after: float = REDIS_RETRY_SECONDS):
+        # client 为 redis.asyncio.Redis
+        self.r = client
+        self.ttl = max(1, int(ttl))
+        self.retry_after = retry_after
+        self._down_until = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _available(self) -> bool:
+        return time.monotonic() >= self._down_until
+
+    def _failed(self) -> None:
+        # 出错后一段时间内直接跳过 Redis，避免每个请求都等一次超时
+        self.errors += 1
+        self._down_until = time.monotonic() + self.retry_after
+        logger.warning("Redis prediction cache error, bypassing for %.0fs", self.retry_after, exc_info=True)
+
+    def on_model_swap(self, version: str) -> None:
+        # 版本号在键里，不需要清空
+        pass
+
+    def _key(self, version: str, key: FeatureKey) -> str:
+        area, bedrooms, age = key
+        return self.KEY.format(version, repr(area), bedrooms, age)
+
+    async def get(self, version: str, key: FeatureKey) -> float | None:
+        if not self._available():
+            self.misses += 1
+            return None
+        try:
+            raw = await self.r.get(self._key(version, key))
+        except Exception:
+            self._failed()
+            self.misses += 1
+            return None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return float(raw)
+
+    async def set(self, version: str, key: FeatureKey, value: float) -> None:
+        # 版本号在键里，新模型自然不会读到旧结果；淘汰交给 Redis 的 TTL / maxmemory 策略
+        if not self._available():
+            return
+        try:
+            await self.r.set(self._key(version, key), repr(value), ex=self.ttl)
+        except Exception:
+            self._failed()
+
+    def stats(self) -> dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "bypassed": not self._available(),
+            "hit_ratio": round(self.hits / total, 4) if total else None,
+        }
+
+
+def create_prediction_cache(backend: str = PREDICT_CACHE):
+    if backend == "redis":
+        try:
+            import redis
+            import redis.asyncio
+
+            # 启动时用同步客户端探测一次；运行期间用 asyncio 客户端，不阻塞事件循环
+            options = {
+                "socket_connect_timeout": REDIS_CONNECT_TIMEOUT,
+                "socket_timeout": REDIS_SOCKET_TIMEOUT,
+            }
+            probe = redis.Redis.from_url(REDIS_URL, **options)
+            try:
+                probe.ping()
+            finally:
+                probe.close()
+            return RedisPredictionCache(redis.asyncio.Redis.from_url(REDIS_URL, **options))
+        except Exception:
+            logger.warning("Redis unavailable, prediction cache falls back to memory")
+        return MemoryPredictionCache()
+    if backend == "memory":
+        return MemoryPredictionCache()
+    return None
+
+
+prediction_cache = create_prediction_cache()
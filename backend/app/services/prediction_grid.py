@@ -0,0 +1,220 @@
+# app/services/prediction_grid.py
+"""
+稠密预测表（可选）：
+
+三个特征都落在较小的有界范围内：area_sqm 按步长量化，bedrooms / age_years 取整数。
+PREDICT_GRID=1 时训练端 publish 对整张网格做一次向量化 predict，写成版本目录下的 grid.npy；
+服务端加载时 mmap 只读打开，多个 worker 共享同一份页缓存，热切换不再重复建表。
+没有 grid.npy、或表的范围与服务端的 PREDICT_GRID_* 配置不一致时，加载时按服务端配置现建。之后 /predict 只需按下标取值，耗时与模型复杂度无关。
+网格外（面积不在步长点上、超出范围）的输入回退到模型精确计算。
+
+PREDICT_GRID_SNAP=1 时面积四舍五入到最近的网格点再查表，换取更高的命中率，
+误差上界由 PREDICT_GRID_AREA_STEP 决定。
+"""
+import logging
+import math
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+PREDICT_GRID_ENABLED = os.getenv("PREDICT_GRID", "0") == "1"
+PREDICT_GRID_SNAP = os.getenv("PREDICT_GRID_SNAP", "0") == "1"
+PREDICT_GRID_AREA_MIN = float(os.getenv("PREDICT_GRID_AREA_MIN", "10"))
+PREDICT_GRID_AREA_MAX = float(os.getenv("PREDICT_GRID_AREA_MAX", "300"))
+PREDICT_GRID_AREA_STEP = float(os.getenv("PREDICT_GRID_AREA_STEP", "1"))
+PREDICT_GRID_BEDROOMS_MAX = int(os.getenv("PREDICT_GRID_BEDROOMS_MAX", "10"))
+PREDICT_GRID_AGE_MAX = int(os.getenv("PREDICT_GRID_AGE_MAX", "100"))
+# 整张表的内存上限，超出时不建表，全部走模型
+PREDICT_GRID_MAX_MB = float(os.getenv("PREDICT_GRID_MAX_MB", "64"))
+
+# 建表时每次 predict 的行数，避免一次生成过大的特征矩阵
+BUILD_CHUNK_ROWS = 100_000
+# 判断面积是否落在步长点上的容差（以步长为单位）
+ON_GRID_TOLERANCE = 1e-6
+# 版本目录下的预测表文件
+GRID_FILE = "grid.npy"
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class GridSpec:
+    area_min: float = PREDICT_GRID_AREA_MIN
+    area_max: float = PREDICT_GRID_AREA_MAX
+    area_step: float = PREDICT_GRID_AREA_STEP
+    bedrooms_max: int = PREDICT_GRID_BEDROOMS_MAX
+    age_max: int = PREDICT_GRID_AGE_MAX
+    snap: bool = PREDICT_GRID_SNAP
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        n_area = int(math.floor((self.area_max - self.area_min) / self.area_step + ON_GRID_TOLERANCE)) + 1
+        return n_area, self.bedrooms_max + 1, self.age_max + 1
+
+    @property
+    def size_mb(self) -> float:
+        return math.prod(self.shape) * np.dtype(np.float64).itemsize / (1024 * 1024)
+
+    def to_dict(self) -> dict[str, Any]:
+        # snap 只影响查表方式，不随表持久化，由服务端配置决定
+        data = asdict(self)
+        data.pop("snap")
+        return data
+
+
+class PredictionGrid:
+    def __init__(self, spec: GridSpec, values: np.ndarray):
+        if values.shape != spec.shape:
+            raise ValueError(f"网格形状不匹配：{values.shape} != {spec.shape}")
+        self.spec = spec
+        self.values = values
+        self._inv_step = 1.0 / spec.area_step
+        # 命中统计只用于观测，不加锁（偶尔少计无所谓）
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def build(cls, model: Any, spec: GridSpec) -> "PredictionGrid":
+        n_area, n_bed, n_age = spec.shape
+        areas = spec.area_min + np.arange(n_area, dtype=np.float64) * spec.area_step
+        bedrooms = np.arange(n_bed, dtype=np.float64)
+        ages = np.arange(n_age, dtype=np.float64)
+
+        # 按 C 顺序展开 (area, bedrooms, age)，与 values 的下标一一对应
+        A, B, C = np.meshgrid(areas, bedrooms, ages, indexing="ij")
+        X = np.column_stack((A.ravel(), B.ravel(), C.ravel()))
+        flat = np.empty(X.shape[0], dtype=np.float64)
+        for start in range(0, X.shape[0], BUILD_CHUNK_ROWS):
+            stop = start + BUILD_CHUNK_ROWS
+            flat[start:stop] = model.predict(X[start:stop])
+        return cls(spec, flat.reshape(spec.shape))
+
+    def save(self, path: Path) -> None:
+        np.save(path, np.ascontiguousarray(self.values, dtype=np.float64))
+
+    @classmethod
+    def load(cls, path: Path, spec: GridSpec) -> "PredictionGrid":
+        # 只读 mmap：按需分页，同一台机器上的 worker 共享物理内存
+        return cls(spec, np.load(path, mmap_mode="r"))
+
+    # ---------- 查表 ----------
+
+    def _area_index(self, area: float) -> int | None:
+        pos = (area - self.spec.area_min) * self._inv_step
+        if not math.isfinite(pos):
+            return None
+        idx = round(pos)
+        if not self.spec.snap and abs(pos - idx) > ON_GRID_TOLERANCE:
+            return None
+        if idx < 0 or idx >= self.values.shape[0]:
+            return None
+        return idx
+
+    def lookup_one(self, row: tuple[float, float, float]) -> float | None:
+        area, bedrooms, age = row
+        i = self._area_index(area)
+        j, k = int(bedrooms), int(age)
+        if (
+            i is None
+            or j != bedrooms
+            or k != age
+            or not 0 <= j < self.values.shape[1]
+            or not 0 <= k < self.values.shape[2]
+        ):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return float(self.values[i, j, k])
+
+    def lookup(self, X: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        向量化查表，返回 (values, hit)。
+        未命中的行 values 为 nan，由调用方用模型补齐。
+        """
+        pos = (X[:, 0] - self.spec.area_min) * self._inv_step
+        i = np.rint(pos)
+        j, k = X[:, 1], X[:, 2]
+        n_area, n_bed, n_age = self.values.shape
+
+        hit = (
+            (i >= 0) & (i < n_area)
+            & (j >= 0) & (j < n_bed) & (j == np.floor(j))
+            & (k >= 0) & (k < n_age) & (k == np.floor(k))
+        )
+        if not self.spec.snap:
+            hit &= np.abs(pos - i) <= ON_GRID_TOLERANCE
+
+        out = np.full(X.shape[0], np.nan)
+        if hit.any():
+            out[hit] = self.values[
+                i[hit].astype(np.intp), j[hit].astype(np.intp), k[hit].astype(np.intp)
+            ]
+        n_hit = int(hit.sum())
+        self.hits += n_hit
+        self.misses += X.shape[0] - n_hit
+        return out, hit
+
+    def stats(self) -> dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "shape": list(self.values.shape),
+            "size_mb": round(self.values.nbytes / (1024 * 1024), 2),
+            "area_step": self.spec.area_step,
+            "snap": self.spec.snap,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else None,
+        }
+
+
+def build_grid(model: Any, spec: GridSpec | None = None) -> PredictionGrid | None:
+    """按配置建表；超出内存预算或建表失败时返回 None（全部走模型）。"""
+    spec = spec or GridSpec()
+    if spec.area_step <= 0 or spec.area_max < spec.area_min:
+        logger.warning("Invalid prediction grid range, grid disabled")
+        return None
+    if spec.size_mb > PREDICT_GRID_MAX_MB:
+        logger.warning(
+            "Prediction grid %s needs %.1f MB > PREDICT_GRID_MAX_MB=%.1f, grid disabled",
+            spec.shape,
+            spec.size_mb,
+            PREDICT_GRID_MAX_MB,
+        )
+        return None
+    try:
+        grid = PredictionGrid.build(model, spec)
+    except Exception:
+        logger.exception("Failed to build prediction grid")
+        return None
+    logger.info("Prediction grid %s built (%.1f MB)", spec.shape, spec.size_mb)
+    return grid
+
+
+
+def load_grid(directory: Path, spec_data: dict | None, spec: GridSpec | None = None) -> PredictionGrid | None:
+    """
+    mmap 打开 publish 时写好的预测表。
+    文件缺失、无法读取，或记录的范围与服务端配置 spec 不一致时返回 None，由调用方按服务端配置建表。
+    """
+    path = directory / GRID_FILE
+    if spec_data is None or not path.exists():
+        return None
+    spec = spec or GridSpec()
+    if spec_data != spec.to_dict():
+        logger.warning(
+            "Prediction grid %s was published with %s, server expects %s; rebuilding",
+            path,
+            spec_data,
+            spec.to_dict(),
+        )
+        return None
+    try:
+        grid = PredictionGrid.load(path, spec)
+    except Exception:
+        logger.warning("Failed to load prediction grid %s", path, exc_info=True)
+        return None
+    logger.info("Prediction grid %s mapped from %s", grid.spec.shape, path)
+    return grid
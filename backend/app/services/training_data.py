@@ -0,0 +1,163 @@
+# app/services/training_data.py
+"""
+列式训练数据加载：
+
+- 只查询特征列和标签列，服务端流式游标分块读取，直接填进预分配的 NumPy 数组；
+- 结果缓存为 .npy 快照（可 mmap），以表水位（max id + 行数 + 列和校验）为键，
+  数据没变时重复训练完全不访问数据库。
+"""
+import hashlib
+import logging
+import os
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models import House
+from app.services.features import N_FEATURES
+
+TRAINING_CACHE_DIR = Path(os.getenv("TRAINING_CACHE_DIR", "data/training_cache"))
+TRAINING_FETCH_CHUNK = int(os.getenv("TRAINING_FETCH_CHUNK", "10000"))
+# 保留最近几份快照，旧的自动清理
+TRAINING_CACHE_KEEP = int(os.getenv("TRAINING_CACHE_KEEP", "2"))
+
+SNAPSHOT_PREFIX = "houses-"
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class TableWatermark:
+    max_id: int
+    row_count: int
+    checksum: str
+
+    @property
+    def key(self) -> str:
+        return f"{self.max_id}-{self.row_count}-{self.checksum}"
+
+
+@dataclass
+class TrainingData:
+    X: np.ndarray
+    y: np.ndarray
+    watermark: TableWatermark
+    from_cache: bool
+    # 对应的 .npy 快照（X, y），可供其它进程以 mmap 方式共享
+    snapshot: tuple[Path, Path] | None = None
+
+    @property
+    def rows(self) -> int:
+        return int(self.X.shape[0])
+
+
+def table_watermark(db: Session) -> TableWatermark:
+    # max id + 行数能识别新增 / 删除；列和用来识别原地修改（PUT /houses）
+    row = db.execute(
+        select(
+            func.max(House.id),
+            func.count(House.id),
+            func.sum(House.area_sqm),
+            func.sum(House.bedrooms),
+            func.sum(House.age_years),
+            func.sum(House.price),
+        )
+    ).one()
+    max_id, row_count, *sums = row
+    digest = hashlib.blake2b(repr([float(v or 0) for v in sums]).encode(), digest_size=6)
+    return TableWatermark(
+        max_id=int(max_id or 0),
+        row_count=int(row_count or 0),
+        checksum=digest.hexdigest(),
+    )
+
+
+def _snapshot_paths(cache_dir: Path, watermark: TableWatermark) -> tuple[Path, Path]:
+    stem = f"{SNAPSHOT_PREFIX}{watermark.key}"
+    return cache_dir / f"{stem}.X.npy", cache_dir / f"{stem}.y.npy"
+
+
+def _fetch_arrays(db: Session, expected_rows: int) -> tuple[np.ndarray, np.ndarray]:
+    stmt = (
+        select(House.area_sqm, House.bedrooms, House.age_years, House.price)
+        .order_by(House.id)
+        .execution_options(stream_results=True, yield_per=TRAINING_FETCH_CHUNK)
+    )
+
+    X = np.empty((expected_rows, N_FEATURES), dtype=np.float64)
+    y = np.empty(expected_rows, dtype=np.float64)
+    filled = 0
+
+    for chunk in db.execute(stmt).partitions():
+        block = np.asarray(chunk, dtype=np.float64)
+        n = block.shape[0]
+        if filled + n > X.shape[0]:
+            # 水位查询之后又有新行（非一致性读时），按需扩容
+            capacity = max(filled + n, X.shape[0] * 2)
+            X = np.resize(X, (capacity, N_FEATURES))
+            y = np.resize(y, capacity)
+        X[filled : filled + n] = block[:, :N_FEATURES]
+        y[filled : filled + n] = block[:, N_FEATURES]
+        filled += n
+
+    return X[:filled], y[:filled]
+
+
+def _save_snapshot(cache_dir: Path, watermark: TableWatermark, X: np.ndarray, y: np.ndarray) -> None:
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    x_path, y_path = _snapshot_paths(cache_dir, watermark)
+    tag = uuid.uuid4().hex
+    for path, arr in ((x_path, X), (y_path, y)):
+        tmp = path.with_name(f".{path.name}.{tag}.tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, np.ascontiguousarray(arr))
+        os.replace(tmp, path)
+
+    # 清理旧快照
+    snapshots = sorted(
+        cache_dir.glob(f"{SNAPSHOT_PREFIX}*.X.npy"),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True,
+    )
+    for old in snapshots[TRAINING_CACHE_KEEP:]:
+        old.unlink(missing_ok=True)
+        old.with_name(old.name.replace(".X.npy", ".y.npy")).unlink(missing_ok=True)
+
+
+def load_training_arrays(
+    db: Session,
+    cache_dir: Path = TRAINING_CACHE_DIR,
+    use_cache: bool = True,
+) -> TrainingData:
+    """
+    返回 (X, y)，X 列顺序为 FEATURE_NAMES。
+    命中缓存时数组为只读 mmap。
+    """
+    watermark = table_watermark(db)
+    x_path, y_path = _snapshot_paths(cache_dir, watermark)
+
+    if use_cache and x_path.exists() and y_path.exists():
+        try:
+            X = np.load(x_path, mmap_mode="r")
+            y = np.load(y_path, mmap_mode="r")
+            logger.info("Training data loaded from snapshot %s", watermark.key)
+            return TrainingData(
+                X=X, y=y, watermark=watermark, from_cache=True, snapshot=(x_path, y_path)
+            )
+        except (OSError, ValueError):
+            logger.warning("Broken training snapshot %s, refetching", watermark.key)
+
+    X, y = _fetch_arrays(db, watermark.row_count)
+    snapshot = None
+    if use_cache and len(X):
+        try:
+            _save_snapshot(cache_dir, watermark, X, y)
+            snapshot = (x_path, y_path)
+        except OSError:
+            logger.exception("Failed to write training snapshot")
+
+    return TrainingData(X=X, y=y, watermark=watermark, from_cache=False, snapshot=snapshot)
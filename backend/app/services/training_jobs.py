@@ -0,0 +1,502 @@
+# app/services/training_jobs.py
+"""
+后台训练任务：
+
+- 任务记录与队列：有 Redis 时放 Redis（多个 uvicorn worker 共享），否则用进程内队列；
+  进程内队列只对单个 worker 可见，WEB_CONCURRENCY > 1 时拒绝使用，必须配置 Redis；
+- 调度线程从队列取任务，每个任务在独立子进程里执行，训练不占用请求处理进程的 GIL；
+- 运行中的任务可取消（终止子进程），并记录行数、耗时、峰值内存；
+- 状态流转（queued → running / cancelled，running → 结束状态）都是按预期旧状态的原子更新，
+  取消请求与调度线程并发时不会互相覆盖；历史记录只淘汰已结束的任务；
+- 运行中的任务定期写心跳，服务崩溃后心跳超时的 running 任务由任意存活的调度线程标记为失败。
+"""
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any
+
+TRAIN_JOB_BACKEND = os.getenv("TRAIN_JOB_BACKEND", "auto")  # auto / redis / memory
+TRAIN_WORKERS = int(os.getenv("TRAIN_WORKERS", "1"))
+TRAIN_JOB_HISTORY = int(os.getenv("TRAIN_JOB_HISTORY", "200"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# uvicorn --workers 的默认值同样取自 WEB_CONCURRENCY
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+# 运行中任务的心跳间隔；超过 TRAIN_JOB_STALE_SECONDS 没有心跳视为执行进程已退出
+JOB_HEARTBEAT_SECONDS = 10
+TRAIN_JOB_STALE_SECONDS = float(os.getenv("TRAIN_JOB_STALE_SECONDS", "120"))
+
+JOB_KINDS = ("full", "incremental", "cv", "benchmark")
+FINISHED_STATUSES = frozenset({"succeeded", "failed", "cancelled"})
+
+logger = logging.getLogger(__name__)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# ======================
+# 任务存储
+# ======================
+
+class MemoryJobStore:
+    backend = "memory"
+
+    def __init__(self, history: int = TRAIN_JOB_HISTORY):
+        self.history = history
+        self._jobs: dict[str, dict] = {}
+        self._cancel: set[str] = set()
+        self._queue: queue.Queue[str] = queue.Queue()
+        self._lock = threading.Lock()
+
+    def save(self, job: dict) -> None:
+        with self._lock:
+            self._jobs[job["id"]] = dict(job)
+            if len(self._jobs) > self.history:
+                finished = [j for j in self._jobs.values() if j["status"] in FINISHED_STATUSES]
+                finished.sort(key=lambda j: j["created_at"])
+                for old in finished[: len(self._jobs) - self.history]:
+                    self._jobs.pop(old["id"], None)
+
+    def transition(self, job_id: str, expected: frozenset[str], **changes) -> dict | None:
+        """任务当前状态在 expected 中时原子地更新并返回新记录，否则返回 None。"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] not in expected:
+                return None
+            job.update(changes)
+            if job["status"] in FINISHED_STATUSES:
+                self._cancel.discard(job_id)
+            return dict(job)
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list(self, limit: int) -> list[dict]:
+        with self._lock:
+            jobs = sorted(self._jobs.values(), key=lambda j: j["created_at"], reverse=True)
+            return [dict(j) for j in jobs[:limit]]
+
+    def enqueue(self, job_id: str) -> None:
+        self._queue.put(job_id)
+
+    def dequeue(self, timeout: float) -> str | None:
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def request_cancel(self, job_id: str) -> None:
+        with self._lock:
+            self._cancel.add(job_id)
+
+    def cancel_requested(self, job_id: str) -> bool:
+        with self._lock:
+            return job_id in self._cancel
+
+    def clear_cancel(self, job_id: str) -> None:
+        with self._lock:
+            self._cancel.discard(job_id)
+
+
+class RedisJobStore:
+    backend = "redis"
+    JOB_KEY = "train_job:{}"
+    CANCEL_KEY = "train_job:{}:cancel"
+    QUEUE_KEY = "train_jobs:queue"
+    HISTORY_KEY = "train_jobs:history"
+    # 已结束任务的子集，只从这里淘汰，排队 / 运行中的任务永远不会被删
+    FINISHED_KEY = "train_jobs:finished"
+
+    def __init__(self, client, history: int = TRAIN_JOB_HISTORY):
+        self.r = client
+        self.history = history
+
+    def _write(self, pipe, job: dict) -> None:
+        pipe.set(self.JOB_KEY.format(job["id"]), json.dumps(job, ensure_ascii=False))
+        pipe.zadd(self.HISTORY_KEY, {job["id"]: job["created_ts"]})
+        if job["status"] in FINISHED_STATUSES:
+            pipe.zadd(self.FINISHED_KEY, {job["id"]: job["created_ts"]})
+            pipe.delete(self.CANCEL_KEY.format(job["id"]))
+        else:
+            pipe.zrem(self.FINISHED_KEY, job["id"])
+
+    def save(self, job: dict) -> None:
+        pipe = self.r.pipeline()
+        self._write(pipe, job)
+        pipe.execute()
+        self._prune()
+
+    def _prune(self) -> None:
+        # 超出 history 条时淘汰最早的已结束任务；已结束的记录不会再被修改，删除不需要加锁
+        overflow = self.r.zcard(self.HISTORY_KEY) - self.history
+        if overflow <= 0:
+            return
+        old_ids = [i.decode() for i in self.r.zrange(self.FINISHED_KEY, 0, overflow - 1)]
+        if not old_ids:
+            return
+        pipe = self.r.pipeline()
+        for old_id in old_ids:
+            pipe.delete(self.JOB_KEY.format(old_id), self.CANCEL_KEY.format(old_id))
+        pipe.zrem(self.HISTORY_KEY, *old_ids)
+        pipe.zrem(self.FINISHED_KEY, *old_ids)
+        pipe.execute()
+
+    def transition(self, job_id: str, expected: frozenset[str], **changes) -> dict | None:
+        """WATCH 任务记录后检查状态再 MULTI 写入；期间被其它进程改过就重读重试。"""
+        from redis.exceptions import WatchError
+
+        key = self.JOB_KEY.format(job_id)
+        with self.r.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    raw = pipe.get(key)
+                    job = json.loads(raw) if raw else None
+                    if job is None or job["status"] not in expected:
+                        pipe.unwatch()
+                        return None
+                    job.update(changes)
+                    pipe.multi()
+                    self._write(pipe, job)
+                    pipe.execute()
+                    return job
+                except WatchError:
+                    continue
+
+    def get(self, job_id: str) -> dict | None:
+        raw = self.r.get(self.JOB_KEY.format(job_id))
+        return json.loads(raw) if raw else None
+
+    def list(self, limit: int) -> list[dict]:
+        ids = [i.decode() for i in self.r.zrevrange(self.HISTORY_KEY, 0, limit - 1)]
+        if not ids:
+            return []
+        raws = self.r.mget([self.JOB_KEY.format(i) for i in ids])
+        return [json.loads(raw) for raw in raws if raw]
+
+    def enqueue(self, job_id: str) -> None:
+        self.r.rpush(self.QUEUE_KEY, job_id)
+
+    def dequeue(self, timeout: float) -> str | None:
+        item = self.r.blpop([self.QUEUE_KEY], timeout=max(1, int(timeout)))
+        return item[1].decode() if item else None
+
+    def request_cancel(self, job_id: str) -> None:
+        self.r.set(self.CANCEL_KEY.format(job_id), 1, ex=86400)
+
+    def cancel_requested(self, job_id: str) -> bool:
+        return bool(self.r.exists(self.CANCEL_KEY.format(job_id)))
+
+    def clear_cancel(self, job_id: str) -> None:
+        self.r.delete(self.CANCEL_KEY.format(job_id))
+
+
+def create_job_store(backend: str = TRAIN_JOB_BACKEND, web_workers: int = WEB_CONCURRENCY):
+    if backend in {"auto", "redis"}:
+        try:
+            import redis
+
+            client = redis.Redis.from_url(REDIS_URL, socket_connect_timeout=1)
+            client.ping()
+            return RedisJobStore(client)
+        except Exception:
+            if backend == "redis":
+                raise
+            if web_workers > 1:
+                raise RuntimeError(
+                    f"WEB_CONCURRENCY={web_workers} 个 worker 时训练任务必须存放在 Redis，当前无法连接 {REDIS_URL}"
+                )
+            logger.warning("Redis unavailable, training jobs use the in-process queue")
+    elif web_workers > 1:
+        # 各 worker 各有一份任务表，A 提交的任务在 B 上查询会 404
+        raise RuntimeError(f"WEB_CONCURRENCY={web_workers} 个 worker 时不能使用进程内训练任务队列，请配置 Redis")
+    return MemoryJobStore()
+
+
+# ======================
+# 子进程执行
+# ======================
+
+def _peak_rss_mb() -> dict[str, float]:
+    """
+    在训练子进程内调用：RUSAGE_SELF 是训练进程本身的峰值，
+    RUSAGE_CHILDREN 是它已回收的子进程（如 benchmark 的进程池）中最大的单个峰值。
+    不能在 API 进程里取 RUSAGE_CHILDREN，那是所有历史任务的最大值。
+    """
+    import resource
+
+    # Linux 上 ru_maxrss 单位是 KB
+    return {
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "peak_child_rss_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    }
+
+
+def _run_job(kind: str, params: dict) -> dict:
+    if kind == "full":
+        from app.services.model_registry import registry
+        from app.train import train_and_save
+
+        version = train_and_save()
+        return {"model_version": version, "rows": registry.metadata(version).get("rows")}
+
+    if kind == "incremental":
+        from app.services.incremental_training import run_incremental
+        from app.services.model_registry import registry
+
+        # auto：写接口按阈值自动提交，未达到阈值（或别的进程刚处理完）时不发布也不算失败
+        auto = bool(params.get("auto"))
+        version = run_incremental(force_publish=not auto, rebuild=bool(params.get("rebuild")))
+        if version is None:
+            if auto:
+                return {"model_version": None, "rows": None}
+            raise RuntimeError("增量统计正在被其它进程更新，请稍后重试")
+        return {"model_version": version, "rows": registry.metadata(version).get("rows")}
+
+    if kind == "cv":
+        from app.train import cross_validate_model
+
+        return cross_validate_model(folds=int(params.get("folds", 5)))
+
+    if kind == "benchmark":
+        from app.train import benchmark_models
+
+        report = benchmark_models(models=params.get("models"), folds=int(params.get("folds", 5)))
+        return {"rows": report["rows"], "folds": report["folds"], "best": report["best"]}
+
+    raise ValueError(f"未知的训练任务类型：{kind}")
+
+
+def _job_entry(kind: str, params: dict, conn) -> None:
+    logging.basicConfig(level=logging.INFO)
+    try:
+        result = _run_job(kind, params)
+        conn.send({"ok": True, "result": result, **_peak_rss_mb()})
+    except BaseException as e:
+        conn.send({"ok": False, "error": f"{type(e).__name__}: {e}", **_peak_rss_mb()})
+    finally:
+        conn.close()
+
+
+# ======================
+# 调度
+# ======================
+
+class TrainingJobService:
+    def __init__(self, store=None, workers: int = TRAIN_WORKERS):
+        self._store = store
+        self.workers = max(1, workers)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._ctx = multiprocessing.get_context("spawn")
+        self._store_lock = threading.Lock()
+        self._next_recovery = 0.0
+
+    @property
+    def store(self):
+        if self._store is None:
+            with self._store_lock:
+                if self._store is None:
+                    self._store = create_job_store()
+        return self._store
+
+    # ---------- API ----------
+
+    def submit(self, kind: str, params: dict | None = None) -> dict:
+        if kind not in JOB_KINDS:
+            raise ValueError(f"未知的训练任务类型：{kind}")
+        created = time.time()
+        job = {
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "params": params or {},
+            "status": "queued",
+            "created_at": _now(),
+            "created_ts": created,
+            "started_at": None,
+            "finished_at": None,
+            "owner": None,
+            "result": None,
+            "error": None,
+            "metrics": {},
+        }
+        self.store.save(job)
+        self.store.enqueue(job["id"])
+        return job
+
+    def submit_once(self, kind: str, params: dict | None = None) -> dict:
+        """已有同类型、同参数的排队 / 运行中任务时直接返回它，否则提交新任务。"""
+        params = params or {}
+        for job in self.store.list(self.store.history):
+            if job["kind"] == kind and job["params"] == params and job["status"] in {"queued", "running"}:
+                return job
+        return self.submit(kind, params)
+
+    def get(self, job_id: str) -> dict | None:
+        return self.store.get(job_id)
+
+    def list(self, limit: int = 50) -> list[dict]:
+        return self.store.list(limit)
+
+    def cancel(self, job_id: str) -> dict | None:
+        job = self.store.get(job_id)
+        if job is None or job["status"] in FINISHED_STATUSES:
+            return job
+        # 先置取消标记：运行中的任务由执行线程轮询到后终止子进程并写入 cancelled
+        self.store.request_cancel(job_id)
+        # 排队中的任务直接标记，调度线程的 queued → running 会因此失败而跳过
+        cancelled = self.store.transition(job_id, frozenset({"queued"}), status="cancelled", finished_at=_now())
+        if cancelled is not None:
+            return cancelled
+        current = self.store.get(job_id)
+        if current is None or current["status"] in FINISHED_STATUSES:
+            # 置标记的同时任务刚好结束：标记不会再被消费，直接清掉
+            self.store.clear_cancel(job_id)
+        return current
+
+    def recover_stale(self, stale_after: float = TRAIN_JOB_STALE_SECONDS) -> int:
+        """把心跳超时的 running 任务标记为失败（执行它的服务已崩溃或被强制结束），返回处理数。"""
+        deadline = time.time() - stale_after
+        recovered = 0
+        for job in self.store.list(self.store.history):
+            if job["status"] != "running" or job.get("heartbeat_ts", 0) >= deadline:
+                continue
+            failed = self.store.transition(
+                job["id"],
+                frozenset({"running"}),
+                status="failed",
+                error=f"执行任务的服务已退出（{job.get('owner')} 心跳超时）",
+                finished_at=_now(),
+            )
+            if failed is not None:
+                recovered += 1
+                logger.warning("Training job %s owned by %s lost its heartbeat, marked failed", job["id"], job.get("owner"))
+        return recovered
+
+    def _maybe_recover(self) -> None:
+        now = time.monotonic()
+        with self._store_lock:
+            if now < self._next_recovery:
+                return
+            self._next_recovery = now + JOB_HEARTBEAT_SECONDS
+        self.recover_stale()
+
+    # ---------- 调度线程 ----------
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stop.clear()
+        # 启动时就创建存储（多 worker 却没有 Redis 时直接启动失败，而不是各自维护一份任务表），
+        # 并接管崩溃前遗留的 running 任务
+        self._maybe_recover()
+        for i in range(self.workers):
+            t = threading.Thread(target=self._dispatch_loop, name=f"train-dispatcher-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self) -> None:
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout=5)
+        self._threads = []
+
+    def _dispatch_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._maybe_recover()
+                job_id = self.store.dequeue(timeout=1)
+                if job_id is None:
+                    continue
+                if self.store.cancel_requested(job_id):
+                    continue
+                # 和 cancel 竞争同一个 queued 状态，只有一方能成功
+                job = self.store.transition(
+                    job_id,
+                    frozenset({"queued"}),
+                    status="running",
+                    started_at=_now(),
+                    owner=self.owner,
+                    heartbeat_ts=time.time(),
+                )
+                if job is None:
+                    continue
+                self._execute(job)
+            except Exception:
+                logger.exception("Training dispatcher iteration failed")
+                self._stop.wait(1)
+
+    def _execute(self, job: dict) -> None:
+        # job 已由调度线程置为 running
+        started = time.perf_counter()
+
+        parent_conn, child_conn = self._ctx.Pipe(duplex=False)
+        proc = self._ctx.Process(
+            target=_job_entry,
+            args=(job["kind"], job["params"], child_conn),
+            name=f"train-job-{job['id'][:8]}",
+        )
+        proc.start()
+        child_conn.close()
+
+        outcome: dict[str, Any] | None = None
+        cancelled = False
+        next_heartbeat = time.monotonic() + JOB_HEARTBEAT_SECONDS
+        while True:
+            if parent_conn.poll(0.5):
+                try:
+                    outcome = parent_conn.recv()
+                except EOFError:
+                    outcome = None
+                break
+            if not proc.is_alive():
+                break
+            if self._stop.is_set() or self.store.cancel_requested(job["id"]):
+                cancelled = True
+                proc.terminate()
+                break
+            if time.monotonic() >= next_heartbeat:
+                next_heartbeat = time.monotonic() + JOB_HEARTBEAT_SECONDS
+                self.store.transition(job["id"], frozenset({"running"}), heartbeat_ts=time.time())
+        proc.join(timeout=10)
+        parent_conn.close()
+
+        metrics = {"duration_s": round(time.perf_counter() - started, 3)}
+        if outcome is not None:
+            for key in ("peak_rss_mb", "peak_child_rss_mb"):
+                metrics[key] = round(outcome.get(key, 0.0), 1)
+
+        changes: dict[str, Any]
+        if cancelled:
+            changes = {"status": "cancelled", "error": "任务已取消"}
+        elif outcome is None:
+            changes = {"status": "failed", "error": f"训练进程异常退出（exitcode={proc.exitcode}）"}
+        elif outcome["ok"]:
+            result = outcome["result"]
+            if result.get("rows") is not None:
+                metrics["rows"] = result["rows"]
+            changes = {"status": "succeeded", "result": result}
+        else:
+            changes = {"status": "failed", "error": outcome["error"]}
+
+        self._finish(job, finished_at=_now(), metrics=metrics, **changes)
+        logger.info("Training job %s (%s) %s in %.1fs", job["id"], job["kind"], changes["status"], metrics["duration_s"])
+
+    def _finish(self, job: dict, **changes) -> None:
+        # 只从 running 转入结束状态；记录已被其它进程改为结束状态时不覆盖
+        if self.store.transition(job["id"], frozenset({"running"}), **changes) is None:
+            logger.warning("Training job %s is no longer running, result not recorded", job["id"])
+
+
+job_service = TrainingJobService()
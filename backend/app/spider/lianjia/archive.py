@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+列表页原始 HTML 归档：
+
+- 爬虫 / 调度器加 --archive 后，每个成功取回的列表页整页 HTML 以 gzip 存一份，
+  按抓取日期分目录：<archive_dir>/<YYYY-MM-DD>/<时间>-<pid>-<序号>.html.gz；
+- 同目录下 manifest.ndjson 每行记录一页的元数据（文件名、URL、抓取时间、获取方式、大小），
+  HTML 文件写完之后才追加清单行，清单里出现的页面一定是完整的；
+- 解析逻辑有 bug 或要补新字段时，用 app.scripts.reparse_html_archive 离线重新解析，
+  不需要重新爬取。
+"""
+
+import gzip
+import json
+import os
+import threading
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+
+from app.spider.lianjia.listing_parser import now_str, parse_list_html
+
+BASE_DIR = Path(__file__).resolve().parent
+ARCHIVE_DIR = Path(os.getenv("LIANJIA_ARCHIVE_DIR", str(BASE_DIR / "lianjia_html")))
+ARCHIVE_MANIFEST = "manifest.ndjson"
+ARCHIVE_SUFFIX = ".html.gz"
+
+
+@dataclass
+class ArchiveEntry:
+    file: str  # 相对 archive_dir 的路径
+    url: str
+    crawl_time: str
+    via: str
+    bytes: int
+
+
+class HtmlArchive:
+    def __init__(self, archive_dir: Path = ARCHIVE_DIR, compresslevel: int = 6):
+        self.archive_dir = archive_dir
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        self.compresslevel = compresslevel
+        self.saved = 0
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def save(self, url: str, html: str, crawl_time: str | None = None, via: str = "browser") -> ArchiveEntry:
+        crawl_time = crawl_time or now_str()
+        day = crawl_time[:10]
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+        stamp = datetime.now().strftime("%H%M%S")
+        name = f"{stamp}-{os.getpid()}-{seq:06d}{ARCHIVE_SUFFIX}"
+        day_dir = self.archive_dir / day
+        day_dir.mkdir(parents=True, exist_ok=True)
+
+        raw = html.encode("utf-8")
+        path = day_dir / name
+        tmp = path.with_name(name + ".part")
+        with open(tmp, "wb") as f:
+            f.write(gzip.compress(raw, compresslevel=self.compresslevel))
+        os.replace(tmp, path)
+
+        entry = ArchiveEntry(file=f"{day}/{name}", url=url, crawl_time=crawl_time, via=via, bytes=len(raw))
+        line = json.dumps(asdict(entry), ensure_ascii=False) + "\n"
+        # 多个 worker 进程共用同一份清单：单次 O_APPEND 写一整行
+        with open(day_dir / ARCHIVE_MANIFEST, "a", encoding="utf-8") as f:
+            f.write(line)
+        self.saved += 1
+        return entry
+
+
+def iter_entries(
+    archive_dir: Path = ARCHIVE_DIR,
+    since: str | None = None,
+    until: str | None = None,
+) -> Iterator[ArchiveEntry]:
+    """按日期目录顺序读取清单；since / until 为 YYYY-MM-DD，闭区间。"""
+    if not archive_dir.exists():
+        return
+    for day_dir in sorted(p for p in archive_dir.iterdir() if p.is_dir()):
+        day = day_dir.name
+        if (since and day < since) or (until and day > until):
+            continue
+        manifest = day_dir / ARCHIVE_MANIFEST
+        if not manifest.exists():
+            continue
+        with open(manifest, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield ArchiveEntry(**json.loads(line))
+                except (ValueError, TypeError):
+                    # 进程被杀时可能留下半行
+                    continue
+
+
+def read_html(archive_dir: Path, entry: ArchiveEntry) -> str:
+    with gzip.open(archive_dir / entry.file, "rb") as f:
+        return f.read().decode("utf-8")
+
+
+def reparse_entry(archive_dir: Path, entry: ArchiveEntry) -> list[dict]:
+    """用当前的解析器重新解析一页，crawl_time 沿用原始抓取时间。"""
+    html = read_html(archive_dir, entry)
+    return [r for r in parse_list_html(html, crawl_time=entry.crawl_time) if r["house_id"]]
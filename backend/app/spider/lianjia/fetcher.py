@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+列表页获取方式：
+
+- HttpFetcher：标准库 http.client 长连接池 + login_save_state.py 保存的登录态 cookie，
+  列表页是服务端渲染的，不需要浏览器渲染；
+- HttpPageSource：先走 HTTP，只有遇到人机验证 / 非 200 / 不是列表页（软封禁、模板改版）/
+  响应体损坏时才升级到 Playwright 页面，浏览器里拿到的新 cookie 会同步回 HTTP 客户端；
+- BrowserPageSource：原来的 CDP + 真 Chrome 方式。
+
+两种 PageSource 都返回解析好的 PageResult，调度器不关心页面是怎么拿到的。
+可以对着本地 http.server 提供的录制页面测试：
+
+    python -m app.spider.lianjia.fetcher http://127.0.0.1:8000/pg1/
+"""
+
+import gzip
+import http.client
+import json
+import sys
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from http.cookies import SimpleCookie
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+from app.spider.lianjia.listing_parser import (
+    is_listing_page,
+    is_verification_html,
+    now_str,
+    parse_list_html,
+    parse_total_pages,
+)
+
+BASE_DIR = Path(__file__).resolve().parent
+STATE_PATH = BASE_DIR / "lianjia_state.json"
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "zh-CN,zh;q=0.9",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+}
+MAX_REDIRECTS = 5
+# 每个 host 最多保留的空闲连接数
+MAX_IDLE_PER_HOST = 4
+
+
+@dataclass
+class FetchResponse:
+    url: str
+    status: int
+    text: str
+
+
+@dataclass
+class PageResult:
+    url: str
+    blocked: bool
+    listings: list[dict] = field(default_factory=list)
+    total_pages: int | None = None
+    via: str = "http"
+    # 原始 HTML，供 --archive 归档；handles 模式下也会取一次整页
+    html: str | None = field(default=None, repr=False)
+
+
+# ======================
+# cookie
+# ======================
+
+class CookieJar:
+    """够用就好的 cookie 管理：按 domain 后缀 + path 前缀匹配。"""
+
+    def __init__(self):
+        self._cookies: dict[tuple[str, str, str], dict] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_storage_state(cls, path: Path = STATE_PATH) -> "CookieJar":
+        jar = cls()
+        if path.exists():
+            state = json.loads(path.read_text(encoding="utf-8"))
+            jar.update(state.get("cookies", []))
+        return jar
+
+    def update(self, cookies) -> None:
+        # Playwright storage_state / context.cookies() 格式
+        with self._lock:
+            for c in cookies:
+                key = (c["domain"].lstrip("."), c.get("path") or "/", c["name"])
+                self._cookies[key] = {
+                    "value": c["value"],
+                    "expires": c.get("expires", -1),
+                    "secure": c.get("secure", False),
+                }
+
+    def set_from_response(self, host: str, headers) -> None:
+        for header in headers.get_all("Set-Cookie") or []:
+            parsed = SimpleCookie()
+            try:
+                parsed.load(header)
+            except Exception:
+                continue
+            for name, morsel in parsed.items():
+                self.update([{
+                    "name": name,
+                    "value": morsel.value,
+                    "domain": morsel["domain"] or host,
+                    "path": morsel["path"] or "/",
+                    "secure": bool(morsel["secure"]),
+                }])
+
+    def header_for(self, scheme: str, host: str, path: str) -> str | None:
+        now = time.time()
+        pairs = []
+        with self._lock:
+            for (domain, cookie_path, name), c in self._cookies.items():
+                if not (host == domain or host.endswith("." + domain)):
+                    continue
+                if not path.startswith(cookie_path):
+                    continue
+                if c["secure"] and scheme != "https":
+                    continue
+                if 0 < c["expires"] < now:
+                    continue
+                pairs.append(f"{name}={c['value']}")
+        return "; ".join(pairs) or None
+
+
+# ======================
+# HTTP 长连接池
+# ======================
+
+class HttpFetcher:
+    def __init__(self, jar: CookieJar | None = None, timeout: float = 20, headers: dict | None = None):
+        self.jar = jar or CookieJar.from_storage_state()
+        self.timeout = timeout
+        self.headers = {**DEFAULT_HEADERS, **(headers or {})}
+        self._idle: dict[tuple[str, str, int], list[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.reused = 0
+
+    def _acquire(self, scheme: str, host: str, port: int) -> tuple[http.client.HTTPConnection, bool]:
+        key = (scheme, host, port)
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(host, port, timeout=self.timeout), False
+
+    def _release(self, scheme: str, host: str, port: int, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault((scheme, host, port), [])
+            if len(idle) < MAX_IDLE_PER_HOST:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def _request_once(self, url: str) -> tuple[int, http.client.HTTPMessage, bytes]:
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        host = parts.hostname or ""
+        port = parts.port or (443 if scheme == "https" else 80)
+        path = parts.path or "/"
+        target = path + (f"?{parts.query}" if parts.query else "")
+
+        headers = dict(self.headers)
+        cookie = self.jar.header_for(scheme, host, path)
+        if cookie:
+            headers["Cookie"] = cookie
+
+        # 复用的连接可能已被服务端关闭，失败时换新连接重试一次
+        for attempt in range(2):
+            conn, reused = self._acquire(scheme, host, port)
+            try:
+                conn.request("GET", target, headers=headers)
+                resp = conn.getresponse()
+                body = resp.read()
+            except (http.client.HTTPException, ConnectionError, OSError):
+                conn.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            self.requests += 1
+            self.reused += int(reused)
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(scheme, host, port, conn)
+            self.jar.set_from_response(host, resp.headers)
+            return resp.status, resp.headers, body
+        raise ConnectionError(f"请求失败：{url}")
+
+    @staticmethod
+    def _decode(headers, body: bytes) -> str:
+        encoding = (headers.get("Content-Encoding") or "").lower()
+        if encoding == "gzip":
+            body = gzip.decompress(body)
+        elif encoding == "deflate":
+            body = zlib.decompress(body)
+        charset = headers.get_content_charset() or "utf-8"
+        return body.decode(charset, errors="replace")
+
+    def get(self, url: str) -> FetchResponse:
+        for _ in range(MAX_REDIRECTS + 1):
+            status, headers, body = self._request_once(url)
+            if status in (301, 302, 303, 307, 308) and headers.get("Location"):
+                url = urljoin(url, headers["Location"])
+                continue
+            return FetchResponse(url=url, status=status, text=self._decode(headers, body))
+        raise ConnectionError(f"重定向次数过多：{url}")
+
+    def close(self) -> None:
+        with self._lock:
+            for conns in self._idle.values():
+                for conn in conns:
+                    conn.close()
+            self._idle.clear()
+
+
+# ======================
+# PageSource
+# ======================
+
+def _page_from_html(url: str, html: str, via: str) -> PageResult:
+    return PageResult(
+        url=url,
+        blocked=False,
+        listings=parse_list_html(html, crawl_time=now_str()),
+        total_pages=parse_total_pages(html),
+        via=via,
+        html=html,
+    )
+
+
+class BrowserPageSource:
+    def __init__(self, page, extract: str = "fast"):
+        self.page = page
+        self.extract = extract
+
+    def load(self, url: str) -> PageResult:
+        from app.spider.lianjia.lianjia_spider import detect_human_verify, extract_listings
+
+        page = self.page
+        page.goto(url, wait_until="domcontentloaded", timeout=60000)
+        if detect_human_verify(page):
+            return PageResult(url=url, blocked=True, via="browser")
+        try:
+            page.wait_for_selector("li.clear.LOGCLICKDATA", timeout=15000)
+        except Exception:
+            # 没有房源：分片为空或已翻过最后一页；连列表页结构都没有时按封禁处理，不把分片标记为完成
+            html = page.content()
+            return PageResult(url=url, blocked=not is_listing_page(html), via="browser", html=html)
+
+        html = page.content()
+        if self.extract == "fast":
+            return _page_from_html(url, html, "browser")
+        return PageResult(
+            url=url,
+            blocked=False,
+            listings=extract_listings(page, self.extract),
+            total_pages=parse_total_pages(html),
+            via="browser",
+            html=html,
+        )
+
+    def cookies(self) -> list[dict]:
+        return self.page.context.cookies()
+
+
+class HttpPageSource:
+    """
+    HTTP 优先；遇到人机验证或异常状态码时用浏览器重新加载这一页。
+    browser_factory 在第一次需要时才调用（连接 CDP），纯 HTTP 顺利时完全不启动浏览器。
+    """
+
+    def __init__(self, fetcher: HttpFetcher, browser_factory=None):
+        self.fetcher = fetcher
+        self.browser_factory = browser_factory
+        self._browser: BrowserPageSource | None = None
+        self.escalations = 0
+
+    def load(self, url: str) -> PageResult:
+        try:
+            resp = self.fetcher.get(url)
+            if resp.status == 200 and not is_verification_html(resp.text) and is_listing_page(resp.text):
+                return _page_from_html(resp.url, resp.text, "http")
+            if resp.status == 404:
+                return PageResult(url=url, blocked=False, via="http")
+        except (OSError, EOFError, zlib.error, http.client.HTTPException):
+            # 连接错误、gzip / deflate 响应体损坏
+            pass
+
+        if self.browser_factory is None:
+            return PageResult(url=url, blocked=True, via="http")
+
+        self.escalations += 1
+        if self._browser is None:
+            self._browser = self.browser_factory()
+        result = self._browser.load(url)
+        if not result.blocked:
+            # 浏览器里刷新过的 cookie（包括验证通过后下发的）同步给 HTTP 客户端
+            self.fetcher.jar.update(self._browser.cookies())
+        return result
+
+
+def main(argv=None):
+    urls = argv if argv is not None else sys.argv[1:]
+    if not urls:
+        print("用法：python -m app.spider.lianjia.fetcher URL [...]")
+        return
+    source = HttpPageSource(HttpFetcher())
+    for url in urls:
+        started = time.perf_counter()
+        result = source.load(url)
+        elapsed = (time.perf_counter() - started) * 1000
+        state = "blocked" if result.blocked else f"{len(result.listings)} 条，共 {result.total_pages or '?'} 页"
+        print(f"{url}: {state}，{elapsed:.0f} ms")
+    print(f"请求 {source.fetcher.requests} 次，复用连接 {source.fetcher.reused} 次")
+
+
+if __name__ == "__main__":
+    main()
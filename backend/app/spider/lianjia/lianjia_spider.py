@@ -5,12 +5,17 @@
 链家二手房爬虫（CDP + 真 Chrome + 人工验证兜底）
 """
 
-import json
+import argparse
 import random
+import time
 from pathlib import Path
-from datetime import datetime
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
 
+from app.spider.lianjia.archive import ARCHIVE_DIR, HtmlArchive
+from app.spider.lianjia.listing_parser import VERIFY_KEYWORDS, listing_record, now_str, parse_list_html
+from app.spider.lianjia.sinks import OUTPUT_CHOICES, open_sink
+from app.spider.lianjia.storage import COMPRESSION_SUFFIXES
+
 # ======================
 # 配置
 # ======================
@@ -18,8 +23,6 @@ from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeo
 START_URL = "https://sh.lianjia.com/ershoufang/pudong/"
 
 BASE_DIR = Path(__file__).resolve().parent
-OUT_DIR = BASE_DIR / "lianjia_json"
-OUT_DIR.mkdir(exist_ok=True)
 
 CDP_ENDPOINT = "http://localhost:9222"
 
@@ -27,14 +30,6 @@ CDP_ENDPOINT = "http://localhost:9222"
 # 工具函数
 # ======================
 
-def now_str():
-    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-def safe_filename(text: str, max_len=80):
-    if not text:
-        return "unknown"
-    return "".join(c for c in text if c.isalnum() or c in " _-").strip()[:max_len]
-
 def human_scroll_to_bottom(page, step=300, delay=0.15):
     last_height = page.evaluate("document.body.scrollHeight")
     while True:
@@ -50,113 +45,97 @@ def detect_human_verify(page) -> bool:
     """
     检测是否出现人机验证相关内容
     """
-    keywords = ["人机验证", "安全验证", "请完成验证", "verify"]
     try:
         body_text = page.inner_text("body")
     except Exception:
         return False
 
-    return any(k in body_text for k in keywords)
+    return any(k in body_text for k in VERIFY_KEYWORDS)
 
 # ======================
 # 解析函数
 # ======================
 
 def parse_house(li):
+    """逐字段通过元素句柄取值（每个字段一次 CDP 往返），作为 fast 模式的对照。"""
     def text(selector):
         el = li.query_selector(selector)
         return el.inner_text().strip() if el else None
 
-    house_id = li.get_attribute("data-lj_action_housedel_id")
-
     title_el = li.query_selector(".title a")
-    title = title_el.inner_text().strip() if title_el else None
-    detail_url = title_el.get_attribute("href") if title_el else None
-
     community_el = li.query_selector(".positionInfo a")
-    community_name = community_el.inner_text().strip() if community_el else None
-    community_url = community_el.get_attribute("href") if community_el else None
-
     district_els = li.query_selector_all(".positionInfo a")
-    district = district_els[1].inner_text().strip() if len(district_els) > 1 else None
-
-    house_info = text(".houseInfo") or ""
-    parts = [p.strip() for p in house_info.split("|")]
-
-    layout = parts[0] if len(parts) > 0 else None
-
-    area_sqm = None
-    if len(parts) > 1 and "平米" in parts[1]:
-        try:
-            area_sqm = float(parts[1].replace("平米", ""))
-        except ValueError:
-            pass
-
-    orientation = parts[2] if len(parts) > 2 else None
-    decoration = parts[3] if len(parts) > 3 else None
-    floor = parts[4] if len(parts) > 4 else None
-
-    build_year = None
-    if len(parts) > 5 and "年" in parts[5]:
-        try:
-            build_year = int(parts[5].replace("年", ""))
-        except ValueError:
-            pass
-
-    building_type = parts[6] if len(parts) > 6 else None
-
-    total_price_text = text(".totalPrice span")
-    total_price_wan = float(total_price_text) if total_price_text else None
-    total_price_yuan = int(total_price_wan * 10_000) if total_price_wan else None
+    img = li.query_selector("img.lj-lazy")
 
-    unit_price_text = text(".unitPrice span")
-    unit_price = (
-        int(unit_price_text.replace("元/平", "").replace(",", ""))
-        if unit_price_text else None
+    return listing_record(
+        house_id=li.get_attribute("data-lj_action_housedel_id"),
+        title=title_el.inner_text().strip() if title_el else None,
+        detail_url=title_el.get_attribute("href") if title_el else None,
+        community_name=community_el.inner_text().strip() if community_el else None,
+        community_url=community_el.get_attribute("href") if community_el else None,
+        district=district_els[1].inner_text().strip() if len(district_els) > 1 else None,
+        house_info=text(".houseInfo") or "",
+        total_price_text=text(".totalPrice span"),
+        unit_price_text=text(".unitPrice span"),
+        follow_info=text(".followInfo") or "",
+        tags=[t.inner_text().strip() for t in li.query_selector_all(".tag span")],
+        cover_image=(
+            img.get_attribute("data-original") or img.get_attribute("src")
+            if img else None
+        ),
+        crawl_time=now_str(),
     )
 
-    follow_info = text(".followInfo") or ""
-    follow_count = int(follow_info.split("人关注")[0]) if "人关注" in follow_info else 0
 
-    tags = [t.inner_text().strip() for t in li.query_selector_all(".tag span")]
-
-    img = li.query_selector("img.lj-lazy")
-    cover_image = (
-        img.get_attribute("data-original") or img.get_attribute("src")
-        if img else None
-    )
-
-    return {
-        "house_id": house_id,
-        "title": title,
-        "detail_url": detail_url,
-        "community_name": community_name,
-        "community_url": community_url,
-        "district": district,
-        "layout": layout,
-        "area_sqm": area_sqm,
-        "orientation": orientation,
-        "decoration": decoration,
-        "floor": floor,
-        "build_year": build_year,
-        "building_type": building_type,
-        "total_price_wan": total_price_wan,
-        "total_price_yuan": total_price_yuan,
-        "unit_price": unit_price,
-        "follow_count": follow_count,
-        "tags": tags,
-        "cover_image": cover_image,
-        "crawl_time": now_str(),
-    }
+def extract_listings(page, mode: str = "fast") -> list[dict]:
+    if mode == "fast":
+        # 一次取回整页 HTML，本地解析
+        return parse_list_html(page.content(), crawl_time=now_str())
+    return [parse_house(li) for li in page.query_selector_all("li.clear.LOGCLICKDATA")]
 
 # ======================
 # 主流程
 # ======================
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="链家二手房爬虫")
+    parser.add_argument(
+        "--output",
+        choices=OUTPUT_CHOICES,
+        default="ndjson",
+        help="ndjson：追加写入滚动分段；json：旧版一套房一个文件；db：直接写入 crawl_houses",
+    )
+    parser.add_argument(
+        "--compress",
+        choices=list(COMPRESSION_SUFFIXES),
+        default="none",
+        help="ndjson 分段压缩方式（zstd 需要安装 zstandard）",
+    )
+    parser.add_argument("--out-dir", type=Path, default=None, help="输出目录（db 模式下为兜底分段目录）")
+    parser.add_argument(
+        "--extract",
+        choices=["fast", "handles"],
+        default="fast",
+        help="fast：整页 HTML 本地解析；handles：逐字段元素句柄（旧方式）",
+    )
+    parser.add_argument(
+        "--skip-seen",
+        action="store_true",
+        help="文件输出按已见索引跳过以前爬过的房源（不再记录它们的价格变化）；默认全部写出，--output db 总是写入全部房源",
+    )
+    # 旧参数：重新写出现在是默认行为
+    parser.add_argument("--refresh", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--archive", action="store_true", help="同时归档每个列表页的原始 HTML（gzip）")
+    parser.add_argument("--archive-dir", type=Path, default=ARCHIVE_DIR, help="HTML 归档目录")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
     print("🔌 连接真实 Chrome（CDP）…")
+    archive = HtmlArchive(args.archive_dir) if args.archive else None
 
-    with sync_playwright() as p:
+    with sync_playwright() as p, open_sink(args.output, args.compress, args.out_dir, skip_seen=args.skip_seen) as writer:
         browser = p.chromium.connect_over_cdp(CDP_ENDPOINT)
 
         context = browser.contexts[0]
@@ -180,19 +159,21 @@ def main():
                 print("⚠️ 页面加载失败，停止")
                 break
 
-            items = page.query_selector_all("li.clear.LOGCLICKDATA")
-            for li in items:
-                data = parse_house(li)
+            started = time.perf_counter()
+            if archive is not None:
+                # 归档时整页 HTML 已经取回，fast 模式直接复用
+                html = page.content()
+                archive.save(page.url, html, via="browser")
+            if archive is not None and args.extract == "fast":
+                items = parse_list_html(html, crawl_time=now_str())
+            else:
+                items = extract_listings(page, args.extract)
+            print(f"   解析 {len(items)} 条，{(time.perf_counter() - started) * 1000:.0f} ms（{args.extract}）")
+            for data in items:
                 if not data["house_id"]:
                     continue
-
-                fname = f"{data['house_id']}_{safe_filename(data['title'])}.json"
-                out_path = OUT_DIR / fname
-                if out_path.exists():
-                    continue
-
-                with open(out_path, "w", encoding="utf-8") as f:
-                    json.dump(data, f, ensure_ascii=False, indent=2)
+                writer.write(data)
+            writer.flush()
 
             # ---------- 翻页前行为 ----------
             human_scroll_to_bottom(page)
@@ -212,7 +193,7 @@ def main():
             page.wait_for_timeout(random.randint(2500, 4000))
             page_num += 1
 
-        print(f"🎉 完成，数据在 {OUT_DIR}")
+        print(f"🎉 完成，新增 {writer.written} 条，跳过已爬过的 {writer.skipped} 条，数据在 {writer.out_dir}")
 
 # ======================
 # 入口
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+链家列表页离线解析：
+
+输入整页 HTML（page.content() 一次取回），在本地解析出全部房源，
+不再对每个字段做一次 CDP 往返。纯函数，可以直接对保存下来的 HTML 文件解析 / 压测：
+
+    python -m app.spider.lianjia.listing_parser page1.html page2.html
+"""
+
+import json
+import re
+import sys
+import time
+from datetime import datetime
+from html.parser import HTMLParser
+
+LISTING_CLASSES = frozenset({"clear", "LOGCLICKDATA"})
+HOUSE_ID_ATTR = "data-lj_action_housedel_id"
+# 人机验证页的特征文字（浏览器模式与 HTTP 模式共用）
+VERIFY_KEYWORDS = ("人机验证", "安全验证", "请完成验证", "verify")
+
+# 列表页的结构标记：房源列表容器 / 无结果提示
+LISTING_PAGE_MARKERS = ("sellListContent", "m-noresult", "LOGCLICKDATA")
+
+# 分页组件：<div class="page-box house-lst-page-box" page-data='{"totalPage":100,"curPage":1}'>
+_PAGE_DATA_RE = re.compile(r"page-data=(['\"])(\{.*?\})\1")
+
+_VOID_TAGS = frozenset(
+    {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr"}
+)
+
+
+def now_str():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+# ======================
+# 轻量 DOM（只为房源 li 建树）
+# ======================
+
+class _Node:
+    __slots__ = ("tag", "attrs", "classes", "children", "parent")
+
+    def __init__(self, tag: str, attrs: dict, parent: "_Node | None"):
+        self.tag = tag
+        self.attrs = attrs
+        self.classes = frozenset((attrs.get("class") or "").split())
+        self.children: list = []
+        self.parent = parent
+
+    def iter(self):
+        for child in self.children:
+            if isinstance(child, _Node):
+                yield child
+                yield from child.iter()
+
+    def find_all(self, tag: str | None = None, cls: str | None = None) -> list["_Node"]:
+        return [
+            n for n in self.iter()
+            if (tag is None or n.tag == tag) and (cls is None or cls in n.classes)
+        ]
+
+    def find(self, tag: str | None = None, cls: str | None = None) -> "_Node | None":
+        for n in self.iter():
+            if (tag is None or n.tag == tag) and (cls is None or cls in n.classes):
+                return n
+        return None
+
+    def text(self) -> str:
+        parts: list[str] = []
+
+        def walk(node: _Node) -> None:
+            for child in node.children:
+                if isinstance(child, _Node):
+                    walk(child)
+                else:
+                    parts.append(child)
+
+        walk(self)
+        return " ".join("".join(parts).split())
+
+
+class _ListingTreeBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.listings: list[_Node] = []
+        self._stack: list[_Node] = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {k: (v or "") for k, v in attrs}
+        if not self._stack:
+            if tag != "li" or not LISTING_CLASSES <= set((attrs.get("class") or "").split()):
+                return
+            node = _Node(tag, attrs, None)
+            self.listings.append(node)
+        else:
+            node = _Node(tag, attrs, self._stack[-1])
+            self._stack[-1].children.append(node)
+        if tag not in _VOID_TAGS:
+            self._stack.append(node)
+
+    def handle_endtag(self, tag):
+        # 容忍未闭合标签：弹到最近的同名元素为止
+        for i in range(len(self._stack) - 1, -1, -1):
+            if self._stack[i].tag == tag:
+                del self._stack[i:]
+                return
+
+    def handle_data(self, data):
+        if self._stack:
+            self._stack[-1].children.append(data)
+
+
+# ======================
+# 字段转换（句柄解析与离线解析共用）
+# ======================
+
+def _float_or_none(text: str | None) -> float | None:
+    try:
+        return float(text) if text else None
+    except ValueError:
+        return None
+
+
+def listing_record(
+    *,
+    house_id: str | None,
+    title: str | None,
+    detail_url: str | None,
+    community_name: str | None,
+    community_url: str | None,
+    district: str | None,
+    house_info: str,
+    total_price_text: str | None,
+    unit_price_text: str | None,
+    follow_info: str,
+    tags: list[str],
+    cover_image: str | None,
+    crawl_time: str | None = None,
+) -> dict:
+    parts = [p.strip() for p in house_info.split("|")]
+
+    layout = parts[0] if len(parts) > 0 else None
+
+    area_sqm = None
+    if len(parts) > 1 and "平米" in parts[1]:
+        area_sqm = _float_or_none(parts[1].replace("平米", ""))
+
+    orientation = parts[2] if len(parts) > 2 else None
+    decoration = parts[3] if len(parts) > 3 else None
+    floor = parts[4] if len(parts) > 4 else None
+
+    build_year = None
+    if len(parts) > 5 and "年" in parts[5]:
+        try:
+            build_year = int(parts[5].replace("年", ""))
+        except ValueError:
+            pass
+
+    building_type = parts[6] if len(parts) > 6 else None
+
+    total_price_wan = _float_or_none(total_price_text)
+    total_price_yuan = int(total_price_wan * 10_000) if total_price_wan else None
+
+    unit_price = None
+    if unit_price_text:
+        try:
+            unit_price = int(unit_price_text.replace("元/平", "").replace(",", ""))
+        except ValueError:
+            pass
+
+    follow_count = 0
+    if "人关注" in follow_info:
+        try:
+            follow_count = int(follow_info.split("人关注")[0])
+        except ValueError:
+            pass
+
+    return {
+        "house_id": house_id,
+        "title": title,
+        "detail_url": detail_url,
+        "community_name": community_name,
+        "community_url": community_url,
+        "district": district,
+        "layout": layout,
+        "area_sqm": area_sqm,
+        "orientation": orientation,
+        "decoration": decoration,
+        "floor": floor,
+        "build_year": build_year,
+        "building_type": building_type,
+        "total_price_wan": total_price_wan,
+        "total_price_yuan": total_price_yuan,
+        "unit_price": unit_price,
+        "follow_count": follow_count,
+        "tags": tags,
+        "cover_image": cover_image,
+        "crawl_time": crawl_time or now_str(),
+    }
+
+
+def _text(node: _Node | None) -> str | None:
+    return node.text() if node is not None else None
+
+
+def _parse_listing(li: _Node, crawl_time: str) -> dict:
+    title_box = li.find(cls="title")
+    title_el = title_box.find("a") if title_box is not None else None
+
+    position = li.find(cls="positionInfo")
+    position_links = position.find_all("a") if position is not None else []
+    community_el = position_links[0] if position_links else None
+
+    total_box = li.find(cls="totalPrice")
+    unit_box = li.find(cls="unitPrice")
+    tag_box = li.find(cls="tag")
+    img = next((n for n in li.find_all("img") if "lj-lazy" in n.classes), None)
+
+    return listing_record(
+        house_id=li.attrs.get(HOUSE_ID_ATTR) or None,
+        title=_text(title_el),
+        detail_url=title_el.attrs.get("href") if title_el is not None else None,
+        community_name=_text(community_el),
+        community_url=community_el.attrs.get("href") if community_el is not None else None,
+        district=position_links[1].text() if len(position_links) > 1 else None,
+        house_info=_text(li.find(cls="houseInfo")) or "",
+        total_price_text=_text(total_box.find("span")) if total_box is not None else None,
+        unit_price_text=_text(unit_box.find("span")) if unit_box is not None else None,
+        follow_info=_text(li.find(cls="followInfo")) or "",
+        tags=[s.text() for s in tag_box.find_all("span")] if tag_box is not None else [],
+        cover_image=(img.attrs.get("data-original") or img.attrs.get("src")) if img is not None else None,
+        crawl_time=crawl_time,
+    )
+
+
+def parse_list_html(html: str, crawl_time: str | None = None) -> list[dict]:
+    """解析整页列表 HTML，返回与 parse_house 相同结构的房源列表（含 house_id 为空的行）。"""
+    builder = _ListingTreeBuilder()
+    builder.feed(html)
+    builder.close()
+    crawl_time = crawl_time or now_str()
+    return [_parse_listing(li, crawl_time) for li in builder.listings]
+
+
+def is_verification_html(html: str) -> bool:
+    """
+    整页 HTML 是否为人机验证页。
+    正常列表页的脚本里也可能出现 verify 等字样，所以有房源列表时一律视为正常页面。
+    """
+    if "LOGCLICKDATA" in html:
+        return False
+    return any(k in html for k in VERIFY_KEYWORDS)
+
+
+def is_listing_page(html: str) -> bool:
+    """
+    是否为真正的列表页：有房源列表容器、“没有找到”提示或分页组件之一。
+    三者都没有的 200 页面（软封禁、模板改版、空白中转页）不能当作“已翻完”。
+    """
+    if any(marker in html for marker in LISTING_PAGE_MARKERS):
+        return True
+    return _PAGE_DATA_RE.search(html) is not None
+
+
+def parse_total_pages(html: str) -> int | None:
+    """从分页组件读取总页数，找不到时返回 None。"""
+    match = _PAGE_DATA_RE.search(html)
+    if not match:
+        return None
+    try:
+        return int(json.loads(match.group(2).replace("&quot;", '"'))["totalPage"])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def main(argv=None):
+    paths = (argv if argv is not None else sys.argv[1:])
+    if not paths:
+        print("用法：python -m app.spider.lianjia.listing_parser page.html [...]")
+        return
+
+    total_ms = 0.0
+    total_listings = 0
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        start = time.perf_counter()
+        listings = parse_list_html(html)
+        elapsed = (time.perf_counter() - start) * 1000
+        total_ms += elapsed
+        total_listings += len(listings)
+        print(f"{path}: {len(listings)} 条，{elapsed:.1f} ms")
+    print(f"合计 {total_listings} 条，平均 {total_ms / len(paths):.1f} ms/页")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+分片爬取调度：
+
+- 把城市展开成 区县 × 价格段 的分片（链家单个查询最多翻 100 页，分片后才能覆盖全量），
+  存进 SQLite 工作队列，进程崩溃 / 重启后继续；
+- N 个 worker 进程，各自连接一个 CDP 端点（多个端点轮流分配）、开一个标签页领取分片；
+  --fetch http 时先用 HTTP 长连接取页面，只有遇到人机验证才打开浏览器标签页；
+- 每爬完一页就把分片的 next_page 写回，崩溃或遇到人机验证的分片从最后完成的页继续；
+- 每次领取生成新的租约令牌，写回进度 / 结束时按令牌匹配：租约过期被别的 worker 接手后，
+  原 worker 迟到的写回不会覆盖进度或把分片标记为完成，而是放弃这个分片；
+- 遇到人机验证时分片标记为 blocked，人工处理后用 requeue 放回队列；
+- 所有 worker 共享 SQLite 里的全局限速（两次翻页之间的最小间隔），
+  并行不会放大对站点的请求频率。
+
+    python -m app.spider.lianjia.scheduler seed --city sh --districts pudong,minhang
+    python -m app.spider.lianjia.scheduler run --workers 3 --cdp http://localhost:9222,http://localhost:9223
+    python -m app.spider.lianjia.scheduler status
+    python -m app.spider.lianjia.scheduler requeue --blocked
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import time
+import uuid
+from contextlib import closing
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+QUEUE_PATH = Path(os.getenv("LIANJIA_QUEUE_PATH", str(BASE_DIR / "crawl_queue.sqlite3")))
+
+# 链家总价段：p1 < 200 万，p2 200-300 万 …… p7 > 1000 万
+PRICE_BANDS = ("p1", "p2", "p3", "p4", "p5", "p6", "p7")
+CITY_DISTRICTS = {
+    "sh": (
+        "pudong", "minhang", "baoshan", "xuhui", "putuo", "yangpu", "changning",
+        "songjiang", "jiading", "huangpu", "jingan", "hongkou", "qingpu",
+        "fengxian", "jinshan", "chongming",
+    ),
+}
+MAX_PAGES = 100
+
+# 所有 worker 合计：两次翻页之间至少间隔多少秒，再叠加随机抖动
+MIN_INTERVAL = float(os.getenv("LIANJIA_MIN_INTERVAL", "3"))
+JITTER = float(os.getenv("LIANJIA_JITTER", "1.5"))
+# running 状态超过这么久没有心跳，视为 worker 已崩溃，可被重新领取
+LEASE_SECONDS = int(os.getenv("LIANJIA_LEASE_SECONDS", "600"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS shards (
+    id          TEXT PRIMARY KEY,
+    city        TEXT NOT NULL,
+    district    TEXT NOT NULL,
+    band        TEXT NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'pending',  -- pending / running / done / blocked / failed
+    next_page   INTEGER NOT NULL DEFAULT 1,
+    total_pages INTEGER,
+    listings    INTEGER NOT NULL DEFAULT 0,
+    worker      TEXT,
+    lease       TEXT,                              -- 当前租约令牌，每次领取重新生成
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    error       TEXT,
+    updated_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_shards_status ON shards (status, updated_at);
+CREATE TABLE IF NOT EXISTS rate_limit (
+    id      INTEGER PRIMARY KEY CHECK (id = 1),
+    next_at REAL NOT NULL
+);
+INSERT OR IGNORE INTO rate_limit (id, next_at) VALUES (1, 0);
+"""
+
+
+def shard_url(city: str, district: str, band: str, page: int) -> str:
+    # /ershoufang/{district}/pg{n}{band}/，例如 /ershoufang/pudong/pg3p2/
+    return f"https://{city}.lianjia.com/ershoufang/{district}/pg{page}{band}/"
+
+
+# ======================
+# 工作队列
+# ======================
+
+class CrawlQueue:
+    def __init__(self, path: Path = QUEUE_PATH):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+            columns = {r["name"] for r in conn.execute("PRAGMA table_info(shards)")}
+            if "lease" not in columns:
+                # 旧版队列文件补列
+                conn.execute("ALTER TABLE shards ADD COLUMN lease TEXT")
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None：手动 BEGIN IMMEDIATE，保证领取 / 限速是原子的
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def seed(self, city: str, districts, bands=PRICE_BANDS) -> int:
+        now = time.time()
+        rows = [
+            (f"{city}/{district}/{band}", city, district, band, now)
+            for district in districts
+            for band in bands
+        ]
+        with closing(self._connect()) as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO shards (id, city, district, band, updated_at) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            return conn.total_changes - before
+
+    def claim(self, worker: str) -> dict | None:
+        """领取一个分片，返回的行里 lease 是本次租约令牌，后续 checkpoint / finish 都要带上。"""
+        now = time.time()
+        lease = uuid.uuid4().hex
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                """
+                SELECT * FROM shards
+                WHERE status = 'pending' OR (status = 'running' AND updated_at < ?)
+                ORDER BY updated_at LIMIT 1
+                """,
+                (now - LEASE_SECONDS,),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE shards SET status = 'running', worker = ?, lease = ?, attempts = attempts + 1, "
+                "error = NULL, updated_at = ? WHERE id = ?",
+                (worker, lease, now, row["id"]),
+            )
+            conn.execute("COMMIT")
+            return {**dict(row), "status": "running", "worker": worker, "lease": lease}
+
+    def checkpoint(
+        self, shard_id: str, lease: str, next_page: int, total_pages: int | None, listings: int
+    ) -> bool:
+        """一页完成后写回进度，同时刷新租约。返回 False 表示租约已失效（分片已被别的 worker 接手）。"""
+        with closing(self._connect()) as conn:
+            cur = conn.execute(
+                "UPDATE shards SET next_page = ?, total_pages = COALESCE(?, total_pages), "
+                "listings = listings + ?, updated_at = ? "
+                "WHERE id = ? AND lease = ? AND status = 'running'",
+                (next_page, total_pages, listings, time.time(), shard_id, lease),
+            )
+            return cur.rowcount == 1
+
+    def finish(self, shard_id: str, lease: str, status: str, error: str | None = None) -> bool:
+        """结束本次租约；返回 False 表示租约已失效，分片状态未改动。"""
+        with closing(self._connect()) as conn:
+            cur = conn.execute(
+                "UPDATE shards SET status = ?, error = ?, worker = NULL, lease = NULL, updated_at = ? "
+                "WHERE id = ? AND lease = ? AND status = 'running'",
+                (status, error, time.time(), shard_id, lease),
+            )
+            return cur.rowcount == 1
+
+    def requeue(self, statuses=("blocked",)) -> int:
+        # 只处理已结束租约的分片，running 分片由租约过期后重新领取，不在这里动
+        statuses = [s for s in statuses if s != "running"]
+        if not statuses:
+            return 0
+        marks = ",".join("?" for _ in statuses)
+        with closing(self._connect()) as conn:
+            cur = conn.execute(
+                "UPDATE shards SET status = 'pending', worker = NULL, lease = NULL, updated_at = ? "
+                f"WHERE status IN ({marks}) AND lease IS NULL",
+                (time.time(), *statuses),
+            )
+            return cur.rowcount
+
+    def status(self) -> dict[str, dict]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT status, COUNT(*) AS shards, SUM(listings) AS listings FROM shards GROUP BY status"
+            ).fetchall()
+        return {r["status"]: {"shards": r["shards"], "listings": r["listings"] or 0} for r in rows}
+
+    def wait_turn(self, min_interval: float = MIN_INTERVAL, jitter: float = JITTER) -> None:
+        """全局限速：在共享时间轴上预约下一个请求时刻，然后睡到那个时刻。"""
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            next_at = conn.execute("SELECT next_at FROM rate_limit WHERE id = 1").fetchone()[0]
+            slot = max(time.time(), next_at)
+            conn.execute(
+                "UPDATE rate_limit SET next_at = ? WHERE id = 1",
+                (slot + min_interval + random.uniform(0, jitter),),
+            )
+            conn.execute("COMMIT")
+        delay = slot - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+
+# ======================
+# worker
+# ======================
+
+def _crawl_shard(source, queue: CrawlQueue, shard, writer, min_interval: float, archive=None) -> str:
+    page_num = shard["next_page"]
+    total_pages = shard["total_pages"]
+    while page_num <= min(total_pages or MAX_PAGES, MAX_PAGES):
+        queue.wait_turn(min_interval)
+        url = shard_url(shard["city"], shard["district"], shard["band"], page_num)
+        result = source.load(url)
+
+        if result.blocked:
+            # 不在这里等人工处理：标记 blocked，进度停在这一页
+            return "blocked"
+        if archive is not None and result.html:
+            # 解析结果为空也归档：可能是解析器跟不上页面改版
+            archive.save(result.url, result.html, via=result.via)
+        if not result.listings:
+            # 没有房源：分片为空或已翻过最后一页
+            return "done"
+
+        total_pages = total_pages or result.total_pages
+        written = sum(1 for data in result.listings if data["house_id"] and writer.write(data))
+        writer.flush()
+
+        page_num += 1
+        if not queue.checkpoint(shard["id"], shard["lease"], page_num, total_pages, written):
+            # 租约已过期并被别的 worker 接手：停止，不再写回进度
+            return "lost"
+        print(
+            f"   [{shard['id']}] 第 {page_num - 1}/{total_pages or '?'} 页，"
+            f"新增 {written} 条（{result.via}）"
+        )
+    return "done"
+
+
+def worker_main(
+    worker_id: int,
+    cdp_endpoint: str,
+    queue_path: str,
+    output: str,
+    compression: str,
+    extract: str,
+    min_interval: float,
+    fetch: str = "browser",
+    archive_dir: str | None = None,
+    skip_seen: bool = False,
+) -> None:
+    from contextlib import ExitStack
+
+    from app.spider.lianjia.archive import HtmlArchive
+    from app.spider.lianjia.fetcher import BrowserPageSource, HttpFetcher, HttpPageSource
+    from app.spider.lianjia.sinks import open_sink
+
+    queue = CrawlQueue(Path(queue_path))
+    archive = HtmlArchive(Path(archive_dir)) if archive_dir else None
+    name = f"w{worker_id}@{cdp_endpoint}/{os.getpid()}"
+
+    with ExitStack() as stack:
+        writer = stack.enter_context(open_sink(output, compression, skip_seen=skip_seen))
+
+        def open_browser() -> BrowserPageSource:
+            # http 模式下只有遇到人机验证才会走到这里
+            from playwright.sync_api import sync_playwright
+
+            p = stack.enter_context(sync_playwright())
+            browser = p.chromium.connect_over_cdp(cdp_endpoint)
+            context = browser.contexts[0] if browser.contexts else browser.new_context()
+            page = context.new_page()
+            stack.callback(page.close)
+            return BrowserPageSource(page, extract)
+
+        if fetch == "http":
+            fetcher = HttpFetcher()
+            stack.callback(fetcher.close)
+            source = HttpPageSource(fetcher, browser_factory=open_browser)
+        else:
+            source = open_browser()
+
+        while True:
+            shard = queue.claim(name)
+            if shard is None:
+                break
+            print(f"🧩 {name} 领取分片 {shard['id']}（从第 {shard['next_page']} 页）")
+            try:
+                status = _crawl_shard(source, queue, shard, writer, min_interval, archive)
+            except Exception as e:
+                # 页面崩溃 / 超时等：记失败，进度保留，requeue --failed 后继续
+                if queue.finish(shard["id"], shard["lease"], "failed", f"{type(e).__name__}: {e}"):
+                    print(f"❌ 分片 {shard['id']} 失败：{e}")
+                else:
+                    print(f"⚠️ 分片 {shard['id']} 失败，但租约已被接手，不记录：{e}")
+                continue
+            if status == "lost" or not queue.finish(shard["id"], shard["lease"], status):
+                print(f"⚠️ 分片 {shard['id']} 的租约已过期并被其它 worker 接手，放弃")
+                continue
+            if status == "blocked":
+                print(f"🧠 分片 {shard['id']} 遇到人机验证，已暂停（requeue --blocked 继续）")
+        print(f"✅ {name} 没有待处理分片，退出（新增 {writer.written} 条，跳过已爬过的 {writer.skipped} 条）")
+
+
+def run(
+    workers: int,
+    cdp_endpoints: list[str],
+    queue_path: Path = QUEUE_PATH,
+    output: str = "ndjson",
+    compression: str = "none",
+    extract: str = "fast",
+    min_interval: float = MIN_INTERVAL,
+    fetch: str = "browser",
+    archive_dir: Path | None = None,
+    skip_seen: bool = False,
+) -> None:
+    ctx = multiprocessing.get_context("spawn")
+    procs = []
+    for i in range(workers):
+        endpoint = cdp_endpoints[i % len(cdp_endpoints)]
+        proc = ctx.Process(
+            target=worker_main,
+            args=(
+                i, endpoint, str(queue_path), output, compression, extract, min_interval, fetch,
+                str(archive_dir) if archive_dir else None, skip_seen,
+            ),
+            name=f"lianjia-worker-{i}",
+        )
+        proc.start()
+        procs.append(proc)
+    for proc in procs:
+        proc.join()
+
+
+def main(argv=None):
+    from app.spider.lianjia.archive import ARCHIVE_DIR
+    from app.spider.lianjia.sinks import OUTPUT_CHOICES
+    from app.spider.lianjia.storage import COMPRESSION_SUFFIXES
+
+    parser = argparse.ArgumentParser(description="链家分片爬取调度")
+    parser.add_argument("--queue", type=Path, default=QUEUE_PATH, help="SQLite 工作队列路径")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = sub.add_parser("seed", help="按 区县 × 价格段 生成分片")
+    seed_parser.add_argument("--city", default="sh")
+    seed_parser.add_argument("--districts", help="逗号分隔，默认使用内置列表")
+    seed_parser.add_argument("--bands", default=",".join(PRICE_BANDS), help="逗号分隔；传空字符串表示不分价格段")
+
+    run_parser = sub.add_parser("run", help="启动 worker 领取分片")
+    run_parser.add_argument("--workers", type=int, default=1)
+    run_parser.add_argument("--cdp", default="http://localhost:9222", help="CDP 端点，逗号分隔，worker 轮流分配")
+    run_parser.add_argument(
+        "--output",
+        choices=OUTPUT_CHOICES,
+        default="ndjson",
+        help="db：直接批量写入 crawl_houses，数据库不可用时写 NDJSON 分段",
+    )
+    run_parser.add_argument("--compress", choices=list(COMPRESSION_SUFFIXES), default="none")
+    run_parser.add_argument("--extract", choices=["fast", "handles"], default="fast")
+    run_parser.add_argument(
+        "--fetch",
+        choices=["browser", "http"],
+        default="browser",
+        help="http：长连接 HTTP + 登录态 cookie，只在遇到人机验证时升级到浏览器",
+    )
+    run_parser.add_argument(
+        "--skip-seen",
+        action="store_true",
+        help="文件输出按已见索引跳过以前爬过的房源（不再记录它们的价格变化）；默认全部写出",
+    )
+    # 旧参数：重新写出现在是默认行为
+    run_parser.add_argument("--refresh", action="store_true", help=argparse.SUPPRESS)
+    run_parser.add_argument("--archive", action="store_true", help="同时归档每个列表页的原始 HTML（gzip）")
+    run_parser.add_argument("--archive-dir", type=Path, default=ARCHIVE_DIR, help="HTML 归档目录")
+    run_parser.add_argument("--min-interval", type=float, default=MIN_INTERVAL, help="全局翻页最小间隔（秒）")
+
+    sub.add_parser("status", help="查看分片进度")
+
+    requeue_parser = sub.add_parser("requeue", help="把 blocked / failed 分片放回队列")
+    requeue_parser.add_argument("--blocked", action="store_true")
+    requeue_parser.add_argument("--failed", action="store_true")
+
+    args = parser.parse_args(argv)
+    queue = CrawlQueue(args.queue)
+
+    if args.command == "seed":
+        if args.districts:
+            districts = [d.strip() for d in args.districts.split(",") if d.strip()]
+        else:
+            districts = CITY_DISTRICTS.get(args.city)
+            if not districts:
+                raise SystemExit(f"没有 {args.city} 的内置区县列表，请用 --districts 指定")
+        bands = [b.strip() for b in args.bands.split(",")] if args.bands else [""]
+        added = queue.seed(args.city, districts, bands)
+        print(f"✅ 新增 {added} 个分片")
+    elif args.command == "run":
+        endpoints = [e.strip() for e in args.cdp.split(",") if e.strip()]
+        run(
+            args.workers,
+            endpoints,
+            args.queue,
+            args.output,
+            args.compress,
+            args.extract,
+            args.min_interval,
+            args.fetch,
+            args.archive_dir if args.archive else None,
+            args.skip_seen,
+        )
+    elif args.command == "status":
+        for status, info in sorted(queue.status().items()):
+            print(f"{status:<8} 分片 {info['shards']:>5}  房源 {info['listings']:>8}")
+    elif args.command == "requeue":
+        statuses = [s for s, on in (("blocked", args.blocked), ("failed", args.failed)) if on] or ["blocked"]
+        print(f"✅ 已放回 {queue.requeue(statuses)} 个分片")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+按 house_id 去重的已见索引（爬虫和导入程序共用）：
+
+- 链家 house_id 是纯数字，直接存成 uint64；非数字 id 取 blake2b 的 8 字节摘要（最高位置 1，
+  不会与数字 id 冲突）。持久化为一个有序 uint64 数组（.npy），100 万套房约 8 MB；
+- 查询在内存里做：先查本次运行新增的 set，再在有序数组上二分，不再逐条 stat 文件；
+- 保存时与磁盘上的最新版本合并（文件锁保护），多个 worker 进程各自保存不会互相覆盖；
+- 第一次使用时可以从已有的分段索引 / JSON 文件名 / crawl_houses 表初始化：
+
+    python -m app.spider.lianjia.seen_index seed --from-files --from-db
+    python -m app.spider.lianjia.seen_index stats
+"""
+
+import argparse
+import hashlib
+import os
+import uuid
+from collections.abc import Iterable
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows：不加锁，单进程使用
+    fcntl = None
+
+BASE_DIR = Path(__file__).resolve().parent
+SEEN_INDEX_PATH = Path(os.getenv("LIANJIA_SEEN_INDEX", str(BASE_DIR / "seen_index.npy")))
+
+_EMPTY = np.empty(0, dtype=np.uint64)
+
+
+def house_key(house_id) -> int:
+    text = str(house_id).strip()
+    if text.isdigit() and len(text) <= 18:
+        return int(text)
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") | (1 << 63)
+
+
+@contextmanager
+def _locked(path: Path):
+    if fcntl is None:
+        yield
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(path.name + ".lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _read_keys(path: Path) -> np.ndarray:
+    if not path.exists():
+        return _EMPTY
+    return np.load(path).astype(np.uint64, copy=False)
+
+
+class SeenIndex:
+    def __init__(self, path: Path | None = SEEN_INDEX_PATH, keys: np.ndarray = _EMPTY):
+        self.path = path
+        self._keys = keys  # 有序、无重复
+        self._added: set[int] = set()
+        # 本次运行的统计
+        self.checked = 0
+        self.skipped = 0
+
+    @classmethod
+    def load(cls, path: Path = SEEN_INDEX_PATH) -> "SeenIndex":
+        return cls(path, _read_keys(path))
+
+    @property
+    def exists(self) -> bool:
+        return self.path is not None and self.path.exists()
+
+    def __len__(self) -> int:
+        return len(self._keys) + len(self._added)
+
+    def _in_base(self, key: int) -> bool:
+        keys = self._keys
+        if not len(keys):
+            return False
+        i = int(np.searchsorted(keys, np.uint64(key)))
+        return i < len(keys) and int(keys[i]) == key
+
+    def __contains__(self, house_id) -> bool:
+        key = house_key(house_id)
+        return key in self._added or self._in_base(key)
+
+    def add(self, house_id) -> None:
+        key = house_key(house_id)
+        if not self._in_base(key):
+            self._added.add(key)
+
+    def update(self, house_ids: Iterable) -> None:
+        for house_id in house_ids:
+            self.add(house_id)
+
+    def check_and_add(self, house_id) -> bool:
+        """已见返回 True（并计入 skipped）；未见时记下并返回 False。"""
+        self.checked += 1
+        key = house_key(house_id)
+        if key in self._added or self._in_base(key):
+            self.skipped += 1
+            return True
+        self._added.add(key)
+        return False
+
+    def filter_new(self, house_ids: Iterable, add: bool = True) -> list:
+        """
+        批量版本：返回未见过的 house_id（保持顺序）。
+        add 时同时把它们记为已见；导入程序传 False，写库成功后再 update。
+        """
+        ids = list(house_ids)
+        if not ids:
+            return []
+        keys = np.fromiter((house_key(h) for h in ids), dtype=np.uint64, count=len(ids))
+        if len(self._keys):
+            pos = np.searchsorted(self._keys, keys)
+            pos[pos >= len(self._keys)] = 0
+            in_base = self._keys[pos] == keys
+        else:
+            in_base = np.zeros(len(ids), dtype=bool)
+        fresh = []
+        for house_id, key, seen in zip(ids, keys.tolist(), in_base.tolist()):
+            self.checked += 1
+            if seen or key in self._added:
+                self.skipped += 1
+                continue
+            if add:
+                self._added.add(key)
+            fresh.append(house_id)
+        return fresh
+
+    def _merged(self, other: np.ndarray) -> np.ndarray:
+        added = np.fromiter(self._added, dtype=np.uint64, count=len(self._added))
+        return np.unique(np.concatenate([self._keys, other, added]))
+
+    def save(self) -> None:
+        """与磁盘上的版本合并后原子替换。"""
+        if self.path is None:
+            return
+        with _locked(self.path):
+            merged = self._merged(_read_keys(self.path))
+            tmp = self.path.with_name(f".{self.path.name}.{uuid.uuid4().hex}.npy")
+            np.save(tmp, merged)
+            os.replace(tmp, self.path)
+        self._keys = merged
+        self._added.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self), "checked": self.checked, "skipped": self.skipped}
+
+
+# ======================
+# 初始化来源
+# ======================
+
+def ids_from_files(segment_dir: Path | None = None, json_dir: Path | None = None) -> Iterable[str]:
+    from app.spider.lianjia.storage import JSON_DIR, SEGMENT_DIR, load_index
+
+    yield from load_index(segment_dir or SEGMENT_DIR)
+    json_dir = json_dir or JSON_DIR
+    if json_dir.exists():
+        # 旧版文件名：{house_id}_{标题}.json
+        for p in json_dir.glob("*.json"):
+            yield p.name.split("_", 1)[0]
+
+
+def ids_from_db(batch_size: int = 50_000) -> Iterable[str]:
+    from sqlalchemy import select
+
+    from app.db import SessionLocal
+    from app.models import CrawlHouse
+
+    db = SessionLocal()
+    try:
+        result = db.execute(select(CrawlHouse.house_id).execution_options(yield_per=batch_size))
+        for (house_id,) in result:
+            yield house_id
+    finally:
+        db.close()
+
+
+def load_or_seed(path: Path = SEEN_INDEX_PATH) -> SeenIndex:
+    """爬虫入口用：索引不存在时从已有的分段索引和 JSON 文件名初始化（与旧版“文件已存在就跳过”一致）。"""
+    index = SeenIndex.load(path)
+    if not index.exists:
+        index.update(ids_from_files())
+    return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="house_id 已见索引")
+    parser.add_argument("--path", type=Path, default=SEEN_INDEX_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    seed_parser = sub.add_parser("seed", help="从已有数据初始化 / 补充索引")
+    seed_parser.add_argument("--from-files", action="store_true", help="分段索引 + 旧版 JSON 文件名")
+    seed_parser.add_argument("--from-db", action="store_true", help="crawl_houses.house_id")
+    sub.add_parser("stats", help="查看索引大小")
+    args = parser.parse_args(argv)
+
+    index = SeenIndex.load(args.path)
+    if args.command == "seed":
+        before = len(index)
+        if args.from_files:
+            index.update(ids_from_files())
+        if args.from_db:
+            index.update(ids_from_db())
+        index.save()
+        print(f"✅ 索引 {args.path}：{before} → {len(index)} 个 house_id")
+    else:
+        size = args.path.stat().st_size if args.path.exists() else 0
+        print(f"📊 {args.path}：{len(index)} 个 house_id，{size / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
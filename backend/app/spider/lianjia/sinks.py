@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+爬虫输出 sink：
+
+所有 sink 都实现 write(data) -> bool / flush() / close() / written，爬虫和调度器只依赖这个接口。
+
+- 文件 sink：storage.SegmentWriter（NDJSON 分段）、storage.JsonFileWriter（旧版一房一文件）；
+- DbSink：边爬边写 crawl_houses。房源先进内存缓冲（按 house_id 去重，最多 batch_size 条），
+  缓冲满或距上次写入超过 flush_interval 秒时，用导入程序的 upsert 批量写入并提交；
+- 数据库不可用时，缓冲里的记录改写到 NDJSON 分段（之后由导入程序补录），
+  retry_after 秒后再尝试写库，爬虫不会因为数据库中断而停下或丢数据；
+- 默认所有 sink 都写出重新爬到的房源，价格变化由导入时的 content_hash 判断并记入价格历史；
+  文件输出可以用 skip_seen（--skip-seen）按已见索引跳过以前爬过的房源。
+  DbSink 总是写入，只把 house_id 记进索引，供之后的 --skip-seen 使用。
+"""
+
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Protocol
+
+from app.spider.lianjia.seen_index import load_or_seed
+from app.spider.lianjia.storage import SEGMENT_DIR, SegmentWriter, open_writer
+
+logger = logging.getLogger(__name__)
+
+DB_SINK_BATCH = int(os.getenv("LIANJIA_DB_BATCH", "500"))
+DB_SINK_FLUSH_SECONDS = float(os.getenv("LIANJIA_DB_FLUSH_SECONDS", "2"))
+DB_SINK_RETRY_SECONDS = float(os.getenv("LIANJIA_DB_RETRY_SECONDS", "30"))
+
+OUTPUT_CHOICES = ("ndjson", "json", "db")
+
+
+class Sink(Protocol):
+    written: int
+
+    def write(self, data: dict) -> bool: ...
+
+    def flush(self) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class DbSink:
+    def __init__(
+        self,
+        session_factory=None,
+        batch_size: int = DB_SINK_BATCH,
+        flush_interval: float = DB_SINK_FLUSH_SECONDS,
+        retry_after: float = DB_SINK_RETRY_SECONDS,
+        fallback_dir: Path = SEGMENT_DIR,
+        compression: str = "none",
+        seen=None,
+    ):
+        if session_factory is None:
+            from app.db import SessionLocal
+
+            session_factory = SessionLocal
+        self.session_factory = session_factory
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.retry_after = retry_after
+        self.fallback_dir = fallback_dir
+        self.compression = compression
+        self.out_dir = "crawl_houses"
+        self.seen = seen
+
+        self.written = 0  # 成功写库的条数
+        self.spilled = 0  # 写到兜底文件的条数
+        self.failed = 0  # 个别记录写库失败（已写到兜底文件）
+        self.flushes = 0
+        self.skipped = 0  # 与文件 sink 接口一致；DbSink 不按已见索引跳过
+
+        self._buffer: dict[str, dict] = {}
+        self._last_flush = time.monotonic()
+        self._db_down_until = 0.0
+        self._fallback: SegmentWriter | None = None
+
+    # ---------- 写入 ----------
+
+    def write(self, data: dict) -> bool:
+        house_id = str(data.get("house_id") or "").strip()
+        if not house_id:
+            return False
+        if self.seen is not None:
+            self.seen.add(house_id)
+        # 同一批里重复出现的房源只保留最后一次
+        self._buffer[house_id] = data
+        if len(self._buffer) >= self.batch_size:
+            self._flush_buffer()
+        return True
+
+    def flush(self) -> None:
+        """爬虫每页调用一次：只在缓冲超时时写库，批量由 batch_size / flush_interval 控制。"""
+        if self._buffer and time.monotonic() - self._last_flush >= self.flush_interval:
+            self._flush_buffer()
+
+    def close(self) -> None:
+        if self._buffer:
+            self._flush_buffer()
+        if self._fallback is not None:
+            self._fallback.close()
+            self._fallback = None
+        if self.seen is not None:
+            self.seen.save()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- 内部 ----------
+
+    def _spill(self, items) -> None:
+        if self._fallback is None:
+            self._fallback = SegmentWriter(self.fallback_dir, compression=self.compression)
+        for data in items:
+            self._fallback.write(data)
+            self.spilled += 1
+        self._fallback.flush()
+
+    def _flush_buffer(self) -> None:
+        from sqlalchemy.exc import OperationalError
+
+        from app.services.crawl_import import CrawlRecordError, import_records, normalize_record, upsert_rows
+
+        items = list(self._buffer.values())
+        self._buffer.clear()
+        self._last_flush = time.monotonic()
+        self.flushes += 1
+
+        if time.monotonic() < self._db_down_until:
+            self._spill(items)
+            return
+
+        rows, raw_by_id = [], {}
+        for data in items:
+            try:
+                row = normalize_record(data)
+            except CrawlRecordError:
+                self.failed += 1
+                continue
+            rows.append(row)
+            raw_by_id[row["house_id"]] = data
+
+        db = self.session_factory()
+        try:
+            upsert_rows(db, rows)
+            db.commit()
+            self.written += len(rows)
+        except OperationalError:
+            # 连不上 / 连接断开：整批写兜底文件，一段时间内不再尝试写库
+            db.rollback()
+            logger.warning("Database unavailable, spilling %d listings to %s", len(items), self.fallback_dir, exc_info=True)
+            self._db_down_until = time.monotonic() + self.retry_after
+            self._spill(items)
+        except Exception:
+            # 个别记录有问题：交给导入程序逐行重试，失败的记录写兜底文件
+            db.rollback()
+            stats = import_records(db, rows, chunk_size=len(rows))
+            self.written += stats.written
+            self.failed += len(stats.failed)
+            self._spill(raw_by_id[f["house_id"]] for f in stats.failed)
+        finally:
+            db.close()
+
+
+def open_sink(
+    output: str = "ndjson",
+    compression: str = "none",
+    out_dir: Path | None = None,
+    skip_seen: bool = False,
+):
+    """
+    --output 对应的 sink；db 模式下 out_dir 是兜底分段目录。
+    默认全部写出，重新爬到的房源导入时按 content_hash 记价格历史；
+    文件输出在 skip_seen 时用已见索引跳过以前爬过的房源（价格变化也不会再记录）。
+    db 模式总是写入全部房源，skip_seen 不起作用。
+    """
+    if output == "db":
+        return DbSink(fallback_dir=out_dir or SEGMENT_DIR, compression=compression, seen=load_or_seed())
+    seen = load_or_seed() if skip_seen else None
+    return open_writer(output, compression, out_dir, seen=seen)
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+爬虫结果存储：
+
+- SegmentWriter：紧凑 NDJSON 追加写入滚动分段文件（可选 gzip / zstd 压缩），
+  每个分段旁边有一份索引 <segment>.index，记录 house_id → (分段, 偏移)；
+- JsonFileWriter：旧版“一套房一个 JSON 文件”布局，作为兼容选项保留。
+
+两种 writer 都可以传入 seen_index.SeenIndex：已见过的 house_id 在内存里判断后直接跳过
+（skipped 计数），关闭时把新见到的 house_id 合并保存。不传时每条都写出（重新爬到的房源
+也会写，导入时按 content_hash 记价格历史）。
+
+分段写入时文件名带 .part 后缀，关闭（滚动）后才改成正式名字，
+导入程序只读取已关闭的分段，不会读到写了一半的文件。
+索引中的 offset 是该行在解压后数据流中的字节偏移；未压缩分段可以直接 seek。
+"""
+
+import gzip
+import io
+import json
+import os
+from collections.abc import Iterator
+from datetime import datetime
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+JSON_DIR = BASE_DIR / "lianjia_json"
+SEGMENT_DIR = BASE_DIR / "lianjia_segments"
+
+SEGMENT_PREFIX = "seg-"
+PART_SUFFIX = ".part"
+INDEX_SUFFIX = ".index"
+COMPRESSION_SUFFIXES = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+# 单个分段的上限（未压缩字节数 / 记录数），先到先滚动
+SEGMENT_MAX_BYTES = int(os.getenv("LIANJIA_SEGMENT_MAX_BYTES", str(64 * 1024 * 1024)))
+SEGMENT_MAX_RECORDS = int(os.getenv("LIANJIA_SEGMENT_MAX_RECORDS", "50000"))
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("zstd 压缩需要安装 zstandard：pip install zstandard") from None
+    return zstandard
+
+
+def safe_filename(text: str, max_len=80):
+    if not text:
+        return "unknown"
+    return "".join(c for c in text if c.isalnum() or c in " _-").strip()[:max_len]
+
+
+# ======================
+# 旧版：一套房一个文件
+# ======================
+
+class JsonFileWriter:
+    def __init__(self, out_dir: Path = JSON_DIR, seen=None):
+        self.out_dir = out_dir
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.seen = seen
+        self.written = 0
+        self.skipped = 0
+
+    def write(self, data: dict) -> bool:
+        if self.seen is not None and self.seen.check_and_add(data["house_id"]):
+            self.skipped += 1
+            return False
+        fname = f"{data['house_id']}_{safe_filename(data['title'])}.json"
+        out_path = self.out_dir / fname
+        # 没有已见索引时覆盖旧文件：导入清单按大小 / mtime 发现变化后重新导入
+        with open(out_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        self.written += 1
+        return True
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        if self.seen is not None:
+            self.seen.save()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ======================
+# NDJSON 分段
+# ======================
+
+def is_segment(path: Path) -> bool:
+    name = path.name
+    return (
+        name.startswith(SEGMENT_PREFIX)
+        and not name.endswith(PART_SUFFIX)
+        and not name.endswith(INDEX_SUFFIX)
+        and ".ndjson" in name
+    )
+
+
+def list_segments(segment_dir: Path = SEGMENT_DIR) -> list[Path]:
+    """已关闭的分段，按文件名（即创建时间）排序。"""
+    if not segment_dir.exists():
+        return []
+    return sorted(p for p in segment_dir.iterdir() if is_segment(p))
+
+
+def index_path(segment: Path) -> Path:
+    return segment.with_name(segment.name + INDEX_SUFFIX)
+
+
+def load_index(segment_dir: Path = SEGMENT_DIR) -> dict[str, tuple[str, int]]:
+    """合并所有分段索引：house_id → (分段文件名, 偏移)，后写入的覆盖先写入的。"""
+    merged: dict[str, tuple[str, int]] = {}
+    for segment in list_segments(segment_dir):
+        idx = index_path(segment)
+        if not idx.exists():
+            continue
+        with open(idx, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                merged[entry["house_id"]] = (segment.name, entry["offset"])
+    return merged
+
+
+class SegmentWriter:
+    def __init__(
+        self,
+        segment_dir: Path = SEGMENT_DIR,
+        compression: str = "none",
+        max_bytes: int = SEGMENT_MAX_BYTES,
+        max_records: int = SEGMENT_MAX_RECORDS,
+        seen=None,
+    ):
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"不支持的压缩方式：{compression}")
+        if compression == "zstd":
+            _zstd()
+        self.segment_dir = self.out_dir = segment_dir
+        self.segment_dir.mkdir(parents=True, exist_ok=True)
+        self.compression = compression
+        self.max_bytes = max_bytes
+        self.max_records = max_records
+        # 传入时已经写过的 house_id 不再重复写；None 表示不去重
+        self.seen = seen
+        self.written = 0
+        self.skipped = 0
+        self.segments: list[Path] = []
+
+        self._seq = 0
+        self._raw = None
+        self._stream = None
+        self._index = None
+        self._path: Path | None = None
+        self._bytes = 0
+        self._records = 0
+
+    # ---------- 分段生命周期 ----------
+
+    def _open_segment(self) -> None:
+        stamp = datetime.now().strftime("%Y%m%d%H%M%S")
+        self._seq += 1
+        name = (
+            f"{SEGMENT_PREFIX}{stamp}-{os.getpid()}-{self._seq:04d}.ndjson"
+            f"{COMPRESSION_SUFFIXES[self.compression]}"
+        )
+        self._path = self.segment_dir / name
+        self._raw = open(self._path.with_name(name + PART_SUFFIX), "wb")
+        if self.compression == "gzip":
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode="wb", compresslevel=6)
+        elif self.compression == "zstd":
+            self._stream = _zstd().ZstdCompressor(level=3).stream_writer(self._raw, closefd=False)
+        else:
+            self._stream = self._raw
+        idx = index_path(self._path)
+        self._index = open(idx.with_name(idx.name + PART_SUFFIX), "w", encoding="utf-8")
+        self._bytes = 0
+        self._records = 0
+
+    def _close_segment(self) -> None:
+        if self._raw is None:
+            return
+        if self._stream is not self._raw:
+            self._stream.close()
+        self._raw.close()
+        self._index.close()
+        part = self._path.with_name(self._path.name + PART_SUFFIX)
+        idx = index_path(self._path)
+        idx_part = idx.with_name(idx.name + PART_SUFFIX)
+        if self._records:
+            # 先放索引再放分段：导入程序看到分段时索引一定已经就位
+            os.replace(idx_part, idx)
+            os.replace(part, self._path)
+            self.segments.append(self._path)
+        else:
+            part.unlink(missing_ok=True)
+            idx_part.unlink(missing_ok=True)
+        self._raw = self._stream = self._index = None
+        self._path = None
+
+    # ---------- 写入 ----------
+
+    def write(self, data: dict) -> bool:
+        house_id = str(data["house_id"])
+        if self.seen is not None and self.seen.check_and_add(house_id):
+            self.skipped += 1
+            return False
+
+        line = (json.dumps(data, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        if self._raw is None:
+            self._open_segment()
+        elif self._bytes + len(line) > self.max_bytes or self._records >= self.max_records:
+            self._close_segment()
+            self._open_segment()
+
+        offset = self._bytes
+        self._stream.write(line)
+        self._index.write(json.dumps({"house_id": house_id, "offset": offset}) + "\n")
+        self._bytes += len(line)
+        self._records += 1
+        self.written += 1
+        return True
+
+    def flush(self) -> None:
+        if self._raw is None:
+            return
+        self._stream.flush()
+        self._index.flush()
+
+    def close(self) -> None:
+        self._close_segment()
+        if self.seen is not None:
+            self.seen.save()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_writer(fmt: str = "ndjson", compression: str = "none", out_dir: Path | None = None, seen=None):
+    if fmt == "json":
+        return JsonFileWriter(out_dir or JSON_DIR, seen=seen)
+    if fmt == "ndjson":
+        return SegmentWriter(out_dir or SEGMENT_DIR, compression=compression, seen=seen)
+    raise ValueError(f"不支持的输出格式：{fmt}")
+
+
+# ======================
+# 读取
+# ======================
+
+class _HashingReader(io.RawIOBase):
+    """读取时顺带计算原始（压缩后）字节的哈希，文件只读一遍。"""
+
+    def __init__(self, raw, digest):
+        self._raw = raw
+        self.digest = digest
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        n = self._raw.readinto(buffer)
+        if n:
+            self.digest.update(memoryview(buffer)[:n])
+        return n
+
+
+def iter_segment(path: Path, digest=None) -> Iterator[tuple[int, bytes]]:
+    """
+    流式读取一个分段，逐行产出 (行号, 原始行)。
+    传入 digest（hashlib 对象）时会用文件原始字节更新它，文件只读一遍。
+    """
+    with open(path, "rb") as f:
+        source = io.BufferedReader(_HashingReader(f, digest)) if digest is not None else f
+        if path.name.endswith(".gz"):
+            lines = gzip.GzipFile(fileobj=source, mode="rb")
+        elif path.name.endswith(".zst"):
+            lines = io.BufferedReader(_zstd().ZstdDecompressor().stream_reader(source))
+        else:
+            lines = source
+        for lineno, line in enumerate(lines, 1):
+            if line.strip():
+                yield lineno, line
+        if digest is not None:
+            # 压缩流结尾可能还有没读到的字节，补齐哈希
+            while source.read(1 << 16):
+                pass
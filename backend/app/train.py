@@ -1,35 +1,133 @@
+import argparse
+import json
 import logging
 
-import joblib
-import numpy as np
 from sqlalchemy.orm import Session
 from sklearn.linear_model import LinearRegression
 
 from app.db import SessionLocal
-from app.models import House
+from app.services.features import FEATURE_NAMES
+from app.services.model_registry import registry
+from app.services.training_data import load_training_arrays
 
-MODEL_PATH = "model.pkl"
 logger = logging.getLogger(__name__)
 
 
-def train_and_save() -> None:
+def train_and_save() -> str:
     db: Session = SessionLocal()
     try:
-        houses = db.query(House).all()
-        if not houses:
+        data = load_training_arrays(db)
+        if data.rows == 0:
             raise ValueError("训练数据为空，无法训练模型")
 
-        X = np.array([[h.area_sqm, h.bedrooms, h.age_years] for h in houses])
-        y = np.array([h.price for h in houses])
-
         model = LinearRegression()
-        model.fit(X, y)
+        model.fit(data.X, data.y)
+
+        version = registry.publish(
+            model,
+            {
+                "rows": data.rows,
+                "features": list(FEATURE_NAMES),
+                "data_watermark": data.watermark.key,
+            },
+        )
+        logger.info("Model version %s published to %s", version, registry.root)
+        return version
+    finally:
+        db.close()
+
+
+def cross_validate_model(folds: int = 5) -> dict:
+    from sklearn.model_selection import KFold, cross_validate
 
-        joblib.dump(model, MODEL_PATH)
-        logger.info("Model saved to %s", MODEL_PATH)
+    db: Session = SessionLocal()
+    try:
+        data = load_training_arrays(db)
     finally:
         db.close()
+    if data.rows < folds:
+        raise ValueError(f"训练数据只有 {data.rows} 行，不足以做 {folds} 折交叉验证")
+
+    scores = cross_validate(
+        LinearRegression(),
+        data.X,
+        data.y,
+        cv=KFold(n_splits=folds, shuffle=True, random_state=42),
+        scoring=("r2", "neg_mean_absolute_error", "neg_root_mean_squared_error"),
+    )
+    return {
+        "rows": data.rows,
+        "folds": folds,
+        "r2": float(scores["test_r2"].mean()),
+        "mae": float(-scores["test_neg_mean_absolute_error"].mean()),
+        "rmse": float(-scores["test_neg_root_mean_squared_error"].mean()),
+    }
+
+
+def benchmark_models(
+    models: list[str] | None = None,
+    folds: int = 5,
+    jobs: int | None = None,
+) -> dict:
+    from app.services.model_benchmark import run_benchmark
+
+    db: Session = SessionLocal()
+    try:
+        data = load_training_arrays(db)
+    finally:
+        db.close()
+    return run_benchmark(
+        data.X, data.y, models=models, folds=folds, jobs=jobs, snapshot=data.snapshot
+    )
 
 
 def load_model():
-    return joblib.load(MODEL_PATH)
+    version = registry.active_version() or "legacy"
+    return registry.load(version).model
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="训练并发布房价模型")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="只消费 house_changes 中的新增变更，更新统计量并发布",
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="配合 --incremental：丢弃已有统计量，从全表重建",
+    )
+    parser.add_argument(
+        "--benchmark",
+        action="store_true",
+        help="不发布模型，对候选模型做交叉验证 + 超参搜索并输出对比报告",
+    )
+    parser.add_argument("--models", help="候选模型，逗号分隔：linear,ridge,gbr,knn（默认全部）")
+    parser.add_argument("--folds", type=int, default=5, help="交叉验证折数")
+    parser.add_argument("--jobs", type=int, default=None, help="并行进程数（默认 CPU 核数）")
+    parser.add_argument("--output", help="把完整报告写成 JSON 文件")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.benchmark:
+        from app.services.model_benchmark import format_report
+
+        models = [m.strip() for m in args.models.split(",") if m.strip()] if args.models else None
+        report = benchmark_models(models=models, folds=args.folds, jobs=args.jobs)
+        print(format_report(report))
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+    elif args.incremental:
+        from app.services.incremental_training import run_incremental
+
+        version = run_incremental(force_publish=True, rebuild=args.rebuild)
+        if version is None:
+            logger.warning("Another process is updating the incremental state, skipped")
+    else:
+        train_and_save()
+
+
+if __name__ == "__main__":
+    main()
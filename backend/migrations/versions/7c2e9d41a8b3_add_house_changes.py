@@ -0,0 +1,42 @@
+"""add house_changes
+
+Revision ID: 7c2e9d41a8b3
+Revises: 36d21545a5b4
+Create Date: 2026-01-12 10:24:51.302114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e9d41a8b3'
+down_revision: Union[str, Sequence[str], None] = '36d21545a5b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('house_changes',
+    sa.Column('seq', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('house_id', sa.Integer(), nullable=False),
+    sa.Column('source_house_id', sa.String(length=64), nullable=True),
+    sa.Column('op', sa.String(length=8), nullable=False),
+    sa.Column('weight', sa.Integer(), nullable=False),
+    sa.Column('area_sqm', sa.Float(), nullable=False),
+    sa.Column('bedrooms', sa.Integer(), nullable=False),
+    sa.Column('age_years', sa.Integer(), nullable=False),
+    sa.Column('price', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('seq')
+    )
+    op.create_index(op.f('ix_house_changes_house_id'), 'house_changes', ['house_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_house_changes_house_id'), table_name='house_changes')
+    op.drop_table('house_changes')
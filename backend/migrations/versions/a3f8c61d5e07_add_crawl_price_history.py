@@ -0,0 +1,106 @@
+"""add crawl_price_history
+
+Revision ID: a3f8c61d5e07
+Revises: 7c2e9d41a8b3
+Create Date: 2026-10-17 14:05:12.418309
+
+"""
+import hashlib
+import json
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f8c61d5e07'
+down_revision: Union[str, Sequence[str], None] = '7c2e9d41a8b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+TRACKED_COLUMNS = ("total_price_wan", "unit_price", "follow_count", "tags")
+
+
+def _tracked_hash(row) -> str:
+    # 与 app.services.crawl_import.tracked_hash 保持一致（迁移里固定一份，不随业务代码变化）
+    values = [row[name] for name in TRACKED_COLUMNS]
+    raw = json.dumps(values, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('crawl_houses', sa.Column('content_hash', sa.String(length=32), nullable=True))
+    op.create_table('crawl_price_history',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('house_id', sa.String(length=32), nullable=False),
+    sa.Column('crawl_time', sa.DateTime(), nullable=False),
+    sa.Column('total_price_wan', sa.Float(), nullable=True),
+    sa.Column('unit_price', sa.Integer(), nullable=True),
+    sa.Column('follow_count', sa.Integer(), nullable=True),
+    sa.Column('tags', sa.JSON(), nullable=True),
+    sa.Column('content_hash', sa.String(length=32), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_crawl_price_history_house_id_crawl_time', 'crawl_price_history', ['house_id', 'crawl_time'], unique=False)
+
+    # 回填：已有房源的当前价格作为历史的第一行，同时写入 content_hash
+    crawl_houses = sa.table(
+        'crawl_houses',
+        sa.column('id', sa.Integer),
+        sa.column('house_id', sa.String),
+        sa.column('crawl_time', sa.DateTime),
+        sa.column('total_price_wan', sa.Float),
+        sa.column('unit_price', sa.Integer),
+        sa.column('follow_count', sa.Integer),
+        sa.column('tags', sa.JSON),
+        sa.column('content_hash', sa.String),
+    )
+    history = sa.table(
+        'crawl_price_history',
+        sa.column('house_id', sa.String),
+        sa.column('crawl_time', sa.DateTime),
+        sa.column('total_price_wan', sa.Float),
+        sa.column('unit_price', sa.Integer),
+        sa.column('follow_count', sa.Integer),
+        sa.column('tags', sa.JSON),
+        sa.column('content_hash', sa.String),
+    )
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(crawl_houses)
+            .where(crawl_houses.c.id > last_id)
+            .order_by(crawl_houses.c.id)
+            .limit(BATCH_SIZE)
+        ).mappings().all()
+        if not rows:
+            break
+        last_id = rows[-1]['id']
+        hashes = [{'b_id': r['id'], 'content_hash': _tracked_hash(r)} for r in rows]
+        bind.execute(
+            crawl_houses.update()
+            .where(crawl_houses.c.id == sa.bindparam('b_id'))
+            .values(content_hash=sa.bindparam('content_hash')),
+            hashes,
+        )
+        bind.execute(history.insert(), [
+            {
+                'house_id': r['house_id'],
+                'crawl_time': r['crawl_time'] or datetime.now(),
+                **{name: r[name] for name in TRACKED_COLUMNS},
+                'content_hash': h['content_hash'],
+            }
+            for r, h in zip(rows, hashes)
+        ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_crawl_price_history_house_id_crawl_time', table_name='crawl_price_history')
+    op.drop_table('crawl_price_history')
+    op.drop_column('crawl_houses', 'content_hash')
@@ -0,0 +1,53 @@
+"""backfill crawl_houses.is_annotated and index it
+
+Revision ID: b6d92f4e1a38
+Revises: e8c5a0f3b716
+Create Date: 2026-10-17 19:24:51.308162
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d92f4e1a38'
+down_revision: Union[str, Sequence[str], None] = 'e8c5a0f3b716'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 标注流程此前没有写 is_annotated，按 houses.source_house_id 重新计算
+    op.execute(
+        "UPDATE crawl_houses SET is_annotated = CASE WHEN EXISTS ("
+        "SELECT 1 FROM houses WHERE houses.source_house_id = crawl_houses.house_id"
+        ") THEN 1 ELSE 0 END"
+    )
+    op.alter_column(
+        'crawl_houses',
+        'is_annotated',
+        existing_type=sa.Integer(),
+        nullable=False,
+        server_default='0',
+    )
+    op.create_index(
+        'ix_crawl_houses_annotated_crawl_time',
+        'crawl_houses',
+        ['is_annotated', 'crawl_time', 'id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_crawl_houses_annotated_crawl_time', table_name='crawl_houses')
+    op.alter_column(
+        'crawl_houses',
+        'is_annotated',
+        existing_type=sa.Integer(),
+        nullable=True,
+        server_default=None,
+    )
@@ -0,0 +1,61 @@
+"""add crawl_stats_buckets summary table
+
+Revision ID: c57e1d09b2fa
+Revises: b6d92f4e1a38
+Create Date: 2026-10-17 20:02:17.845310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c57e1d09b2fa'
+down_revision: Union[str, Sequence[str], None] = 'b6d92f4e1a38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# 与 app/services/crawl_stats.py 的 METRICS 保持一致：指标 → (列, 桶宽)
+METRICS = (
+    ('unit_price', 'unit_price', 1000),
+    ('total_price', 'total_price_wan', 50),
+    ('area', 'area_sqm', 10),
+    ('build_year', 'build_year', 1),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'crawl_stats_buckets',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('metric', sa.String(length=16), nullable=False),
+        sa.Column('district', sa.String(length=64), nullable=False),
+        sa.Column('layout', sa.String(length=32), nullable=False),
+        sa.Column('bucket', sa.Integer(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('total', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('metric', 'district', 'layout', 'bucket', name='uq_crawl_stats_buckets_key'),
+    )
+
+    # 按现有 crawl_houses 回填；之后由导入增量维护，也可用 app.scripts.rebuild_crawl_stats 重算
+    op.execute(
+        "INSERT INTO crawl_stats_buckets (metric, district, layout, bucket, count, total) "
+        "SELECT 'listing', COALESCE(district, ''), COALESCE(layout, ''), 0, COUNT(*), 0 "
+        "FROM crawl_houses GROUP BY COALESCE(district, ''), COALESCE(layout, '')"
+    )
+    for metric, column, width in METRICS:
+        op.execute(
+            "INSERT INTO crawl_stats_buckets (metric, district, layout, bucket, count, total) "
+            f"SELECT '{metric}', COALESCE(district, ''), COALESCE(layout, ''), FLOOR({column} / {width}), "
+            f"COUNT(*), SUM({column}) FROM crawl_houses WHERE {column} IS NOT NULL "
+            f"GROUP BY COALESCE(district, ''), COALESCE(layout, ''), FLOOR({column} / {width})"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('crawl_stats_buckets')
@@ -0,0 +1,28 @@
+"""add crawl_houses (crawl_time, id) index
+
+Revision ID: d41b7e2a9c15
+Revises: a3f8c61d5e07
+Create Date: 2026-10-17 16:32:40.117583
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41b7e2a9c15'
+down_revision: Union[str, Sequence[str], None] = 'a3f8c61d5e07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_crawl_houses_crawl_time_id', 'crawl_houses', ['crawl_time', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_crawl_houses_crawl_time_id', table_name='crawl_houses')
@@ -0,0 +1,49 @@
+"""add crawl_houses filter / sort indexes
+
+Revision ID: e8c5a0f3b716
+Revises: d41b7e2a9c15
+Create Date: 2026-10-17 18:11:06.540921
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8c5a0f3b716'
+down_revision: Union[str, Sequence[str], None] = 'd41b7e2a9c15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COMPOSITE_INDEXES = (
+    ('ix_crawl_houses_district_crawl_time', ['district', 'crawl_time', 'id']),
+    ('ix_crawl_houses_district_unit_price', ['district', 'unit_price', 'id']),
+    ('ix_crawl_houses_district_total_price', ['district', 'total_price_wan', 'id']),
+    ('ix_crawl_houses_district_area', ['district', 'area_sqm', 'id']),
+    ('ix_crawl_houses_unit_price_id', ['unit_price', 'id']),
+    ('ix_crawl_houses_total_price_id', ['total_price_wan', 'id']),
+    ('ix_crawl_houses_area_id', ['area_sqm', 'id']),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, columns in COMPOSITE_INDEXES:
+        op.create_index(name, 'crawl_houses', columns, unique=False)
+    op.create_index(
+        'ix_crawl_houses_title_community_ft',
+        'crawl_houses',
+        ['title', 'community_name'],
+        unique=False,
+        mysql_prefix='FULLTEXT',
+        mysql_with_parser='ngram',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_crawl_houses_title_community_ft', table_name='crawl_houses')
+    for name, _ in reversed(COMPOSITE_INDEXES):
+        op.drop_index(name, table_name='crawl_houses')
@@ -0,0 +1,145 @@
+from sqlalchemy import func, select
+
+from app.models import CrawlHouse, CrawlPriceHistory, CrawlStatsBucket
+from app.services.crawl_import import import_records, normalize_record
+
+
+def _record(crawl_time: str, unit_price: int, **extra) -> dict:
+    return normalize_record(
+        {
+            "house_id": "107000000001",
+            "district": "浦东",
+            "layout": "2室1厅",
+            "area_sqm": 80,
+            "build_year": 2010,
+            "unit_price": unit_price,
+            "total_price_wan": unit_price * 80 / 10_000,
+            "crawl_time": crawl_time,
+            **extra,
+        }
+    )
+
+
+def _snapshot(db):
+    house = db.execute(select(CrawlHouse)).scalar_one()
+    history = db.execute(select(func.count()).select_from(CrawlPriceHistory)).scalar()
+    buckets = sorted(
+        (b.metric, b.bucket, b.count, b.total)
+        for b in db.execute(select(CrawlStatsBucket)).scalars()
+        if b.count
+    )
+    return (house.unit_price, house.title, house.crawl_time, house.content_hash), history, buckets
+
+
+def test_newer_snapshot_updates_row(db, tmp_path):
+    import_records(db, [_record("2026-01-01 00:00:00", 50_000)], state_dir=tmp_path)
+    stats = import_records(db, [_record("2026-02-01 00:00:00", 48_000)], state_dir=tmp_path)
+
+    (unit_price, *_), history, _ = _snapshot(db)
+    assert unit_price == 48_000
+    assert history == 2
+    assert stats.history == 1
+
+
+def test_reimporting_older_snapshot_leaves_row_unchanged(db, tmp_path):
+    import_records(db, [_record("2026-02-01 00:00:00", 48_000, title="新")], state_dir=tmp_path)
+    before = _snapshot(db)
+
+    stats = import_records(db, [_record("2026-01-01 00:00:00", 50_000, title="旧")], state_dir=tmp_path)
+
+    assert _snapshot(db) == before
+    assert stats.history == 0
+    assert not stats.failed
+
+
+def test_same_crawl_time_is_applied(db, tmp_path):
+    import_records(db, [_record("2026-02-01 00:00:00", 48_000)], state_dir=tmp_path)
+    import_records(db, [_record("2026-02-01 00:00:00", 47_000)], state_dir=tmp_path)
+
+    (unit_price, *_), _, _ = _snapshot(db)
+    assert unit_price == 47_000
+
+
+def test_previous_rows_are_locked_for_update(db, tmp_path):
+    from sqlalchemy import event
+    from sqlalchemy.dialects import mysql
+
+    statements = []
+
+    @event.listens_for(db, "do_orm_execute")
+    def capture(state):
+        if state.is_select:
+            statements.append(state.statement)
+
+    import_records(db, [_record("2026-01-01 00:00:00", 50_000)], state_dir=tmp_path)
+
+    # 读旧值的查询必须和写入在同一事务里加锁，否则并发导入会让统计增量漂移
+    locked = [
+        s for s in statements
+        if "FOR UPDATE" in str(s.compile(dialect=mysql.dialect())) and "crawl_houses" in str(s)
+    ]
+    assert locked
+
+
+def _write_segment(path, records):
+    import json
+
+    path.write_text("".join(json.dumps(r) + "\n" for r in records), encoding="utf-8")
+
+
+def _listing(house_id, unit_price=50_000):
+    return {"house_id": house_id, "unit_price": unit_price, "crawl_time": "2026-01-01 00:00:00"}
+
+
+def test_checkpoint_ignored_after_file_replaced_in_place(db, tmp_path):
+    from app.services.crawl_import import _batch_fingerprint, _save_checkpoint, content_hash, import_files
+    from app.spider.lianjia.storage import SEGMENT_PREFIX
+
+    segment = tmp_path / f"{SEGMENT_PREFIX}0001.ndjson"
+    _write_segment(segment, [_listing("1"), _listing("2")])
+    old = content_hash(segment.read_bytes())
+    # 上次导入在第 1 行后中断
+    state = tmp_path / "state"
+    _save_checkpoint(state, {"fingerprint": _batch_fingerprint([(str(segment.resolve()), old)]), "rows_done": 1})
+
+    _write_segment(segment, [_listing("3"), _listing("4"), _listing("5")])
+    stats = import_files(db, [segment], workers=1, state_dir=state)
+
+    assert stats.resumed == 0
+    assert stats.written == 3
+
+
+def test_checkpoint_resumes_for_same_content(db, tmp_path):
+    from app.services.crawl_import import _batch_fingerprint, _save_checkpoint, content_hash, import_files
+    from app.spider.lianjia.storage import SEGMENT_PREFIX
+
+    segment = tmp_path / f"{SEGMENT_PREFIX}0001.ndjson"
+    _write_segment(segment, [_listing("1"), _listing("2")])
+    digest = content_hash(segment.read_bytes())
+    state = tmp_path / "state"
+    _save_checkpoint(state, {"fingerprint": _batch_fingerprint([(str(segment.resolve()), digest)]), "rows_done": 1})
+
+    stats = import_files(db, [segment], workers=1, state_dir=state)
+    assert (stats.resumed, stats.written) == (1, 1)
+
+
+def test_empty_and_invalid_files_are_recorded_in_manifest(db, tmp_path):
+    from app.services.crawl_import import ImportManifest, import_files
+    from app.spider.lianjia.storage import SEGMENT_PREFIX
+
+    empty = tmp_path / f"{SEGMENT_PREFIX}0001.ndjson"
+    empty.write_text("", encoding="utf-8")
+    invalid = tmp_path / f"{SEGMENT_PREFIX}0002.ndjson"
+    invalid.write_text("{not json\n[1, 2]\n", encoding="utf-8")
+    state = tmp_path / "state"
+
+    first = import_files(db, [empty, invalid], workers=1, state_dir=state)
+    assert first.failed and first.written == 0
+
+    entries = ImportManifest.load(state).entries
+    assert {entries[str(p.resolve())]["records"] for p in (empty, invalid)} == {0}
+
+    # 内容没变：不再重新解析，也不再报同样的坏行
+    second = import_files(db, [empty, invalid], workers=1, state_dir=state)
+    assert second.failed == []
+    assert second.parsed == 0
@@ -0,0 +1,25 @@
+import pytest
+
+from app.services.features import FeatureMatrixBuilder, FeatureRowError, decode_feature_row
+
+
+def test_huge_integer_is_a_row_error():
+    with pytest.raises(FeatureRowError):
+        decode_feature_row([10**400, 2, 5])
+
+
+def test_huge_integer_rejects_only_that_row():
+    builder = FeatureMatrixBuilder(max_rows=10)
+    builder.extend([[80, 2, 5], {"area_sqm": 90, "bedrooms": 10**400, "age_years": 3}, [100, 3, 1]])
+
+    assert builder.total == 3
+    assert builder.indices.tolist() == [0, 2]
+    assert [e["index"] for e in builder.errors] == [1]
+    assert builder.matrix().shape == (2, 3)
+
+
+def test_row_limit_still_overflows():
+    builder = FeatureMatrixBuilder(max_rows=1)
+    builder.add([80, 2, 5])
+    with pytest.raises(OverflowError):
+        builder.add([80, 2, 5])
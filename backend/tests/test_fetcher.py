@@ -0,0 +1,144 @@
+import gzip
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from app.spider.lianjia.fetcher import CookieJar, HttpFetcher, HttpPageSource, PageResult
+from app.spider.lianjia.listing_parser import is_listing_page
+
+FIXTURES = Path(__file__).parent / "fixtures" / "lianjia"
+
+
+def _fixture(name: str) -> bytes:
+    return (FIXTURES / name).read_bytes()
+
+
+# 路径 → (状态码, 额外响应头, 响应体)
+ROUTES = {
+    "/list/": (200, {"Content-Encoding": "gzip"}, gzip.compress(_fixture("list_page.html"))),
+    "/empty/": (200, {}, _fixture("empty_page.html")),
+    "/verify/": (200, {}, _fixture("verify_page.html")),
+    "/soft-block/": (200, {}, _fixture("soft_block_page.html")),
+    "/bad-gzip/": (200, {"Content-Encoding": "gzip"}, b"\x1f\x8b\x08\x00not really gzip"),
+    "/bad-deflate/": (200, {"Content-Encoding": "deflate"}, b"not deflate"),
+    "/moved/": (302, {"Location": "/list/"}, b""),
+    "/login/": (200, {"Set-Cookie": "lianjia_token=abc; Path=/"}, _fixture("empty_page.html")),
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    seen_cookies: list = []
+
+    def do_GET(self):
+        type(self).seen_cookies.append(self.headers.get("Cookie"))
+        status, headers, body = ROUTES.get(self.path, (404, {}, b"not found"))
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _Handler.seen_cookies = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+@pytest.fixture
+def fetcher():
+    f = HttpFetcher(jar=CookieJar(), timeout=5)
+    try:
+        yield f
+    finally:
+        f.close()
+
+
+class _FakeBrowser:
+    """浏览器替身：记录被升级加载的 URL。"""
+
+    def __init__(self, blocked: bool = False):
+        self.blocked = blocked
+        self.loaded: list[str] = []
+
+    def load(self, url: str) -> PageResult:
+        self.loaded.append(url)
+        return PageResult(url=url, blocked=self.blocked, via="browser")
+
+    def cookies(self) -> list[dict]:
+        return [{"name": "from_browser", "value": "1", "domain": "127.0.0.1", "path": "/"}]
+
+
+def test_list_page_over_http_with_keep_alive(server, fetcher):
+    source = HttpPageSource(fetcher)
+    first = source.load(f"{server}/list/")
+    second = source.load(f"{server}/list/")
+
+    assert not first.blocked and first.via == "http"
+    assert [l["house_id"] for l in first.listings][:2] == ["107114407549", "107113791657"]
+    assert first.total_pages == 37
+    assert len(second.listings) == len(first.listings)
+    assert fetcher.reused >= 1
+
+
+def test_redirect_and_cookies(server, fetcher):
+    result = HttpPageSource(fetcher).load(f"{server}/moved/")
+    assert result.url.endswith("/list/") and result.listings
+
+    fetcher.get(f"{server}/login/")
+    fetcher.get(f"{server}/empty/")
+    assert _Handler.seen_cookies[-1] == "lianjia_token=abc"
+
+
+def test_empty_result_page_is_done_not_blocked(server, fetcher):
+    result = HttpPageSource(fetcher).load(f"{server}/empty/")
+    assert not result.blocked
+    assert result.listings == []
+    assert result.total_pages == 0
+
+
+def test_missing_page_is_done(server, fetcher):
+    result = HttpPageSource(fetcher).load(f"{server}/nope/")
+    assert not result.blocked and result.listings == []
+
+
+@pytest.mark.parametrize("path", ["/verify/", "/soft-block/", "/bad-gzip/", "/bad-deflate/"])
+def test_blocked_without_browser(server, fetcher, path):
+    # 验证页、软封禁（200 但没有列表页结构）、损坏的压缩响应都不能当作“已翻完”
+    result = HttpPageSource(fetcher).load(f"{server}{path}")
+    assert result.blocked
+
+
+@pytest.mark.parametrize("path", ["/verify/", "/soft-block/", "/bad-gzip/"])
+def test_escalates_to_browser(server, fetcher, path):
+    browser = _FakeBrowser()
+    source = HttpPageSource(fetcher, browser_factory=lambda: browser)
+
+    result = source.load(f"{server}{path}")
+
+    assert result.via == "browser" and not result.blocked
+    assert browser.loaded == [f"{server}{path}"]
+    assert source.escalations == 1
+    assert fetcher.jar.header_for("http", "127.0.0.1", "/") == "from_browser=1"
+
+
+def test_listing_page_detection():
+    assert is_listing_page(_fixture("list_page.html").decode("utf-8"))
+    assert is_listing_page(_fixture("empty_page.html").decode("utf-8"))
+    assert not is_listing_page(_fixture("soft_block_page.html").decode("utf-8"))
+    assert not is_listing_page(_fixture("verify_page.html").decode("utf-8"))
@@ -0,0 +1,43 @@
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# 路由依赖 auth 模块，导入时要求 SECRET_KEY；测试里覆盖掉鉴权依赖
+os.environ.setdefault("SECRET_KEY", "test-secret")
+
+from app import models  # noqa: E402
+from app.db import get_db  # noqa: E402
+from app.routers import houses  # noqa: E402
+from app.routers.auth import get_current_user  # noqa: E402
+
+
+@pytest.fixture
+def client(db):
+    db.add_all(models.House(area_sqm=50 + i, bedrooms=2, age_years=5, price=100 + i) for i in range(3))
+    db.commit()
+    app = FastAPI()
+    app.include_router(houses.router)
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: None
+    return TestClient(app)
+
+
+def test_list_without_paging_params_is_a_plain_list(client):
+    resp = client.get("/houses")
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert isinstance(body, list)
+    assert [h["id"] for h in body] == [3, 2, 1]
+
+
+def test_list_with_limit_is_paged(client):
+    first = client.get("/houses", params={"limit": 2}).json()
+    assert [h["id"] for h in first["items"]] == [3, 2]
+    assert first["next_cursor"]
+
+    second = client.get("/houses", params={"cursor": first["next_cursor"]}).json()
+    assert [h["id"] for h in second["items"]] == [1]
+    assert second["next_cursor"] is None
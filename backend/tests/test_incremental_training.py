@@ -0,0 +1,43 @@
+import pytest
+
+from app.models import HouseChange
+from app.services import incremental_training, training_jobs
+from app.services.incremental_training import IncrementalState, maybe_retrain
+from app.services.training_jobs import MemoryJobStore, TrainingJobService
+
+
+@pytest.fixture
+def jobs(session_factory, monkeypatch):
+    service = TrainingJobService(store=MemoryJobStore())
+    monkeypatch.setattr(incremental_training, "SessionLocal", session_factory)
+    monkeypatch.setattr(training_jobs, "job_service", service)
+    # 请求进程里不能再直接训练
+    monkeypatch.setattr(incremental_training, "run_incremental", lambda *a, **kw: pytest.fail("trained in request"))
+    return service
+
+
+def _changes(db, count):
+    for i in range(count):
+        db.add(HouseChange(house_id=i + 1, op="create", weight=1, area_sqm=80, bedrooms=2, age_years=5, price=1e6))
+    db.commit()
+
+
+def test_missing_state_schedules_bootstrap_job(jobs, tmp_path):
+    maybe_retrain(threshold=20, state_path=tmp_path / "state.npz")
+    maybe_retrain(threshold=20, state_path=tmp_path / "state.npz")
+
+    queued = jobs.list()
+    assert [(j["kind"], j["params"], j["status"]) for j in queued] == [("incremental", {"auto": True}, "queued")]
+
+
+def test_schedules_only_when_threshold_reached(jobs, db, tmp_path):
+    state_path = tmp_path / "state.npz"
+    IncrementalState.empty().save(state_path)
+
+    _changes(db, 19)
+    maybe_retrain(threshold=20, state_path=state_path)
+    assert jobs.list() == []
+
+    _changes(db, 1)
+    maybe_retrain(threshold=20, state_path=state_path)
+    assert len(jobs.list()) == 1
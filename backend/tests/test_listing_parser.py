@@ -0,0 +1,86 @@
+from pathlib import Path
+
+import pytest
+
+from app.spider.lianjia.listing_parser import (
+    is_verification_html,
+    parse_list_html,
+    parse_total_pages,
+)
+
+FIXTURES = Path(__file__).parent / "fixtures" / "lianjia"
+CRAWL_TIME = "2026-10-17 12:00:00"
+
+
+def _html(name: str) -> str:
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+@pytest.fixture(scope="module")
+def listings():
+    return parse_list_html(_html("list_page.html"), crawl_time=CRAWL_TIME)
+
+
+def test_only_listing_items_are_parsed(listings):
+    assert [l["house_id"] for l in listings] == ["107114407549", "107113791657", "107113210612", None]
+
+
+def test_full_listing_fields(listings):
+    assert listings[0] == {
+        "house_id": "107114407549",
+        "title": "金厦苑双南两房 99年竣工 近园西地铁",
+        "detail_url": "https://sh.lianjia.com/ershoufang/107114407549.html",
+        "community_name": "金厦苑",
+        "community_url": "https://sh.lianjia.com/xiaoqu/5011000013304/",
+        "district": "三林",
+        "layout": "2室1厅",
+        "area_sqm": 70.35,
+        "orientation": "南",
+        "decoration": "精装",
+        "floor": "中楼层(共6层)",
+        "build_year": 1999,
+        "building_type": "板楼",
+        "total_price_wan": 227.3,
+        "total_price_yuan": 2_273_000,
+        "unit_price": 32304,
+        "follow_count": 12,
+        "tags": ["近地铁", "VR房源", "房本满五年"],
+        "cover_image": "https://image1.ljcdn.com/110000-inspection/pc1_abc.jpg.296x216.jpg",
+        "crawl_time": CRAWL_TIME,
+    }
+
+
+def test_cover_image_falls_back_to_src_and_unknown_year(listings):
+    second = listings[1]
+    assert second["cover_image"] == "https://image1.ljcdn.com/110000-inspection/pc1_def.jpg.296x216.jpg"
+    assert second["build_year"] is None
+    assert second["orientation"] == "南 北"
+    assert second["follow_count"] == 0
+    assert second["tags"] == []
+
+
+def test_missing_fields_become_none(listings):
+    partial = listings[2]
+    assert partial["title"] == "一口价房源 中间楼层"
+    assert partial["layout"] == "1室0厅"
+    for name in (
+        "community_name", "community_url", "district", "area_sqm", "floor", "build_year",
+        "total_price_wan", "total_price_yuan", "unit_price", "cover_image",
+    ):
+        assert partial[name] is None, name
+    assert partial["follow_count"] == 0
+    assert partial["tags"] == []
+
+
+def test_pagination_detection():
+    assert parse_total_pages(_html("list_page.html")) == 37
+    assert parse_total_pages(_html("empty_page.html")) == 0
+    assert parse_total_pages(_html("verify_page.html")) is None
+
+
+def test_verification_detection():
+    assert is_verification_html(_html("verify_page.html"))
+    # 列表页脚本里出现 verify 字样也不算验证页
+    assert not is_verification_html(_html("list_page.html"))
+    assert not is_verification_html(_html("empty_page.html"))
+    assert parse_list_html(_html("verify_page.html")) == []
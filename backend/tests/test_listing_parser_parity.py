@@ -0,0 +1,61 @@
+"""
+离线解析（parse_list_html）与逐字段句柄解析（lianjia_spider.parse_house）的一致性：
+用一个只实现 query_selector / inner_text / get_attribute 的句柄替身跑 parse_house，
+两边解析同一个 HTML 夹具，结果应完全一致。
+"""
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from app.spider.lianjia import lianjia_spider  # noqa: E402
+from app.spider.lianjia.listing_parser import _ListingTreeBuilder, _Node, parse_list_html  # noqa: E402
+
+FIXTURES = Path(__file__).parent / "fixtures" / "lianjia"
+CRAWL_TIME = "2026-10-17 12:00:00"
+
+
+def _matches(node: _Node, compound: str) -> bool:
+    tag, *classes = compound.split(".")
+    return (not tag or node.tag == tag) and all(c in node.classes for c in classes)
+
+
+def _select(node: _Node, selector: str) -> list[_Node]:
+    # 只支持后代选择器 + tag.class 复合选择器，够 parse_house 用
+    current = [node]
+    for compound in selector.split():
+        found: list[_Node] = []
+        for parent in current:
+            found.extend(n for n in parent.iter() if _matches(n, compound) and n not in found)
+        current = found
+    return current
+
+
+class FakeHandle:
+    def __init__(self, node: _Node):
+        self.node = node
+
+    def query_selector(self, selector: str):
+        found = _select(self.node, selector)
+        return FakeHandle(found[0]) if found else None
+
+    def query_selector_all(self, selector: str):
+        return [FakeHandle(n) for n in _select(self.node, selector)]
+
+    def inner_text(self) -> str:
+        return self.node.text()
+
+    def get_attribute(self, name: str):
+        return self.node.attrs.get(name)
+
+
+def test_offline_parser_matches_handle_parser(monkeypatch):
+    html = (FIXTURES / "list_page.html").read_text(encoding="utf-8")
+    monkeypatch.setattr(lianjia_spider, "now_str", lambda: CRAWL_TIME)
+
+    builder = _ListingTreeBuilder()
+    builder.feed(html)
+    handles = [FakeHandle(li) for li in builder.listings]
+
+    assert [lianjia_spider.parse_house(h) for h in handles] == parse_list_html(html, crawl_time=CRAWL_TIME)
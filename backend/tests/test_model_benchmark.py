@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from app.services import model_benchmark
+from app.services.model_benchmark import format_report, min_train_size, run_benchmark
+
+
+def _data(n: int):
+    rng = np.random.default_rng(0)
+    X = rng.uniform(20, 150, size=(n, 3))
+    y = X @ np.array([30_000.0, 5_000.0, -1_000.0]) + rng.normal(0, 1_000, n)
+    return X, y
+
+
+def test_min_train_size_matches_largest_test_fold():
+    assert min_train_size(12, 5) == 9
+    assert min_train_size(100, 5) == 80
+
+
+def test_knn_configs_larger_than_train_fold_are_skipped():
+    X, y = _data(12)
+
+    report = run_benchmark(X, y, models=["knn"], folds=5, jobs=1)
+
+    ran = {r["params"]["n_neighbors"] for r in report["results"]}
+    skipped = {e["params"]["n_neighbors"] for e in report["errors"]}
+    assert ran == {5}
+    assert skipped == {10, 20}
+    assert "skipped knn" in format_report(report)
+
+
+def test_failing_config_is_recorded_without_aborting(monkeypatch):
+    monkeypatch.setitem(model_benchmark.PARAM_GRIDS, "ridge", {"alpha": [1.0, -1.0]})
+    X, y = _data(40)
+
+    report = run_benchmark(X, y, models=["linear", "ridge"], folds=3, jobs=1)
+
+    assert {(r["model"], r["params"].get("alpha")) for r in report["results"]} == {
+        ("linear", None),
+        ("ridge", 1.0),
+    }
+    assert [(e["model"], e["params"]) for e in report["errors"]] == [("ridge", {"alpha": -1.0})]
+
+
+def test_too_few_rows_still_rejected():
+    X, y = _data(3)
+    with pytest.raises(ValueError):
+        run_benchmark(X, y, models=["linear"], folds=5, jobs=1)
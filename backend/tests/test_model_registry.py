@@ -0,0 +1,65 @@
+import numpy as np
+
+from app.services import model_registry
+from app.services.linear_model import LinearModel
+from app.services.model_registry import ModelRegistry
+from app.services.prediction_grid import GRID_FILE
+
+
+def _model() -> LinearModel:
+    return LinearModel(intercept=100.0, coef=[5.0, 20.0, -1.0])
+
+
+def test_publish_persists_grid_and_load_maps_it(tmp_path, monkeypatch):
+    registry = ModelRegistry(tmp_path, use_grid=True)
+    version = registry.publish(_model())
+    assert (tmp_path / version / GRID_FILE).exists()
+    assert registry.metadata(version)["grid"]["area_step"] > 0
+
+    # 服务端加载时不再调用 predict 建表
+    def fail(*args, **kwargs):
+        raise AssertionError("grid rebuilt on load")
+
+    monkeypatch.setattr(model_registry, "build_grid", fail)
+    serving = registry.load(version)
+    assert isinstance(serving.grid.values, np.memmap)
+    assert serving.predict_one((80.0, 2.0, 10.0)) == _model().predict_one((80.0, 2.0, 10.0))
+    assert serving.grid.hits == 1
+
+
+def test_version_without_grid_file_builds_on_load(tmp_path):
+    registry = ModelRegistry(tmp_path, use_grid=True)
+    version = registry.publish(_model())
+    (tmp_path / version / GRID_FILE).unlink()
+
+    serving = registry.load(version)
+    assert serving.grid is not None
+    assert not isinstance(serving.grid.values, np.memmap)
+
+
+def test_publish_skips_grid_when_disabled(tmp_path):
+    registry = ModelRegistry(tmp_path, use_grid=False)
+    version = registry.publish(_model())
+    assert not (tmp_path / version / GRID_FILE).exists()
+    assert "grid" not in registry.metadata(version)
+
+
+def test_grid_with_different_range_is_rebuilt(tmp_path, monkeypatch):
+    from app.services import prediction_grid
+    from app.services.prediction_grid import GridSpec
+
+    registry = ModelRegistry(tmp_path, use_grid=True)
+    monkeypatch.setattr(model_registry, "build_grid", lambda model: prediction_grid.build_grid(model, GridSpec(area_max=50)))
+    version = registry.publish(_model())
+    monkeypatch.setattr(model_registry, "build_grid", prediction_grid.build_grid)
+
+    serving = registry.load(version)
+    assert serving.grid.spec.area_max == GridSpec().area_max
+    assert not isinstance(serving.grid.values, np.memmap)
+
+
+def test_non_finite_area_falls_back_to_model(tmp_path):
+    registry = ModelRegistry(tmp_path, use_grid=True)
+    serving = registry.load(registry.publish(_model()))
+    assert serving.grid.lookup_one((float("inf"), 2.0, 10.0)) is None
+    assert serving.grid.lookup_one((float("nan"), 2.0, 10.0)) is None
@@ -0,0 +1,33 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import predict
+from app.services.linear_model import LinearModel
+from app.services.model_registry import ServingModel
+
+
+@pytest.fixture
+def client(monkeypatch):
+    serving = ServingModel(version="test", model=LinearModel(intercept=100.0, coef=[5.0, 20.0, -1.0]))
+    monkeypatch.setattr(predict.registry, "current", lambda: serving)
+    monkeypatch.setattr(predict, "prediction_cache", None)
+    app = FastAPI()
+    app.include_router(predict.router)
+    return TestClient(app)
+
+
+def test_batch_non_finite_prediction_is_a_row_error(client):
+    resp = client.post("/predict/batch", json=[[80, 3, 5], [1e308, 3, 5], {"area_sqm": "x"}])
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["predictions"][0] == pytest.approx(100 + 5 * 80 + 20 * 3 - 5)
+    assert body["predictions"][1:] == [None, None]
+    assert [e["index"] for e in body["errors"]] == [1, 2]
+    assert body["failed"] == 2
+
+
+def test_single_non_finite_prediction_is_rejected(client):
+    resp = client.post("/predict", json={"area_sqm": 1e308, "bedrooms": 3, "age_years": 5})
+    assert resp.status_code == 422
@@ -0,0 +1,79 @@
+import asyncio
+
+from app.services.prediction_cache import MemoryPredictionCache, RedisPredictionCache
+
+
+class FakeAsyncRedis:
+    def __init__(self, fail: bool = False):
+        self.data: dict[str, str] = {}
+        self.fail = fail
+        self.calls = 0
+
+    async def get(self, key):
+        self.calls += 1
+        if self.fail:
+            raise TimeoutError("redis timeout")
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.calls += 1
+        if self.fail:
+            raise TimeoutError("redis timeout")
+        self.data[key] = value
+
+
+def test_redis_cache_round_trip():
+    cache = RedisPredictionCache(FakeAsyncRedis())
+
+    async def run():
+        assert await cache.get("v1", (80.0, 2, 10)) is None
+        await cache.set("v1", (80.0, 2, 10), 1234.5)
+        return await cache.get("v1", (80.0, 2, 10))
+
+    assert asyncio.run(run()) == 1234.5
+    assert cache.stats()["hits"] == 1
+
+
+def test_redis_errors_fall_back_and_bypass():
+    client = FakeAsyncRedis(fail=True)
+    cache = RedisPredictionCache(client, retry_after=60)
+
+    async def run():
+        await cache.set("v1", (80.0, 2, 10), 1.0)
+        # 出错后的重试窗口内不再访问 Redis
+        return await cache.get("v1", (80.0, 2, 10))
+
+    assert asyncio.run(run()) is None
+    assert client.calls == 1
+    stats = cache.stats()
+    assert stats["errors"] == 1 and stats["bypassed"] is True
+
+
+def test_memory_cache_flushes_once_per_swap():
+    cache = MemoryPredictionCache(max_size=10)
+    key = (80.0, 2, 10)
+
+    async def run():
+        await cache.set("v1", key, 1.0)
+        cache.on_model_swap("v2")
+        # 切换期间新旧版本的请求交替：旧版本只是未命中、不写入，不会再清空
+        await cache.set("v2", key, 2.0)
+        assert await cache.get("v1", key) is None
+        await cache.set("v1", key, 1.0)
+        assert await cache.get("v2", key) == 2.0
+
+    asyncio.run(run())
+    assert cache.stats()["flushes"] == 1
+
+
+def test_registry_notifies_swap_listeners(tmp_path):
+    from app.services.linear_model import LinearModel
+    from app.services.model_registry import ModelRegistry
+
+    registry = ModelRegistry(tmp_path, use_grid=False)
+    cache = MemoryPredictionCache()
+    registry.add_swap_listener(cache.on_model_swap)
+    version = registry.publish(LinearModel(intercept=1.0, coef=[1.0, 1.0, 1.0]))
+
+    assert registry.refresh()
+    assert cache.stats()["model_version"] == version
@@ -0,0 +1,73 @@
+from app.spider.lianjia import scheduler
+from app.spider.lianjia.fetcher import PageResult
+from app.spider.lianjia.scheduler import CrawlQueue
+
+
+def _queue(tmp_path) -> CrawlQueue:
+    queue = CrawlQueue(tmp_path / "queue.sqlite3")
+    queue.seed("sh", ["pudong"], ["p1"])
+    return queue
+
+
+def _row(queue, shard_id="sh/pudong/p1"):
+    from contextlib import closing
+
+    with closing(queue._connect()) as conn:
+        return dict(conn.execute("SELECT * FROM shards WHERE id = ?", (shard_id,)).fetchone())
+
+
+def test_expired_lease_cannot_checkpoint_or_finish(tmp_path, monkeypatch):
+    queue = _queue(tmp_path)
+    first = queue.claim("a")
+    assert queue.checkpoint(first["id"], first["lease"], 2, 10, 30)
+
+    # a 的租约过期，b 接手
+    monkeypatch.setattr(scheduler, "LEASE_SECONDS", -1)
+    second = queue.claim("b")
+    assert second["id"] == first["id"] and second["lease"] != first["lease"]
+
+    assert not queue.checkpoint(first["id"], first["lease"], 5, 10, 99)
+    assert not queue.finish(first["id"], first["lease"], "done")
+    row = _row(queue)
+    assert (row["status"], row["next_page"], row["listings"], row["worker"]) == ("running", 2, 30, "b")
+
+    assert queue.finish(second["id"], second["lease"], "done")
+    assert _row(queue)["status"] == "done"
+
+
+def test_crawl_stops_when_lease_is_lost(tmp_path, monkeypatch):
+    queue = _queue(tmp_path)
+    shard = queue.claim("a")
+    monkeypatch.setattr(scheduler, "LEASE_SECONDS", -1)
+    queue.claim("b")
+
+    class Source:
+        loads = 0
+
+        def load(self, url):
+            self.loads += 1
+            return PageResult(url=url, blocked=False, listings=[{"house_id": "1"}], total_pages=5)
+
+    class Writer:
+        def write(self, data):
+            return True
+
+        def flush(self):
+            pass
+
+    source = Source()
+    assert scheduler._crawl_shard(source, queue, shard, Writer(), min_interval=0) == "lost"
+    assert source.loads == 1
+    assert _row(queue)["next_page"] == 1
+
+
+def test_requeue_leaves_running_shards(tmp_path):
+    queue = _queue(tmp_path)
+    queue.seed("sh", ["minhang"], ["p1"])
+    blocked = queue.claim("a")
+    queue.finish(blocked["id"], blocked["lease"], "blocked")
+    running = queue.claim("b")
+
+    assert queue.requeue(["blocked", "running"]) == 1
+    assert _row(queue, blocked["id"])["status"] == "pending"
+    assert _row(queue, running["id"])["status"] == "running"
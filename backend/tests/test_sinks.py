@@ -0,0 +1,50 @@
+from sqlalchemy import func, select
+
+from app.models import CrawlHouse, CrawlPriceHistory
+from app.spider.lianjia.seen_index import SeenIndex
+from app.spider.lianjia.sinks import DbSink
+
+
+def _crawl(session_factory, seen, tmp_path, crawl_time, unit_price):
+    with DbSink(session_factory=session_factory, seen=seen, fallback_dir=tmp_path / "fallback") as sink:
+        assert sink.write({"house_id": "107000000001", "unit_price": unit_price, "crawl_time": crawl_time})
+
+
+def test_db_sink_upserts_listings_already_in_seen_index(session_factory, db, tmp_path):
+    seen = SeenIndex.load(tmp_path / "seen.npy")
+
+    _crawl(session_factory, seen, tmp_path, "2026-01-01 00:00:00", 50_000)
+    _crawl(session_factory, seen, tmp_path, "2026-01-02 00:00:00", 48_000)
+
+    assert db.execute(select(CrawlHouse.unit_price)).scalar_one() == 48_000
+    assert db.execute(select(func.count()).select_from(CrawlPriceHistory)).scalar() == 2
+    assert "107000000001" in seen
+
+
+def test_file_sink_writes_recrawls_by_default(db, tmp_path, monkeypatch):
+    from app.services.crawl_import import import_files
+    from app.spider.lianjia import sinks
+    from app.spider.lianjia.storage import list_segments
+
+    seen = SeenIndex.load(tmp_path / "seen.npy")
+    monkeypatch.setattr(sinks, "load_or_seed", lambda: seen)
+    out_dir = tmp_path / "segments"
+
+    for crawl_time, unit_price in (("2026-01-01 00:00:00", 50_000), ("2026-01-02 00:00:00", 48_000)):
+        with sinks.open_sink("ndjson", out_dir=out_dir) as sink:
+            assert sink.write({"house_id": "107000000001", "unit_price": unit_price, "crawl_time": crawl_time})
+        import_files(db, list_segments(out_dir), workers=1, state_dir=tmp_path / "state")
+
+    assert db.execute(select(CrawlHouse.unit_price)).scalar_one() == 48_000
+    assert db.execute(select(func.count()).select_from(CrawlPriceHistory)).scalar() == 2
+
+
+def test_file_sink_skip_seen_is_opt_in(tmp_path, monkeypatch):
+    from app.spider.lianjia import sinks
+
+    seen = SeenIndex.load(tmp_path / "seen.npy")
+    monkeypatch.setattr(sinks, "load_or_seed", lambda: seen)
+    for _ in range(2):
+        with sinks.open_sink("ndjson", out_dir=tmp_path / "segments", skip_seen=True) as sink:
+            sink.write({"house_id": "107000000001", "unit_price": 50_000})
+    assert sink.skipped == 1
@@ -0,0 +1,201 @@
+import pytest
+
+from app.services.training_jobs import MemoryJobStore, RedisJobStore, TrainingJobService
+
+
+class FakeRedis:
+    """RedisJobStore 用到的最小子集：字符串、列表、有序集合、pipeline / WATCH / MULTI。"""
+
+    def __init__(self):
+        self.strings: dict[str, bytes] = {}
+        self.zsets: dict[str, dict[str, float]] = {}
+        self.versions: dict[str, int] = {}
+        self.lists: dict[str, list[bytes]] = {}
+        # 在 WATCH 之后、EXEC 之前执行一次，模拟其它进程的并发写入
+        self.interleave = None
+
+    def _touch(self, key):
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    def set(self, key, value, ex=None):
+        self.strings[key] = value if isinstance(value, bytes) else str(value).encode()
+        self._touch(key)
+
+    def get(self, key):
+        return self.strings.get(key)
+
+    def exists(self, key):
+        return int(key in self.strings)
+
+    def delete(self, *keys):
+        for key in keys:
+            if self.strings.pop(key, None) is not None:
+                self._touch(key)
+
+    def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    def zrem(self, key, *members):
+        for m in members:
+            self.zsets.get(key, {}).pop(m, None)
+
+    def zcard(self, key):
+        return len(self.zsets.get(key, {}))
+
+    def zrange(self, key, start, end):
+        items = sorted(self.zsets.get(key, {}).items(), key=lambda kv: kv[1])
+        return [m.encode() for m, _ in items[start : end + 1]]
+
+    def zrevrange(self, key, start, end):
+        items = sorted(self.zsets.get(key, {}).items(), key=lambda kv: kv[1], reverse=True)
+        return [m.encode() for m, _ in items[start : end + 1]]
+
+    def mget(self, keys):
+        return [self.strings.get(k) for k in keys]
+
+    def rpush(self, key, value):
+        self.lists.setdefault(key, []).append(value.encode())
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, r: FakeRedis):
+        self.r = r
+        self.ops = []
+        self.watched: dict[str, int] = {}
+        self.buffering = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.ops, self.watched = [], {}
+
+    def watch(self, key):
+        self.watched[key] = self.r.versions.get(key, 0)
+        self.buffering = False
+
+    def unwatch(self):
+        self.watched = {}
+
+    def multi(self):
+        self.buffering = True
+        if self.r.interleave:
+            action, self.r.interleave = self.r.interleave, None
+            action()
+
+    def __getattr__(self, name):
+        method = getattr(self.r, name)
+        if not self.buffering:
+            return method
+        return lambda *a, **kw: self.ops.append((method, a, kw))
+
+    def execute(self):
+        from redis.exceptions import WatchError
+
+        ops, self.ops = self.ops, []
+        if any(self.r.versions.get(k, 0) != v for k, v in self.watched.items()):
+            self.watched = {}
+            raise WatchError()
+        self.watched = {}
+        return [method(*a, **kw) for method, a, kw in ops]
+
+
+@pytest.fixture(params=["memory", "redis"])
+def store(request):
+    if request.param == "memory":
+        return MemoryJobStore(history=3)
+    pytest.importorskip("redis")
+    return RedisJobStore(FakeRedis(), history=3)
+
+
+def test_pruning_keeps_unfinished_jobs(store):
+    service = TrainingJobService(store=store)
+    queued = [service.submit("full") for _ in range(5)]
+    # 全部未结束：超出 history 也不能淘汰
+    assert all(store.get(job["id"]) for job in queued)
+
+    service.cancel(queued[0]["id"])
+    service.cancel(queued[1]["id"])
+    service.submit("full")
+    assert store.get(queued[0]["id"]) is None
+    assert store.get(queued[1]["id"]) is None
+    assert all(store.get(job["id"]) for job in queued[2:])
+
+
+def test_cancel_and_start_are_exclusive(store):
+    service = TrainingJobService(store=store)
+    job = service.submit("full")
+
+    cancelled = service.cancel(job["id"])
+    assert cancelled["status"] == "cancelled"
+    assert store.transition(job["id"], frozenset({"queued"}), status="running") is None
+    assert store.get(job["id"])["status"] == "cancelled"
+
+
+def test_finish_does_not_overwrite_cancelled(store):
+    service = TrainingJobService(store=store)
+    job = service.submit("full")
+    running = store.transition(job["id"], frozenset({"queued"}), status="running")
+    assert running is not None
+
+    # 运行中的任务：cancel 只置标记，不改记录
+    assert service.cancel(job["id"])["status"] == "running"
+    assert store.cancel_requested(job["id"])
+
+    service._finish(running, status="cancelled", error="任务已取消")
+    service._finish(running, status="succeeded")
+    assert store.get(job["id"])["status"] == "cancelled"
+
+
+def test_redis_transition_retries_after_concurrent_write():
+    pytest.importorskip("redis")
+    r = FakeRedis()
+    store = RedisJobStore(r)
+    job = TrainingJobService(store=store).submit("full")
+
+    # 在 WATCH 与 EXEC 之间被另一进程取消：重读后发现状态已变，放弃本次启动
+    key = RedisJobStore.JOB_KEY.format(job["id"])
+    r.interleave = lambda: r.set(key, r.get(key).replace(b'"queued"', b'"cancelled"'))
+    assert store.transition(job["id"], frozenset({"queued"}), status="running") is None
+    assert store.get(job["id"])["status"] == "cancelled"
+
+
+def test_cancel_flag_cleared_when_job_finishes(store):
+    service = TrainingJobService(store=store)
+    queued = service.submit("full")
+    service.cancel(queued["id"])
+    assert not store.cancel_requested(queued["id"])
+
+    job = service.submit("full")
+    running = store.transition(job["id"], frozenset({"queued"}), status="running")
+    service.cancel(job["id"])
+    assert store.cancel_requested(job["id"])
+    service._finish(running, status="cancelled")
+    assert not store.cancel_requested(job["id"])
+    if isinstance(store, MemoryJobStore):
+        assert store._cancel == set()
+
+
+def test_stale_running_jobs_are_failed(store):
+    import time
+
+    service = TrainingJobService(store=store)
+    stale = service.submit("full")
+    live = service.submit("full")
+    store.transition(stale["id"], frozenset({"queued"}), status="running", owner="old:1", heartbeat_ts=time.time() - 600)
+    store.transition(live["id"], frozenset({"queued"}), status="running", owner="new:2", heartbeat_ts=time.time())
+
+    assert service.recover_stale(stale_after=120) == 1
+    assert store.get(stale["id"])["status"] == "failed"
+    assert store.get(live["id"])["status"] == "running"
+
+
+def test_memory_store_refused_with_multiple_web_workers():
+    from app.services.training_jobs import create_job_store
+
+    with pytest.raises(RuntimeError):
+        create_job_store("memory", web_workers=2)
+    assert isinstance(create_job_store("memory", web_workers=1), MemoryJobStore)
@@ -32,11 +32,19 @@ interface House extends HouseFormValues {
   id: number;
 }
 
+interface HousePage {
+  items: House[];
+  next_cursor: string | null;
+}
+
+const PAGE_SIZE = 50;
+
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL;
 
 const HouseCrudPage: React.FC = () => {
   const [houseForm] = Form.useForm<HouseFormValues>();
   const [houses, setHouses] = useState<House[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [housesLoading, setHousesLoading] = useState(false);
   const [savingHouse, setSavingHouse] = useState(false);
   const [editingHouse, setEditingHouse] = useState<House | null>(null);
@@ -49,15 +57,19 @@ const HouseCrudPage: React.FC = () => {
     };
   };
 
-  const fetchHouses = useCallback(async () => {
+  // cursor 为空时重新加载第一页，否则在列表末尾追加下一页
+  const fetchHouses = useCallback(async (cursor?: string) => {
     try {
       setHousesLoading(true);
-      const res = await fetch(`${API_BASE_URL}/houses`, {
+      const params = new URLSearchParams({ limit: String(PAGE_SIZE) });
+      if (cursor) params.set("cursor", cursor);
+      const res = await fetch(`${API_BASE_URL}/houses?${params}`, {
         headers: buildAuthHeaders(),
       });
       if (!res.ok) throw new Error(`获取房源列表失败：${res.status}`);
-      const data: House[] = await res.json();
-      setHouses(data);
+      const data: HousePage = await res.json();
+      setHouses((prev) => (cursor ? [...prev, ...data.items] : data.items));
+      setNextCursor(data.next_cursor);
     } catch (error: unknown) {
       messageApi.error(getErrorMessage(error, "获取房源列表失败"));
     } finally {
@@ -282,7 +294,7 @@ const HouseCrudPage: React.FC = () => {
         title={
           <SpaceBetween>
             <span>当前房源列表</span>
-            <Button size="small" onClick={fetchHouses} loading={housesLoading}>
+            <Button size="small" onClick={() => fetchHouses()} loading={housesLoading}>
               刷新
             </Button>
           </SpaceBetween>
@@ -296,6 +308,13 @@ const HouseCrudPage: React.FC = () => {
           pagination={{ pageSize: 8 }}
           size="small"
         />
+        {nextCursor && (
+          <div style={{ textAlign: "center", marginTop: 12 }}>
+            <Button onClick={() => fetchHouses(nextCursor)} loading={housesLoading}>
+              加载更多
+            </Button>
+          </div>
+        )}
         {houses.length === 0 && !housesLoading && (
           <Text type="secondary">
             暂无房源，可以先通过上面的表单新增一条。
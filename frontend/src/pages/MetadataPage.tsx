@@ -11,12 +11,15 @@ import {
   message,
   Divider,
   Space,
+  Input,
+  Select,
 } from "antd";
 import { getErrorMessage } from "../utils/error";
 
 const { Title, Text } = Typography;
 
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL;
+const PAGE_SIZE = 50;
 
 /* =====================
    类型定义
@@ -33,8 +36,37 @@ interface CrawlHouse {
   district: string;
   cover_image: string;
   crawl_time: string;
+  annotated: boolean;
 }
 
+interface CrawlHousePage {
+  items: CrawlHouse[];
+  next_cursor: string | null;
+}
+
+interface CrawlHouseFilters {
+  district?: string;
+  min_price?: number;
+  max_price?: number;
+  q?: string;
+  annotated?: boolean;
+  sort: string;
+}
+
+const SORT_OPTIONS = [
+  { value: "crawl_time:desc", label: "最新抓取" },
+  { value: "total_price:asc", label: "总价从低到高" },
+  { value: "total_price:desc", label: "总价从高到低" },
+  { value: "unit_price:asc", label: "单价从低到高" },
+  { value: "area:desc", label: "面积从大到小" },
+];
+
+const ANNOTATED_OPTIONS = [
+  { value: "all", label: "全部" },
+  { value: "false", label: "待标注" },
+  { value: "true", label: "已标注" },
+];
+
 interface AnnotationForm {
   area_sqm: number;
   bedrooms: number;
@@ -46,8 +78,8 @@ interface AnnotationForm {
    工具函数
 ===================== */
 
-function parseBedrooms(layout: string): number {
-  const match = layout.match(/(\d+)室/);
+function parseBedrooms(layout: string | null): number {
+  const match = (layout || "").match(/(\d+)室/);
   return match ? Number(match[1]) : 0;
 }
 
@@ -61,7 +93,8 @@ function calcAge(buildYear: number): number {
 
 const MetadataPage: React.FC = () => {
   const [houses, setHouses] = useState<CrawlHouse[]>([]);
-  const [annotatedIds, setAnnotatedIds] = useState<Set<string>>(new Set());
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [filters, setFilters] = useState<CrawlHouseFilters>({ sort: "crawl_time:desc" });
   const [loading, setLoading] = useState(false);
 
   const [selected, setSelected] = useState<CrawlHouse | null>(null);
@@ -74,35 +107,37 @@ const MetadataPage: React.FC = () => {
      数据加载
   ===================== */
 
-  const fetchHouses = useCallback(async () => {
+  // cursor 为空时按当前筛选条件重新加载第一页，否则追加下一页；筛选和排序都在服务端完成
+  const fetchHouses = useCallback(async (cursor?: string) => {
     try {
       setLoading(true);
-      const res = await fetch(`${API_BASE_URL}/crawl-houses`);
+      const [sort, order] = filters.sort.split(":");
+      const params = new URLSearchParams({ limit: String(PAGE_SIZE), sort, order });
+      if (filters.district) params.set("district", filters.district);
+      if (filters.min_price != null) params.set("min_price", String(filters.min_price));
+      if (filters.max_price != null) params.set("max_price", String(filters.max_price));
+      if (filters.q) params.set("q", filters.q);
+      if (filters.annotated != null) params.set("annotated", String(filters.annotated));
+      if (cursor) params.set("cursor", cursor);
+      const res = await fetch(`${API_BASE_URL}/crawl-houses?${params}`);
       if (!res.ok) throw new Error();
-      const data = await res.json();
-      setHouses(Array.isArray(data) ? data : []);
+      const data: CrawlHousePage = await res.json();
+      const items = Array.isArray(data.items) ? data.items : [];
+      setHouses((prev) => (cursor ? [...prev, ...items] : items));
+      setNextCursor(data.next_cursor);
     } catch (error: unknown) {
       messageApi.error(getErrorMessage(error, "获取爬虫房源失败"));
-      setHouses([]);
+      if (!cursor) setHouses([]);
     } finally {
       setLoading(false);
     }
-  }, [messageApi]);
+  }, [messageApi, filters]);
 
-  const fetchAnnotatedIds = async () => {
-    try {
-      const res = await fetch(`${API_BASE_URL}/annotations/ids`);
-      if (!res.ok) throw new Error();
-      const ids: string[] = await res.json();
-      setAnnotatedIds(new Set(ids));
-    } catch {
-      console.warn("获取标注状态失败");
-    }
-  };
+  const updateFilters = (patch: Partial<CrawlHouseFilters>) =>
+    setFilters((prev) => ({ ...prev, ...patch }));
 
   useEffect(() => {
     fetchHouses();
-    fetchAnnotatedIds();
   }, [fetchHouses]);
 
   /* =====================
@@ -151,8 +186,12 @@ const MetadataPage: React.FC = () => {
       setSelected(null);
       form.resetFields();
 
-      // 🔥 关键：刷新标注状态
-      fetchAnnotatedIds();
+      // 🔥 关键：列表里的 annotated 由服务端返回，这里只就地更新这一条
+      setHouses((prev) =>
+        filters.annotated === false
+          ? prev.filter((h) => h.house_id !== selected.house_id)
+          : prev.map((h) => (h.house_id === selected.house_id ? { ...h, annotated: true } : h)),
+      );
     } catch {
       messageApi.error("标注失败");
     }
@@ -171,12 +210,61 @@ const MetadataPage: React.FC = () => {
         将真实爬虫房源转化为模型可训练的数据样本（只读原始数据）
       </Text>
 
+      <Space wrap style={{ marginTop: 16 }}>
+        <Input
+          allowClear
+          placeholder="区域"
+          style={{ width: 120 }}
+          onPressEnter={(e) => updateFilters({ district: e.currentTarget.value || undefined })}
+          onChange={(e) => !e.target.value && updateFilters({ district: undefined })}
+        />
+        <InputNumber
+          min={0}
+          placeholder="最低总价(万)"
+          style={{ width: 130 }}
+          onChange={(v) => updateFilters({ min_price: v ?? undefined })}
+        />
+        <InputNumber
+          min={0}
+          placeholder="最高总价(万)"
+          style={{ width: 130 }}
+          onChange={(v) => updateFilters({ max_price: v ?? undefined })}
+        />
+        <Input.Search
+          allowClear
+          placeholder="标题 / 小区关键字"
+          style={{ width: 220 }}
+          onSearch={(v) => updateFilters({ q: v.trim() || undefined })}
+        />
+        <Select
+          value={filters.annotated == null ? "all" : String(filters.annotated)}
+          options={ANNOTATED_OPTIONS}
+          style={{ width: 110 }}
+          onChange={(v) => updateFilters({ annotated: v === "all" ? undefined : v === "true" })}
+        />
+        <Select
+          value={filters.sort}
+          options={SORT_OPTIONS}
+          style={{ width: 150 }}
+          onChange={(v) => updateFilters({ sort: v })}
+        />
+      </Space>
+
       <List
         loading={loading}
         style={{ marginTop: 16 }}
         dataSource={houses}
+        loadMore={
+          nextCursor && (
+            <div style={{ textAlign: "center", margin: "12px 0" }}>
+              <Button onClick={() => fetchHouses(nextCursor)} loading={loading}>
+                加载更多
+              </Button>
+            </div>
+          )
+        }
         renderItem={(item) => {
-          const annotated = annotatedIds.has(item.house_id);
+          const annotated = item.annotated;
 
           return (
             <List.Item
@@ -36,24 +36,47 @@ interface House {
   unit_price: number;
 }
 
+interface StatsSummary {
+  district?: string;
+  count: number;
+  avg_unit_price: number | null;
+  median_unit_price: number | null;
+  avg_total_price_wan: number | null;
+  avg_area_sqm: number | null;
+}
+
+interface Histogram {
+  metric: string;
+  width: number;
+  count: number;
+  buckets: { start: number; end: number; count: number }[];
+}
+
+type HistogramMetric = "total_price" | "unit_price" | "area" | "build_year";
+const HISTOGRAM_METRICS: HistogramMetric[] = ["total_price", "unit_price", "area", "build_year"];
+
+// 统计卡片和分布图来自 /stats（全量汇总表）；相关性和散点图仍基于最新抓取的一页样本（接口单页上限 500）
+const SAMPLE_SIZE = 500;
+
 /* ================= 工具函数 ================= */
 
 const formatWan = (v: number) => `${(v / 10000).toFixed(0)}万`;
 
-const binHistogram = (data: number[], binCount = 10) => {
-  if (!data.length) return [];
-  const min = Math.min(...data);
-  const max = Math.max(...data);
-  const step = (max - min) / binCount;
-
-  return Array.from({ length: binCount }, (_, i) => {
-    const low = min + i * step;
-    const high = min + (i + 1) * step;
-    return {
-      range: `${Math.round(low)}~${Math.round(high)}`,
-      count: data.filter(v => v >= low && v < high).length,
-    };
-  });
+// 服务端的固定宽度桶按 mergeCount 个合并成一根柱子，避免柱子过多
+const toBars = (hist: Histogram | undefined, mergeCount = 1) => {
+  if (!hist) return [];
+  const bars: { range: string; count: number }[] = [];
+  let current: { low: number; high: number; count: number } | null = null;
+  for (const b of hist.buckets) {
+    const low = Math.floor(b.start / (hist.width * mergeCount)) * hist.width * mergeCount;
+    if (!current || current.low !== low) {
+      if (current) bars.push({ range: `${current.low}~${current.high}`, count: current.count });
+      current = { low, high: low + hist.width * mergeCount, count: 0 };
+    }
+    current.count += b.count;
+  }
+  if (current) bars.push({ range: `${current.low}~${current.high}`, count: current.count });
+  return bars;
 };
 
 const pearson = (x: number[], y: number[]) => {
@@ -78,17 +101,31 @@ const cardStyle: React.CSSProperties = {
 
 const VisualizationPage: React.FC = () => {
   const [houses, setHouses] = useState<House[]>([]);
+  const [summary, setSummary] = useState<StatsSummary | null>(null);
+  const [districts, setDistricts] = useState<StatsSummary[]>([]);
+  const [histograms, setHistograms] = useState<Partial<Record<HistogramMetric, Histogram>>>({});
   const [loading, setLoading] = useState(false);
   const [messageApi, contextHolder] = message.useMessage();
 
   const fetchData = useCallback(async () => {
     try {
       setLoading(true);
-      const res = await fetch(`${API_BASE_URL}/crawl-houses`, {
-        headers: { Authorization: `Bearer ${getToken()}` },
-      });
-      if (!res.ok) throw new Error("获取房源失败");
-      setHouses(await res.json());
+      const headers = { Authorization: `Bearer ${getToken()}` };
+      const getJson = async <T,>(path: string): Promise<T> => {
+        const res = await fetch(`${API_BASE_URL}${path}`, { headers });
+        if (!res.ok) throw new Error("获取统计数据失败");
+        return res.json();
+      };
+      const [sample, overall, byDistrict, ...hists] = await Promise.all([
+        getJson<{ items: House[] }>(`/crawl-houses?limit=${SAMPLE_SIZE}`),
+        getJson<StatsSummary[]>("/stats/summary"),
+        getJson<StatsSummary[]>("/stats/summary?group_by=district"),
+        ...HISTOGRAM_METRICS.map(m => getJson<Histogram>(`/stats/histogram/${m}`)),
+      ]);
+      setHouses(sample.items);
+      setSummary(overall[0] ?? null);
+      setDistricts(byDistrict.filter(d => d.district));
+      setHistograms(Object.fromEntries(HISTOGRAM_METRICS.map((m, i) => [m, hists[i]])));
     } catch (error: unknown) {
       messageApi.error(getErrorMessage(error, "获取房源失败"));
     } finally {
@@ -110,35 +147,19 @@ const VisualizationPage: React.FC = () => {
     }));
   }, [houses]);
 
-  /* ===== 统计 ===== */
-  const stats = useMemo(() => {
-    if (!parsed.length) return null;
-    const total = parsed.length;
-    const sumPrice = parsed.reduce((s, h) => s + h.total_price_yuan, 0);
-    const sumArea = parsed.reduce((s, h) => s + h.area_sqm, 0);
-    return {
-      total,
-      avgPrice: sumPrice / total,
-      avgUnitPrice: sumPrice / sumArea,
-    };
-  }, [parsed]);
-
-  /* ===== 直方图数据 ===== */
-  const totalPriceHist = useMemo(
-    () => binHistogram(parsed.map(h => h.total_price_yuan)),
-    [parsed]
-  );
-  const unitPriceHist = useMemo(
-    () => binHistogram(parsed.map(h => h.unit_price)),
-    [parsed]
-  );
-  const areaHist = useMemo(
-    () => binHistogram(parsed.map(h => h.area_sqm)),
-    [parsed]
-  );
-  const ageHist = useMemo(
-    () => binHistogram(parsed.map(h => h.age_years)),
-    [parsed]
+  /* ===== 直方图数据（服务端分桶） ===== */
+  const totalPriceHist = useMemo(() => toBars(histograms.total_price, 2), [histograms]);
+  const unitPriceHist = useMemo(() => toBars(histograms.unit_price, 5), [histograms]);
+  const areaHist = useMemo(() => toBars(histograms.area, 2), [histograms]);
+  const buildYearHist = useMemo(() => toBars(histograms.build_year, 5), [histograms]);
+  const districtPrice = useMemo(
+    () =>
+      districts.map(d => ({
+        district: d.district,
+        median: Math.round(d.median_unit_price ?? 0),
+        count: d.count,
+      })),
+    [districts]
   );
 
   const corrData = useMemo(() => {
@@ -182,37 +203,61 @@ const VisualizationPage: React.FC = () => {
 
       {loading && <Skeleton active />}
 
-      {!loading && stats && (
+      {!loading && summary && (
         <>
           <Row gutter={16}>
-            <Col span={8}>
+            <Col span={6}>
               <Card style={cardStyle}>
-                <Statistic title="房源数量" value={stats.total} />
+                <Statistic title="房源数量" value={summary.count} />
               </Card>
             </Col>
-            <Col span={8}>
+            <Col span={6}>
               <Card style={cardStyle}>
-                <Statistic title="平均总价" value={formatWan(stats.avgPrice)} />
+                <Statistic
+                  title="平均总价"
+                  value={formatWan((summary.avg_total_price_wan ?? 0) * 10000)}
+                />
               </Card>
             </Col>
-            <Col span={8}>
+            <Col span={6}>
               <Card style={cardStyle}>
                 <Statistic
                   title="平均单价"
-                  value={Math.round(stats.avgUnitPrice)}
+                  value={Math.round(summary.avg_unit_price ?? 0)}
+                  suffix="元/㎡"
+                />
+              </Card>
+            </Col>
+            <Col span={6}>
+              <Card style={cardStyle}>
+                <Statistic
+                  title="单价中位数"
+                  value={Math.round(summary.median_unit_price ?? 0)}
                   suffix="元/㎡"
                 />
               </Card>
             </Col>
           </Row>
           <Divider />
+
+          <Card title="各区单价中位数" style={cardStyle}>
+            <ResponsiveContainer height={260}>
+              <BarChart data={districtPrice}>
+                <XAxis dataKey="district" />
+                <YAxis />
+                <Tooltip />
+                <Bar dataKey="median" name="单价中位数（元/㎡）" fill="#818cf8" />
+              </BarChart>
+            </ResponsiveContainer>
+          </Card>
+          <Divider />
         </>
       )}
 
       {/* ===== 3.1.2 价格分布 ===== */}
       <Row gutter={16}>
         <Col span={12}>
-          <Card title="图3-1 总价分布图" style={cardStyle}>
+          <Card title="图3-1 总价分布图（万）" style={cardStyle}>
             <ResponsiveContainer height={260}>
               <BarChart data={totalPriceHist}>
                 <XAxis dataKey="range" />
@@ -224,7 +269,7 @@ const VisualizationPage: React.FC = () => {
           </Card>
         </Col>
         <Col span={12}>
-          <Card title="图3-2 单价分布图" style={cardStyle}>
+          <Card title="图3-2 单价分布图（元/㎡）" style={cardStyle}>
             <ResponsiveContainer height={260}>
               <BarChart data={unitPriceHist}>
                 <XAxis dataKey="range" />
@@ -242,7 +287,7 @@ const VisualizationPage: React.FC = () => {
       {/* ===== 3.1.3 特征分布 ===== */}
       <Row gutter={16}>
         <Col span={12}>
-          <Card title="图3-3(a) 面积分布" style={cardStyle}>
+          <Card title="图3-3(a) 面积分布（㎡）" style={cardStyle}>
             <ResponsiveContainer height={260}>
               <BarChart data={areaHist}>
                 <XAxis dataKey="range" />
@@ -254,9 +299,9 @@ const VisualizationPage: React.FC = () => {
           </Card>
         </Col>
         <Col span={12}>
-          <Card title="图3-3(b) 楼龄分布" style={cardStyle}>
+          <Card title="图3-3(b) 建成年份分布" style={cardStyle}>
             <ResponsiveContainer height={260}>
-              <BarChart data={ageHist}>
+              <BarChart data={buildYearHist}>
                 <XAxis dataKey="range" />
                 <YAxis />
                 <Tooltip />